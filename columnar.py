@@ -0,0 +1,244 @@
+import os
+import sqlite3
+import sys
+import time
+import numpy as np
+from live_database import open_read_only
+
+# Rows fetched and converted per batch; memory use is bounded by this
+DEFAULT_BATCH_SIZE = 65536
+
+# Read a column as dictionary codes instead of a NumPy type
+DICTIONARY = "dictionary"
+
+# Columns whose stored values don't match their declared type (scores are
+# VARCHAR in test_scores), that are better read narrower than int64, or
+# that are INTEGER but NULL for some rows (person_summary's best scores are
+# NULL for persons without tests, read as NaN)
+COLUMN_TYPES = {
+    'ID': np.int64,
+    'FTE': np.float64,
+    'LISTEN_SCORE': np.int8,
+    'READ_SCORE': np.int8,
+    'BEST_LISTEN_SCORE': np.float64,
+    'BEST_READ_SCORE': np.float64,
+}
+
+# Tables whose declared column types are used for query columns of the same name
+TYPED_TABLES = ("mpd_data", "test_scores", "person_summary")
+
+class DictionaryEncoder(dict):
+    """value -> code mapping that gives each unseen value the next code"""
+
+    def __init__(self):
+        super().__init__()
+        self.values = []
+        self._array = None
+
+    def __missing__(self, value):
+        code = self[value] = len(self.values)
+        self.values.append(value)
+        return code
+
+    def encode(self, values):
+        """int32 codes for a sequence of values, adding new values to the dictionary"""
+        return np.fromiter(map(self.__getitem__, values), dtype=np.int32, count=len(values))
+
+    @property
+    def dictionary(self):
+        """All values seen so far as an object array; code i is dictionary[i]"""
+        if self._array is None or len(self._array) != len(self.values):
+            self._array = np.array(self.values, dtype=object)
+        return self._array
+
+class DictionaryColumn:
+    """
+    A dictionary-encoded string column: codes index into dictionary. Codes
+    stay valid for every batch read through the same ColumnarReader, so
+    batches can be concatenated or grouped by code without decoding.
+    """
+
+    __slots__ = ("codes", "encoder")
+
+    def __init__(self, codes, encoder):
+        self.codes = codes
+        self.encoder = encoder
+
+    @property
+    def dictionary(self):
+        return self.encoder.dictionary
+
+    def decode(self):
+        """The column's values as an object array"""
+        return self.dictionary[self.codes]
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __repr__(self):
+        return f"DictionaryColumn({len(self.codes):,} rows, {len(self.encoder.values):,} values)"
+
+def declared_dtype(declared_type):
+    """NumPy type for a declared SQLite column type (SQLite's affinity rules)"""
+    declared_type = declared_type.upper()
+    if "INT" in declared_type:
+        return np.int64
+    if any(name in declared_type for name in ("REAL", "FLOA", "DOUB")):
+        return np.float64
+    return DICTIONARY
+
+def inferred_dtype(values):
+    """NumPy type for an untyped column (expressions, aggregates) from its first non-NULL value"""
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, int):
+            return np.int64
+        if isinstance(value, float):
+            return np.float64
+        return DICTIONARY
+    return np.float64
+
+def to_array(name, values, dtype):
+    """Convert one column of a batch to a NumPy array"""
+    dtype = np.dtype(dtype)
+    if dtype.kind == 'f':
+        # None becomes NaN
+        return np.array(values, dtype=dtype)
+    if dtype.kind in 'iu':
+        try:
+            return np.fromiter(map(int, values), dtype=dtype, count=len(values))
+        except TypeError:
+            raise ValueError(f"Column {name} contains NULLs; read it as float "
+                             f"(dtypes={{'{name}': 'float64'}}) to get NaN instead") from None
+    return np.array(values, dtype=dtype)
+
+class ColumnarReader:
+    """
+    Runs queries against a database and returns their results as NumPy
+    columns, batch_size rows at a time.
+
+    Rows are transposed per batch (zip(*rows)) and converted a column at a
+    time, so no per-row dicts or objects are built. Numeric columns become
+    typed arrays (FTE float64, scores int8, see COLUMN_TYPES); text columns
+    become DictionaryColumns whose encoders are cached per column name for
+    the life of the reader. Pass dtypes={'SID': object} to read a
+    high-cardinality column as a plain object array instead.
+    """
+
+    def __init__(self, db_file, batch_size=DEFAULT_BATCH_SIZE):
+        self.conn = open_read_only(db_file)
+        self.batch_size = batch_size
+        self.encoders = {}
+        self.column_types = dict(self._declared_types())
+        self.column_types.update(COLUMN_TYPES)
+
+    def _declared_types(self):
+        for table_name in TYPED_TABLES:
+            for _, name, declared_type, *_ in self.conn.execute(f"PRAGMA table_info({table_name})"):
+                if declared_type:
+                    yield name, declared_dtype(declared_type)
+
+    def encoder(self, name):
+        """The cached dictionary encoder of a column"""
+        encoder = self.encoders.get(name)
+        if encoder is None:
+            encoder = self.encoders[name] = DictionaryEncoder()
+        return encoder
+
+    def iter_batches(self, sql, parameters=(), dtypes=None, batch_size=None):
+        """Yield {column: array or DictionaryColumn} for each batch of a query's rows"""
+        cursor = self.conn.execute(sql, parameters)
+        names = [description[0] for description in cursor.description]
+        resolved = {}
+
+        while True:
+            rows = cursor.fetchmany(batch_size or self.batch_size)
+            if not rows:
+                break
+
+            batch = {}
+            for name, values in zip(names, zip(*rows)):
+                dtype = resolved.get(name)
+                if dtype is None:
+                    dtype = (dtypes or {}).get(name) or self.column_types.get(name) or inferred_dtype(values)
+                    resolved[name] = dtype
+                if dtype == DICTIONARY:
+                    encoder = self.encoder(name)
+                    batch[name] = DictionaryColumn(encoder.encode(values), encoder)
+                else:
+                    batch[name] = to_array(name, values, dtype)
+            yield batch
+
+    def iter_table(self, table_name, columns=None, where=None, parameters=(), dtypes=None, batch_size=None,
+                   order_by=None):
+        """
+        Stream a table or view, ordered by order_by - by default ID when the
+        table has one (person_summary and dataset_stats do not) and storage
+        order otherwise
+        """
+        if order_by is None:
+            table_columns = [row[1] for row in self.conn.execute(f"PRAGMA table_info({table_name})")]
+            order_by = "ID" if "ID" in table_columns else ""
+        select = ", ".join(columns) if columns else "*"
+        condition = f" WHERE {where}" if where else ""
+        order = f" ORDER BY {order_by}" if order_by else ""
+        yield from self.iter_batches(f"SELECT {select} FROM {table_name}{condition}{order}",
+                                     parameters, dtypes, batch_size)
+
+    def read(self, sql, parameters=(), dtypes=None):
+        """Run a query and return all its rows as one array (or DictionaryColumn) per column"""
+        parts = {}
+        for batch in self.iter_batches(sql, parameters, dtypes):
+            for name, column in batch.items():
+                parts.setdefault(name, []).append(column)
+
+        columns = {}
+        for name, chunks in parts.items():
+            if isinstance(chunks[0], DictionaryColumn):
+                columns[name] = DictionaryColumn(np.concatenate([chunk.codes for chunk in chunks]),
+                                                 chunks[0].encoder)
+            else:
+                columns[name] = np.concatenate(chunks)
+        return columns
+
+    def close(self):
+        self.conn.close()
+
+def main():
+    # Stream a table and report the column types and read rate
+    db_file = sys.argv[1] if len(sys.argv) > 1 else "development.db"
+    table_name = sys.argv[2] if len(sys.argv) > 2 else "mpd_data"
+
+    if not os.path.exists(db_file):
+        print(f"❌ Error: Database '{db_file}' not found")
+        return 1
+
+    reader = ColumnarReader(db_file)
+    start = time.perf_counter()
+    row_count = 0
+    last_batch = {}
+    for batch in reader.iter_table(table_name):
+        row_count += len(next(iter(batch.values())))
+        last_batch = batch
+    elapsed = time.perf_counter() - start
+
+    print(f"Read {row_count:,} {table_name} rows in {elapsed:.2f}s "
+          f"({row_count / max(elapsed, 1e-9):,.0f} rows/s)")
+    for name, column in last_batch.items():
+        if isinstance(column, DictionaryColumn):
+            print(f"  {name}: dictionary ({len(column.encoder.values):,} values)")
+        else:
+            print(f"  {name}: {column.dtype}")
+    reader.close()
+    return 0
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ['-h', '--help', 'help']:
+        print("Usage:")
+        print("  python columnar.py [database_file] [table]")
+        print("    Streams a table as NumPy column batches and reports column types and rows/s")
+        sys.exit(0)
+
+    exit_code = main()
+    sys.exit(exit_code)
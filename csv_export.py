@@ -0,0 +1,160 @@
+import csv
+import gzip
+import os
+import sqlite3
+import sys
+
+# Rows fetched and written per chunk; memory use is bounded by this
+DEFAULT_CHUNK_SIZE = 50000
+
+def csv_filename(filename, snapshot=None, compress=False):
+    """Output file name, e.g. mpd_data.csv -> mpd_data_FALL_2023.csv.gz"""
+    stem, extension = os.path.splitext(filename)
+    if snapshot:
+        stem = f"{stem}_{snapshot.replace(' ', '_')}"
+    return f"{stem}{extension or '.csv'}{'.gz' if compress else ''}"
+
+def open_csv(filename, compress=False):
+    """Open a CSV file for writing, gzip-compressed if requested"""
+    if compress:
+        return gzip.open(filename, 'wt', newline='', compresslevel=6)
+    return open(filename, 'w', newline='')
+
+def chunked(records, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Split an in-memory list of records into chunks without copying it"""
+    for start in range(0, len(records), chunk_size):
+        yield records[start:start + chunk_size]
+
+def write_csv_batches(batches, filename, columns=None, split_by_snapshot=False, compress=False):
+    """
+    Write batches of record dicts to CSV, one batch at a time.
+
+    columns defaults to the keys of the first record. With split_by_snapshot
+    each SNAPSHOT goes to its own file, opened on first use. Returns
+    {file name: rows written}.
+    """
+    files = {}
+    writers = {}
+    counts = {}
+
+    def writer_for(snapshot):
+        writer = writers.get(snapshot)
+        if writer is None:
+            name = csv_filename(filename, snapshot, compress)
+            files[snapshot] = open_csv(name, compress)
+            writer = writers[snapshot] = csv.writer(files[snapshot])
+            writer.writerow(columns)
+            counts[name] = 0
+        return writer
+
+    try:
+        for batch in batches:
+            if not batch:
+                continue
+            if columns is None:
+                columns = list(batch[0].keys())
+
+            rows = [[record.get(column) for column in columns] for record in batch]
+            if split_by_snapshot:
+                groups = {}
+                for record, row in zip(batch, rows):
+                    groups.setdefault(record['SNAPSHOT'], []).append(row)
+            else:
+                groups = {None: rows}
+
+            for snapshot, group in groups.items():
+                writer_for(snapshot).writerows(group)
+                counts[csv_filename(filename, snapshot, compress)] += len(group)
+    finally:
+        for f in files.values():
+            f.close()
+
+    return counts
+
+def id_is_rowid(cursor, table_name):
+    """
+    Whether ID is the rowid of a table (ID INTEGER PRIMARY KEY), so ORDER BY
+    ID is the table's storage order and costs nothing. Views and clustered
+    WITHOUT ROWID tables would need a sort or per-row index lookups instead.
+    """
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,))
+    row = cursor.fetchone()
+    if row is None or "WITHOUT ROWID" in row[0].upper():
+        return False
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    primary_key = [(name, declared_type) for _, name, declared_type, _, _, pk in cursor.fetchall() if pk]
+    return len(primary_key) == 1 and primary_key[0][0] == "ID" and primary_key[0][1].upper() == "INTEGER"
+
+def iter_table_batches(cursor, table_name, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the rows of a table (or view) as lists of dicts, chunk_size rows at
+    a time: in ID order where that is storage order, otherwise in the order
+    SQLite stores them (per partition, or by (SNAPSHOT, SID, ID) when clustered)
+    """
+    order = " ORDER BY ID" if id_is_rowid(cursor, table_name) else ""
+    cursor.execute(f"SELECT * FROM {table_name}{order}")
+    columns = [description[0] for description in cursor.description]
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield [dict(zip(columns, row)) for row in rows]
+
+def export_table(db_file, table_name, filename=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 split_by_snapshot=False, compress=False):
+    """Export one table of a SQLite database to CSV in chunks"""
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT * FROM {table_name} LIMIT 0")
+    columns = [description[0] for description in cursor.description]
+
+    counts = write_csv_batches(
+        iter_table_batches(cursor, table_name, chunk_size), filename or f"{table_name}.csv",
+        columns, split_by_snapshot, compress
+    )
+    conn.close()
+
+    for name, count in counts.items():
+        print(f"Data saved to {name} ({count:,} records)")
+    return counts
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options = {}
+    for arg in sys.argv[1:]:
+        if arg.startswith('--'):
+            name, _, value = arg[2:].partition('=')
+            options[name] = value if value else True
+
+    db_file = args[0] if args else "development.db"
+    tables = args[1:] or ["mpd_data", "test_scores"]
+    chunk_size = int(options['chunk-size']) if options.get('chunk-size') else DEFAULT_CHUNK_SIZE
+
+    if not os.path.exists(db_file):
+        print(f"❌ Error: Database '{db_file}' not found")
+        return 1
+
+    for table_name in tables:
+        export_table(db_file, table_name, chunk_size=chunk_size,
+                     split_by_snapshot=bool(options.get('split')), compress=bool(options.get('gzip')))
+    return 0
+
+def show_usage():
+    """Show usage instructions"""
+    print("Usage:")
+    print("  python csv_export.py [database_file] [table ...] [--split] [--gzip] [--chunk-size=N]")
+    print("")
+    print("Examples:")
+    print("  python csv_export.py")
+    print("    Exports mpd_data and test_scores from development.db to mpd_data.csv and test_scores.csv")
+    print("")
+    print("  python csv_export.py development.db mpd_data --split --gzip")
+    print("    Writes one gzip-compressed file per snapshot (mpd_data_FALL_2023.csv.gz, ...)")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ['-h', '--help', 'help']:
+        show_usage()
+        sys.exit(0)
+
+    exit_code = main()
+    sys.exit(exit_code)
@@ -1,21 +1,32 @@
 import json
+import os
 import random
+import sqlite3
 import string
+import tempfile
 from datetime import datetime
 
-def generate_mpd_dataset(total_rows=100000):
+# The 4 snapshots, oldest first
+SNAPSHOTS = [
+    {"snapshot": "FALL 2023", "date": "2023-10-31"},
+    {"snapshot": "SPRING 2024", "date": "2024-02-28"},
+    {"snapshot": "FALL 2024", "date": "2024-10-31"},
+    {"snapshot": "SPRING 2025", "date": "2025-02-28"}
+]
+
+def iter_mpd_batches(total_rows=100000, batch_size=10000, progress=None, resume=None):
     """
-    Generate 100k rows of notional MPD dashboard data
+    Generate notional MPD dashboard data, yielding lists of up to batch_size
+    records (a person's roles are never split across batches).
+
+    If given, progress is updated with person_index and record_id before each
+    yield; passing those back as resume (with the RNG state captured at that
+    yield) continues the run exactly where it stopped.
     """
     data = []
     
     # Define the 4 snapshots
-    snapshots = [
-        {"snapshot": "Fall 2023", "date": "2023-10-31"},
-        {"snapshot": "Spring 2024", "date": "2024-02-28"},
-        {"snapshot": "Fall 2024", "date": "2024-10-31"},
-        {"snapshot": "Spring 2025", "date": "2025-02-28"}
-    ]
+    snapshots = SNAPSHOTS
     
     # Define valid values for constrained fields
     nipf_priority = ["1", "2", "3", "4", "NONE"]
@@ -244,8 +255,17 @@ def generate_mpd_dataset(total_rows=100000):
 
     # Now generate records for each person
     record_id = 1
+    start_person = 0
+
+    if resume:
+        # People were re-planned from the run's initial RNG state above;
+        # jump to where the checkpoint stopped
+        random.setstate(resume['rng_state'])
+        record_id = resume['record_id']
+        start_person = resume['person_index']
 
-    for person_idx, num_roles in enumerate(people):
+    for person_idx in range(start_person, len(people)):
+        num_roles = people[person_idx]
         # Generate base attributes that stay the same across all roles for this person
         sid = generate_sid()
         snapshot = random.choice(snapshots)
@@ -314,11 +334,163 @@ def generate_mpd_dataset(total_rows=100000):
         if record_id % 2500 == 0:
             print(f"Generated {record_id:,} MPD records...")
 
+        if len(data) >= batch_size:
+            if progress is not None:
+                progress.update(person_index=person_idx + 1, record_id=record_id)
+            yield data
+            data = []
+
+    if data:
+        if progress is not None:
+            progress.update(person_index=len(people), record_id=record_id)
+        yield data
+
+def generate_mpd_dataset(total_rows=100000):
+    """
+    Generate 100k rows of notional MPD dashboard data
+    """
+    data = []
+    for batch in iter_mpd_batches(total_rows):
+        data.extend(batch)
     return data
 
-def generate_test_scores_dataset(mpd_data, total_test_records=7000):
+# Temporal mode: most roles a person can hold, used to derive stable row IDs
+MAX_ROLES = 4
+
+# Person-level attributes that change together when a person's record is updated
+ATTRIBUTE_GROUPS = [
+    ("CITY", "STATE", "COUNTRY"),
+    ("DUTY_ORG", "MISSION_ELEMENT", "ASSIGNED_ORG"),
+    ("BUILDING",),
+    ("STATUS",),
+    ("WORK_ROLE",),
+    ("CIMPL_RANK_CATEGORY",),
+    ("SITE",),
+    ("LOE_JUSTIFICATION",),
+    ("TOKENS",),
+]
+
+# Role-level attributes, replaced as a set when a person's roles are reshuffled
+ROLE_FIELDS = ["DOMAIN", "FUNCTION", "DFP", "CIMPL_RANK", "FTE"]
+
+def iter_generated_persons(batch_rows):
+    """Endless stream of freshly generated persons, each a list of role records"""
+    while True:
+        roles = []
+        for batch in iter_mpd_batches(batch_rows):
+            for record in batch:
+                if roles and record['SID'] != roles[0]['SID']:
+                    yield roles
+                    roles = []
+                roles.append(record)
+        # The last person of a run may be cut short to hit batch_rows, so
+        # their FTE would not sum to 1.0 - drop them
+
+def generate_temporal_dataset(total_rows=100000, churn=0.1, change_rate=0.2):
     """
-    Generate test scores dataset with SIDs that reference the MPD dataset
+    Generate MPD data where the same people persist across all snapshots.
+
+    Each snapshot gets an even share of the rows still to generate (about
+    total_rows / 4 records), so the result has exactly total_rows records. Each
+    later snapshot loses `churn` of the previous workforce, replaces them with
+    new hires, and updates one attribute group (or the role split) for
+    `change_rate` of the people who stay. Replacement values are taken from
+    freshly generated persons, so distributions match the normal generator.
+
+    Row IDs are derived from a stable person key and role position:
+    ID = snapshot_index * stride + person_key * MAX_ROLES + role_index + 1,
+    so a role that does not change keeps the same ID modulo the stride.
+    """
+    rows_per_snapshot = max(1, total_rows // len(SNAPSHOTS))
+    print(f"Generating {len(SNAPSHOTS)} temporal snapshots of ~{rows_per_snapshot:,} MPD records "
+          f"(churn {churn:.0%}, change rate {change_rate:.0%})...")
+
+    donors = iter_generated_persons(rows_per_snapshot)
+    used_sids = set()
+    person_count = 0
+
+    leavers = changed = 0
+
+    def hire(max_roles):
+        # Only whole persons that fit are hired, so their FTE still sums to 1.0
+        nonlocal person_count
+        while True:
+            roles = next(donors)
+            if len(roles) <= max_roles and roles[0]['SID'] not in used_sids:
+                break
+        used_sids.add(roles[0]['SID'])
+        person_key = person_count
+        person_count += 1
+        return person_key, [dict(record) for record in roles]
+
+    def fill(workforce):
+        # Each snapshot gets an even share of the rows still to generate, so
+        # the snapshots add up to exactly total_rows
+        nonlocal leavers
+        produced = sum(len(roles) for previous in workforces for _, roles in previous)
+        snapshots_left = len(SNAPSHOTS) - len(workforces)
+        budget = -(-(total_rows - produced) // snapshots_left)
+
+        rows = sum(len(roles) for _, roles in workforce)
+        # New role splits can grow the people who stay past the budget
+        while rows > budget:
+            _, roles = workforce.pop()
+            rows -= len(roles)
+            leavers += 1
+        while rows < budget:
+            person_key, roles = hire(budget - rows)
+            workforce.append((person_key, roles))
+            rows += len(roles)
+        return workforce
+
+    workforces = []
+    workforces.append(fill([]))
+    for _ in SNAPSHOTS[1:]:
+        workforce = []
+        for person_key, roles in workforces[-1]:
+            if random.random() < churn:
+                leavers += 1
+                continue
+
+            if random.random() < change_rate:
+                changed += 1
+                donor = next(donors)
+                group = random.choice(ATTRIBUTE_GROUPS + [ROLE_FIELDS])
+                if group is ROLE_FIELDS:
+                    # New role split: person-level fields stay, roles come from the donor
+                    roles = [dict(roles[0], **{field: role[field] for field in ROLE_FIELDS})
+                             for role in donor]
+                else:
+                    roles = [dict(role, **{field: donor[0][field] for field in group})
+                             for role in roles]
+
+            workforce.append((person_key, roles))
+        workforces.append(fill(workforce))
+
+    stride = person_count * MAX_ROLES
+    data = []
+    for snapshot_index, (snapshot, workforce) in enumerate(zip(SNAPSHOTS, workforces)):
+        for person_key, roles in workforce:
+            for role_index, role in enumerate(roles):
+                record = dict(role)
+                record['ID'] = snapshot_index * stride + person_key * MAX_ROLES + role_index + 1
+                record['SNAPSHOT'] = snapshot['snapshot']
+                record['SNAPSHOT_MONTH'] = snapshot['date']
+                data.append(record)
+
+    print(f"Generated {len(data):,} MPD records for {person_count:,} people "
+          f"({leavers:,} departures, {changed:,} attribute changes)")
+    return data
+
+def iter_test_score_batches(mpd_data, total_test_records=7000, batch_size=10000,
+                            progress=None, resume=None, rng=random, start_id=1):
+    """
+    Generate test scores with SIDs that reference the MPD dataset, yielding
+    lists of up to batch_size records. mpd_data only needs SID, SNAPSHOT and
+    SNAPSHOT_MONTH, so one record per person is enough. progress/resume work
+    as in iter_mpd_batches, tracking next_id. Values are drawn from rng (the
+    global random module unless a seeded generator is passed). IDs run from
+    start_id to total_test_records, so a dataset can be generated in slices.
     """
     test_data = []
     
@@ -357,7 +529,7 @@ def generate_test_scores_dataset(mpd_data, total_test_records=7000):
         """Generate ABAC token expressions with weighted complexity"""
         # Weighted complexity distribution
         complexity_weights = [40, 35, 25]  # Simple, Medium, Complex percentages
-        complexity_choice = random.choices(['simple', 'medium', 'complex'], weights=complexity_weights)[0]
+        complexity_choice = rng.choices(['simple', 'medium', 'complex'], weights=complexity_weights)[0]
         
         if complexity_choice == 'simple':
             return generate_simple_tokens()
@@ -369,43 +541,47 @@ def generate_test_scores_dataset(mpd_data, total_test_records=7000):
     def generate_simple_tokens():
         """Generate simple token expressions (1-2 tokens)"""
         patterns = [
-            lambda: random.choice(tokens),  # Single token: AAA
-            lambda: f"{random.choice(tokens)}&{random.choice(tokens)}",  # Two AND: AAA&BBB
-            lambda: f"{random.choice(tokens)}|{random.choice(tokens)}",  # Two OR: AAA|BBB
+            lambda: rng.choice(tokens),  # Single token: AAA
+            lambda: f"{rng.choice(tokens)}&{rng.choice(tokens)}",  # Two AND: AAA&BBB
+            lambda: f"{rng.choice(tokens)}|{rng.choice(tokens)}",  # Two OR: AAA|BBB
         ]
-        return random.choice(patterns)()
+        return rng.choice(patterns)()
     
     def generate_medium_tokens():
         """Generate medium complexity expressions (3-4 tokens), favoring AAA&BBB&CCC"""
         # 30% chance for the favored AAA&BBB&CCC pattern
-        if random.random() < 0.3:
+        if rng.random() < 0.3:
             return "AAA&BBB&CCC"
         
         patterns = [
-            lambda: f"{random.choice(tokens)}&{random.choice(tokens)}&{random.choice(tokens)}",  # Three AND
-            lambda: f"{random.choice(tokens)}|{random.choice(tokens)}|{random.choice(tokens)}",  # Three OR
-            lambda: f"({random.choice(tokens)}|{random.choice(tokens)})&{random.choice(tokens)}",  # (A|B)&C
-            lambda: f"{random.choice(tokens)}&({random.choice(tokens)}|{random.choice(tokens)})",  # A&(B|C)
-            lambda: f"({random.choice(tokens)}&{random.choice(tokens)})|{random.choice(tokens)}",  # (A&B)|C
+            lambda: f"{rng.choice(tokens)}&{rng.choice(tokens)}&{rng.choice(tokens)}",  # Three AND
+            lambda: f"{rng.choice(tokens)}|{rng.choice(tokens)}|{rng.choice(tokens)}",  # Three OR
+            lambda: f"({rng.choice(tokens)}|{rng.choice(tokens)})&{rng.choice(tokens)}",  # (A|B)&C
+            lambda: f"{rng.choice(tokens)}&({rng.choice(tokens)}|{rng.choice(tokens)})",  # A&(B|C)
+            lambda: f"({rng.choice(tokens)}&{rng.choice(tokens)})|{rng.choice(tokens)}",  # (A&B)|C
         ]
-        return random.choice(patterns)()
+        return rng.choice(patterns)()
     
     def generate_complex_tokens():
         """Generate complex token expressions (5+ tokens with nesting)"""
         patterns = [
-            lambda: f"({random.choice(tokens)}&{random.choice(tokens)})&({random.choice(tokens)}|{random.choice(tokens)}|{random.choice(tokens)})",  # (A&B)&(C|D|E)
-            lambda: f"{random.choice(tokens)}&({random.choice(tokens)}|{random.choice(tokens)})&({random.choice(tokens)}|{random.choice(tokens)})",  # A&(B|C)&(D|E)
-            lambda: f"({random.choice(tokens)}&{random.choice(tokens)}&{random.choice(tokens)})|({random.choice(tokens)}&{random.choice(tokens)})",  # (A&B&C)|(D&E)
-            lambda: f"({random.choice(tokens)}|{random.choice(tokens)})&({random.choice(tokens)}|{random.choice(tokens)})&{random.choice(tokens)}",  # (A|B)&(C|D)&E
-            lambda: f"{random.choice(tokens)}&{random.choice(tokens)}&({random.choice(tokens)}|{random.choice(tokens)}|{random.choice(tokens)}|{random.choice(tokens)})",  # A&B&(C|D|E|F)
+            lambda: f"({rng.choice(tokens)}&{rng.choice(tokens)})&({rng.choice(tokens)}|{rng.choice(tokens)}|{rng.choice(tokens)})",  # (A&B)&(C|D|E)
+            lambda: f"{rng.choice(tokens)}&({rng.choice(tokens)}|{rng.choice(tokens)})&({rng.choice(tokens)}|{rng.choice(tokens)})",  # A&(B|C)&(D|E)
+            lambda: f"({rng.choice(tokens)}&{rng.choice(tokens)}&{rng.choice(tokens)})|({rng.choice(tokens)}&{rng.choice(tokens)})",  # (A&B&C)|(D&E)
+            lambda: f"({rng.choice(tokens)}|{rng.choice(tokens)})&({rng.choice(tokens)}|{rng.choice(tokens)})&{rng.choice(tokens)}",  # (A|B)&(C|D)&E
+            lambda: f"{rng.choice(tokens)}&{rng.choice(tokens)}&({rng.choice(tokens)}|{rng.choice(tokens)}|{rng.choice(tokens)}|{rng.choice(tokens)})",  # A&B&(C|D|E|F)
         ]
-        return random.choice(patterns)()
+        return rng.choice(patterns)()
     
-    print(f"Generating {total_test_records:,} test score records...")
+    print(f"Generating {total_test_records - start_id + 1:,} test score records...")
     
-    for i in range(1, total_test_records + 1):
+    if resume:
+        rng.setstate(resume['rng_state'])
+        start_id = resume['next_id']
+
+    for i in range(start_id, total_test_records + 1):
         # Select a random valid SID/snapshot combination
-        selected_key = random.choice(valid_sid_snapshots)
+        selected_key = rng.choice(valid_sid_snapshots)
         sid, snapshot = selected_key.split('_', 1)
         
         # Get the corresponding snapshot date
@@ -413,13 +589,13 @@ def generate_test_scores_dataset(mpd_data, total_test_records=7000):
         snapshot_date = mpd_record['SNAPSHOT_MONTH']
         
         # Generate scores (1-5)
-        listen_score = random.randint(1, 5)
-        read_score = random.randint(1, 5)
+        listen_score = rng.randint(1, 5)
+        read_score = rng.randint(1, 5)
         
         test_record = {
             "ID": i,
             "SID": sid,
-            "LANGUAGE": random.choice(star_wars_languages),
+            "LANGUAGE": rng.choice(star_wars_languages),
             "LISTEN_SCORE": str(listen_score),
             "READ_SCORE": str(read_score),
             "TEST_GROUP": determine_test_group(listen_score, read_score),
@@ -433,7 +609,25 @@ def generate_test_scores_dataset(mpd_data, total_test_records=7000):
         # Progress indicator
         if i % 1000 == 0:
             print(f"Generated {i:,} test score records...")
-    
+
+        if len(test_data) >= batch_size:
+            if progress is not None:
+                progress.update(next_id=i + 1)
+            yield test_data
+            test_data = []
+
+    if test_data:
+        if progress is not None:
+            progress.update(next_id=total_test_records + 1)
+        yield test_data
+
+def generate_test_scores_dataset(mpd_data, total_test_records=7000, rng=random):
+    """
+    Generate test scores dataset with SIDs that reference the MPD dataset
+    """
+    test_data = []
+    for batch in iter_test_score_batches(mpd_data, total_test_records, rng=rng):
+        test_data.extend(batch)
     return test_data
 
 def save_to_json(data, filename):
@@ -442,15 +636,33 @@ def save_to_json(data, filename):
         json.dump(data, f, indent=2)
     print(f"Data saved to {filename}")
 
-def save_to_csv(data, filename):
-    """Save data to CSV file using pandas"""
-    try:
-        import pandas as pd
-        df = pd.DataFrame(data)
-        df.to_csv(filename, index=False)
-        print(f"Data saved to {filename}")
-    except ImportError:
-        print("pandas not installed. Install with: pip install pandas")
+def snapshot_filename(filename, snapshot):
+    """Per-snapshot file name, e.g. mpd_notional_data.json -> mpd_notional_data_FALL_2023.json"""
+    stem, extension = os.path.splitext(filename)
+    return f"{stem}_{snapshot.replace(' ', '_')}{extension}"
+
+def save_partitioned_json(data, filename):
+    """Save data to one JSON file per SNAPSHOT, returning the file names written"""
+    by_snapshot = {}
+    for record in data:
+        by_snapshot.setdefault(record['SNAPSHOT'], []).append(record)
+
+    filenames = []
+    for snapshot, records in sorted(by_snapshot.items()):
+        partition_file = snapshot_filename(filename, snapshot)
+        save_to_json(records, partition_file)
+        filenames.append(partition_file)
+    return filenames
+
+def save_to_csv(data, filename, split_by_snapshot=False, compress=False):
+    """Save data (a list of records or an iterable of batches) to CSV in chunks"""
+    from csv_export import chunked, write_csv_batches
+
+    batches = chunked(data) if isinstance(data, list) else data
+    counts = write_csv_batches(batches, filename, split_by_snapshot=split_by_snapshot, compress=compress)
+    for name, count in counts.items():
+        print(f"Data saved to {name} ({count:,} records)")
+    return list(counts)
 
 def get_mpd_data_summary(data):
     """Print summary statistics of the MPD data"""
@@ -584,20 +796,250 @@ def get_test_scores_summary(test_data, mpd_data):
     for i, token_expr in enumerate(sample_tokens, 1):
         print(f"  {i}. {token_expr}")
 
+def run_generation_pipeline(mpd_record_count, test_record_count, schema_file=None,
+                            db_file=None, workers=None, csv_options=None):
+    """
+    Generate, encode and write concurrently (see pipeline.py) so the CPU keeps
+    generating while earlier batches are encoded and written. Writes JSON files,
+    or loads straight into a SQLite database when db_file is given. Test
+    scores are drawn from each MPD batch as it streams past and spilled to a
+    temporary file until the test stage, so memory stays bounded by the batch
+    size rather than growing with the number of persons.
+
+    With csv_options ({"split_by_snapshot": ..., "compress": ...}) batches are
+    streamed to CSV files instead, written batch by batch in this process.
+    """
+    from pipeline import pipeline_to_json, pipeline_to_sqlite
+
+    if schema_file:
+        from schema_compiler import load_schema, compile_schema
+        generate_batches, _ = compile_schema(load_schema(schema_file))
+        mpd_batches = generate_batches(mpd_record_count, random)
+    else:
+        mpd_batches = iter_mpd_batches(mpd_record_count)
+
+    # Each MPD batch gets a share of the test scores proportional to its rows,
+    # drawn from its own persons, so every test references an MPD person. The
+    # tests use their own generator, seeded from the current random state
+    # without advancing it, so the MPD rows match the sequential mode
+    test_rng = random.Random(str(random.getstate()))
+    test_spill = tempfile.TemporaryFile(mode='w+')
+    def track_persons(batches):
+        rows_seen = 0
+        tests_drawn = 0
+        for batch in batches:
+            rows_seen += len(batch)
+            target = min(test_record_count, round(test_record_count * rows_seen / max(mpd_record_count, 1)))
+            if target > tests_drawn:
+                for tests in iter_test_score_batches(batch, target, rng=test_rng, start_id=tests_drawn + 1):
+                    test_spill.write(json.dumps(tests) + "\n")
+                tests_drawn = target
+            yield batch
+
+    def test_batches():
+        test_spill.seek(0)
+        for line in test_spill:
+            yield json.loads(line)
+        test_spill.close()
+
+    if db_file:
+        from json_to_sqlite import (create_mpd_table, create_test_scores_table, create_indexes,
+                                    create_views, create_person_summary, refresh_stats, get_database_stats,
+                                    start_rebuild, publish_database)
+        from token_index import create_token_index
+
+        # Build next to the live database and swap it in when done
+        build_file = start_rebuild(db_file)
+        conn = sqlite3.connect(build_file)
+        create_mpd_table(conn.cursor())
+        create_test_scores_table(conn.cursor())
+        conn.commit()
+
+        pipeline_to_sqlite(track_persons(mpd_batches), build_file, "mpd_data", workers)
+        test_count = pipeline_to_sqlite(test_batches(), build_file, "test_scores", workers)
+
+        cursor = conn.cursor()
+        create_indexes(cursor)
+        create_views(cursor)
+        create_person_summary(cursor)
+        create_token_index(cursor)
+        refresh_stats(cursor)
+        conn.commit()
+        get_database_stats(cursor)
+        conn.close()
+        publish_database(build_file, db_file)
+        return [db_file], test_count
+
+    if csv_options is not None:
+        mpd_files = save_to_csv(track_persons(mpd_batches), "mpd_notional_data.csv", **csv_options)
+        test_files = save_to_csv(test_batches(), "test_scores_notional_data.csv", **csv_options)
+        return mpd_files + test_files, test_record_count
+
+    pipeline_to_json(track_persons(mpd_batches), "mpd_notional_data.json", workers)
+    test_count = pipeline_to_json(test_batches(), "test_scores_notional_data.json", workers)
+    return ["mpd_notional_data.json", "test_scores_notional_data.json"], test_count
+
+CHECKPOINT_FILE = "generation.checkpoint.json"
+
+def rng_state_to_json(state):
+    """Convert random.getstate() into JSON-serializable lists"""
+    version, internal_state, gauss_next = state
+    return [version, list(internal_state), gauss_next]
+
+def rng_state_from_json(state):
+    """Convert a JSON RNG state back into the form random.setstate() expects"""
+    version, internal_state, gauss_next = state
+    return (version, tuple(internal_state), gauss_next)
+
+def save_checkpoint(checkpoint, filename=CHECKPOINT_FILE):
+    """Write the checkpoint atomically so a crash never leaves a partial file"""
+    temp_file = filename + ".tmp"
+    with open(temp_file, 'w') as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_file, filename)
+
+def write_json_batches(filename, batches, offset, on_batch):
+    """
+    Append batches to a JSON array file starting at a byte offset (0 = new
+    file). After each batch the file is fsynced and on_batch(offset) is called
+    with the offset a resumed run should truncate back to.
+    """
+    from pipeline import encode_json_batch
+
+    with open(filename, 'r+' if offset else 'w') as f:
+        if offset:
+            f.seek(offset)
+            f.truncate()
+
+        for batch in batches:
+            if not batch:
+                continue
+            f.write("[\n" if f.tell() == 0 else ",\n")
+            f.write(encode_json_batch(batch))
+            f.flush()
+            os.fsync(f.fileno())
+            on_batch(f.tell())
+
+        f.write("[]" if f.tell() == 0 else "\n]")
+
+def read_person_keys(filename):
+    """Stream an MPD JSON file and return one SID/SNAPSHOT/SNAPSHOT_MONTH record per person"""
+    from json_to_sqlite import iter_json_records
+
+    persons = {}
+    for record in iter_json_records(filename):
+        key = (record['SID'], record['SNAPSHOT'])
+        if key not in persons:
+            persons[key] = {
+                "SID": record['SID'],
+                "SNAPSHOT": record['SNAPSHOT'],
+                "SNAPSHOT_MONTH": record['SNAPSHOT_MONTH']
+            }
+    return list(persons.values())
+
+def run_checkpointed_generation(mpd_record_count, test_record_count, resume=False,
+                                checkpoint_file=CHECKPOINT_FILE):
+    """
+    Generate both JSON files batch by batch, checkpointing the RNG state, next
+    ID, person index and output offsets after every batch. With resume=True the
+    run continues from the checkpoint and produces the same files an
+    uninterrupted run would; without a checkpoint it starts a fresh run.
+    """
+    mpd_file = "mpd_notional_data.json"
+    test_file = "test_scores_notional_data.json"
+
+    if resume and not os.path.exists(checkpoint_file):
+        # The previous run finished (and removed it) or never started
+        print(f"⚠️  No checkpoint {checkpoint_file} to resume from; starting a fresh run")
+        resume = False
+
+    if resume:
+        with open(checkpoint_file, 'r') as f:
+            checkpoint = json.load(f)
+        print(f"⏩ Resuming {checkpoint['stage']} stage from {checkpoint_file}")
+    else:
+        checkpoint = {
+            "mpd_record_count": mpd_record_count,
+            "test_record_count": test_record_count,
+            "initial_rng_state": rng_state_to_json(random.getstate()),
+            "stage": "mpd",
+            "rng_state": None,
+            "person_index": 0,
+            "record_id": 1,
+            "mpd_offset": 0
+        }
+        save_checkpoint(checkpoint, checkpoint_file)
+
+    progress = {}
+
+    def on_batch(offset_key):
+        def record_batch(offset):
+            checkpoint.update(progress)
+            checkpoint["rng_state"] = rng_state_to_json(random.getstate())
+            checkpoint[offset_key] = offset
+            save_checkpoint(checkpoint, checkpoint_file)
+        return record_batch
+
+    if checkpoint["stage"] == "mpd":
+        # The person plan is drawn first, so always replay it from the initial state
+        random.setstate(rng_state_from_json(checkpoint["initial_rng_state"]))
+        resume_state = None
+        if checkpoint["rng_state"]:
+            resume_state = {
+                "rng_state": rng_state_from_json(checkpoint["rng_state"]),
+                "person_index": checkpoint["person_index"],
+                "record_id": checkpoint["record_id"]
+            }
+
+        batches = iter_mpd_batches(checkpoint["mpd_record_count"], progress=progress, resume=resume_state)
+        write_json_batches(mpd_file, batches, checkpoint["mpd_offset"], on_batch("mpd_offset"))
+        print(f"Data saved to {mpd_file}")
+
+        checkpoint.update(stage="test", rng_state=rng_state_to_json(random.getstate()),
+                          next_id=1, test_offset=0)
+        save_checkpoint(checkpoint, checkpoint_file)
+
+    persons = read_person_keys(mpd_file)
+    resume_state = {
+        "rng_state": rng_state_from_json(checkpoint["rng_state"]),
+        "next_id": checkpoint["next_id"]
+    }
+    batches = iter_test_score_batches(persons, checkpoint["test_record_count"],
+                                      progress=progress, resume=resume_state)
+    write_json_batches(test_file, batches, checkpoint["test_offset"], on_batch("test_offset"))
+    print(f"Data saved to {test_file}")
+
+    os.remove(checkpoint_file)
+    return [mpd_file, test_file], checkpoint["test_record_count"]
+
 # Main execution
 if __name__ == "__main__":
     import sys
     
     print("=== MPD Dashboard Data Generation ===\n")
     
+    # Separate --options (--name or --name=value) from positional arguments
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options = {}
+    for arg in sys.argv[1:]:
+        if arg.startswith('--'):
+            name, _, value = arg[2:].partition('=')
+            options[name] = value if value else True
+    partitioned = bool(options.get('partitioned'))
+    schema_file = options.get('schema')
+    if schema_file is True:
+        schema_file = "mpd_schema.json"
+
     # Get MPD record count from command line argument, default to 100000
     mpd_record_count = 100000
-    if len(sys.argv) > 1:
+    if len(args) > 0:
         try:
-            mpd_record_count = int(sys.argv[1])
+            mpd_record_count = int(args[0])
             print(f"Using command line argument: {mpd_record_count:,} MPD records")
         except ValueError:
-            print(f"Invalid argument '{sys.argv[1]}'. Using default: {mpd_record_count:,} records")
+            print(f"Invalid argument '{args[0]}'. Using default: {mpd_record_count:,} records")
     else:
         print(f"No argument provided. Using default: {mpd_record_count:,} MPD records")
     
@@ -606,9 +1048,54 @@ if __name__ == "__main__":
     test_record_count = max(1, int(mpd_record_count * 0.7))
     print(f"Will generate approximately {test_record_count:,} test score records")
     print(f"Expected SIDs with tests: ~{int(test_record_count/7):,} ({(test_record_count/7)/mpd_record_count*100:.1f}% of MPD SIDs)")
+
+    if options.get('checkpoint') or options.get('resume'):
+        # Batch-by-batch generation that can be resumed after a crash;
+        # summaries are skipped because the full dataset is never in memory
+        files, test_count = run_checkpointed_generation(
+            mpd_record_count, test_record_count, resume=bool(options.get('resume'))
+        )
+
+        print("\n=== Generation Complete! ===")
+        print("Files created:")
+        for filename in files:
+            print(f"- {filename}")
+        print(f"({test_count:,} test score records)")
+        sys.exit(0)
+
+    if options.get('pipeline'):
+        # Concurrent generate -> encode -> write stages; summaries are skipped
+        # because the full dataset is never held in memory
+        workers = int(options['workers']) if options.get('workers') else None
+        db_file = options.get('db') or None
+        if db_file is True:
+            db_file = "development.db"
+        csv_options = None
+        if options.get('csv'):
+            csv_options = {"split_by_snapshot": partitioned, "compress": bool(options.get('gzip'))}
+        files, test_count = run_generation_pipeline(
+            mpd_record_count, test_record_count, schema_file, db_file, workers, csv_options
+        )
+
+        print("\n=== Generation Complete! ===")
+        print("Files created:")
+        for filename in files:
+            print(f"- {filename}")
+        print(f"({mpd_record_count:,} MPD records, {test_count:,} test score records)")
+        sys.exit(0)
     
     # Generate the MPD dataset
-    mpd_data = generate_mpd_dataset(mpd_record_count)
+    if options.get('temporal'):
+        # The same people across all snapshots, with churn and attribute changes
+        churn = float(options['churn']) if options.get('churn') else 0.1
+        change_rate = float(options['change-rate']) if options.get('change-rate') else 0.2
+        mpd_data = generate_temporal_dataset(mpd_record_count, churn, change_rate)
+    elif schema_file:
+        # Compiled generator driven by the declarative schema spec
+        from schema_compiler import generate_from_schema
+        mpd_data = generate_from_schema(mpd_record_count, schema_file)
+    else:
+        mpd_data = generate_mpd_dataset(mpd_record_count)
     
     # Generate the test scores dataset (referencing MPD data)
     test_scores_data = generate_test_scores_dataset(mpd_data, test_record_count)
@@ -617,22 +1104,39 @@ if __name__ == "__main__":
     get_mpd_data_summary(mpd_data)
     get_test_scores_summary(test_scores_data, mpd_data)
     
-    # Save MPD data
-    save_to_json(mpd_data, "mpd_notional_data.json")
-    
-    # Save test scores data
-    save_to_json(test_scores_data, "test_scores_notional_data.json")
+    if partitioned:
+        # Save one file per snapshot
+        mpd_files = save_partitioned_json(mpd_data, "mpd_notional_data.json")
+        test_files = save_partitioned_json(test_scores_data, "test_scores_notional_data.json")
+    else:
+        # Save MPD data
+        save_to_json(mpd_data, "mpd_notional_data.json")
+        
+        # Save test scores data
+        save_to_json(test_scores_data, "test_scores_notional_data.json")
+        mpd_files = ["mpd_notional_data.json"]
+        test_files = ["test_scores_notional_data.json"]
     
-    # Optionally save to CSV (requires pandas)
-    # save_to_csv(mpd_data, "mpd_notional_data.csv")
-    # save_to_csv(test_scores_data, "test_scores_notional_data.csv")
+    if options.get('csv'):
+        # Also save CSV files, split per snapshot with --partitioned
+        compress = bool(options.get('gzip'))
+        mpd_files += save_to_csv(mpd_data, "mpd_notional_data.csv", partitioned, compress)
+        test_files += save_to_csv(test_scores_data, "test_scores_notional_data.csv", partitioned, compress)
     
     print("\n=== Generation Complete! ===")
     print("Files created:")
-    print(f"- mpd_notional_data.json ({mpd_record_count:,} MPD records)")
-    print(f"- test_scores_notional_data.json ({len(test_scores_data):,} test score records)")
-    print("- Uncomment save_to_csv() lines to also create CSV files")
-    print(f"\nUsage: python generate_mpd_data.py [number_of_mpd_records]")
+    for filename in mpd_files:
+        print(f"- {filename}")
+    for filename in test_files:
+        print(f"- {filename}")
+    print(f"({mpd_record_count:,} MPD records, {len(test_scores_data):,} test score records)")
+    if not options.get('csv'):
+        print("- Add --csv (optionally --gzip) to also create CSV files")
+    print(f"\nUsage: python generate_mpd_data.py [number_of_mpd_records] [--partitioned] [--schema[=mpd_schema.json]]")
+    print(f"       python generate_mpd_data.py [number_of_mpd_records] [--partitioned] --csv [--gzip]")
+    print(f"       python generate_mpd_data.py [number_of_mpd_records] --pipeline [--workers=N] [--db[=development.db] | --csv [--gzip]]")
+    print(f"       python generate_mpd_data.py [number_of_mpd_records] --checkpoint   (then --resume after a crash)")
+    print(f"       python generate_mpd_data.py [number_of_mpd_records] --temporal [--churn=0.1] [--change-rate=0.2]")
     print(f"Example: python generate_mpd_data.py 1000")
     print(f"  - Creates 1000 MPD records")
     print(f"  - Creates ~700 test score records (~10% of SIDs with avg 7 tests each)")
@@ -650,10 +1154,22 @@ if __name__ == "__main__":
         print("❌ Some test score SIDs do not exist in MPD data")
 
 # Example: Generate smaller samples for testing
-def generate_samples(mpd_rows=1000, test_rows=100):
-    """Generate smaller samples for testing"""
-    sample_mpd = generate_mpd_dataset(mpd_rows)
-    sample_test = generate_test_scores_dataset(sample_mpd, test_rows)
+def generate_samples(mpd_rows=1000, test_rows=100, seed=None):
+    """
+    Generate smaller samples for testing. With a seed the MPD sample is the
+    first mpd_rows rows of VirtualDataset(seed), the same rows any larger
+    dataset with that seed starts with (but for the FTE of a last person cut
+    short), without generating anything else, and the test scores are drawn
+    from their own CounterRandom stream of the seed, so both files are
+    reproducible.
+    """
+    if seed is not None:
+        from virtual_dataset import VirtualDataset, CounterRandom
+        sample_mpd = VirtualDataset(mpd_rows, seed)[:mpd_rows]
+        sample_test = generate_test_scores_dataset(sample_mpd, test_rows, CounterRandom(seed, "test_scores"))
+    else:
+        sample_mpd = generate_mpd_dataset(mpd_rows)
+        sample_test = generate_test_scores_dataset(sample_mpd, test_rows)
     
     save_to_json(sample_mpd, f"mpd_sample_{mpd_rows}.json")
     save_to_json(sample_test, f"test_scores_sample_{test_rows}.json")
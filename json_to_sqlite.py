@@ -2,13 +2,29 @@ import json
 import sqlite3
 import sys
 import os
+import glob
+import time
+import zlib
+from collections import Counter
 from datetime import datetime
+from token_index import create_token_index, remove_rows_from_token_index
 
-def create_mpd_table(cursor):
+def table_layout(clustered):
+    """
+    ID column definition and table suffix for a layout. The clustered layout
+    stores rows in a WITHOUT ROWID b-tree keyed by (SNAPSHOT, SID, ID), so a
+    person's rows are physically adjacent and SID lookups/joins are range scans.
+    """
+    if clustered:
+        return "ID INTEGER NOT NULL", ",\n            PRIMARY KEY (SNAPSHOT, SID, ID)\n        ) WITHOUT ROWID"
+    return "ID INTEGER PRIMARY KEY", "\n        )"
+
+def create_mpd_table(cursor, table_name="mpd_data", clustered=False):
     """Create the MPD table with proper schema"""
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS mpd_data (
-            ID INTEGER PRIMARY KEY,
+    id_column, table_end = table_layout(clustered)
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            {id_column},
             SID VARCHAR(128),
             SNAPSHOT VARCHAR(128),
             SNAPSHOT_MONTH DATE,
@@ -43,15 +59,15 @@ def create_mpd_table(cursor):
             CRITICAL_SKILLS VARCHAR(128),
             DOMAIN_TWO_PLUS_THREE VARCHAR(10),
             SITE_RESILIENCE VARCHAR(128),
-            TOKENS VARCHAR(500)
-        )
+            TOKENS VARCHAR(500){table_end}
     ''')
 
-def create_test_scores_table(cursor):
+def create_test_scores_table(cursor, table_name="test_scores", clustered=False):
     """Create the test scores table with proper schema"""
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS test_scores (
-            ID INTEGER PRIMARY KEY,
+    id_column, table_end = table_layout(clustered)
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            {id_column},
             SID VARCHAR(25),
             LANGUAGE VARCHAR(150),
             LISTEN_SCORE VARCHAR(25),
@@ -59,16 +75,19 @@ def create_test_scores_table(cursor):
             TEST_GROUP VARCHAR(25),
             SNAPSHOT VARCHAR(25),
             SNAPSHOT_MONTH DATE,
-            TOKENS VARCHAR(500)
-        )
+            TOKENS VARCHAR(500){table_end}
     ''')
 
-def insert_mpd_data(cursor, data):
+def cluster_order(data):
+    """Sort records into (SNAPSHOT, SID, ID) order so clustered inserts append sequentially"""
+    data.sort(key=lambda record: (record['SNAPSHOT'], record['SID'], record['ID']))
+
+def insert_mpd_data(cursor, data, table_name="mpd_data"):
     """Insert MPD data into the database"""
     print(f"Inserting {len(data):,} MPD records...")
     
-    insert_query = '''
-        INSERT INTO mpd_data (
+    insert_query = f'''
+        INSERT INTO {table_name} (
             ID, SID, SNAPSHOT, SNAPSHOT_MONTH, CIMPL_RANK, DUTY_ORG, FUNCTION,
             BUILDING, POP_CATEGORY, GROUPS, FOCUS_AREA, NIAB_CATEGORY,
             FUNCTIONAL_ROLE, COUNTRY, NIPF_PRIORITY, DOMAIN, FTE,
@@ -133,12 +152,12 @@ def insert_mpd_data(cursor, data):
     print(f"✅ Successfully inserted {records_inserted:,} MPD records")
     return records_inserted
 
-def insert_test_scores_data(cursor, data):
+def insert_test_scores_data(cursor, data, table_name="test_scores"):
     """Insert test scores data into the database"""
     print(f"Inserting {len(data):,} test score records...")
     
-    insert_query = '''
-        INSERT INTO test_scores (
+    insert_query = f'''
+        INSERT INTO {table_name} (
             ID, SID, LANGUAGE, LISTEN_SCORE, READ_SCORE, TEST_GROUP, 
             SNAPSHOT, SNAPSHOT_MONTH, TOKENS
         ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
@@ -169,6 +188,60 @@ def insert_test_scores_data(cursor, data):
     print(f"✅ Successfully inserted {records_inserted:,} test score records")
     return records_inserted
 
+# Records committed per transaction; each commit is a resume point
+LOAD_BATCH_SIZE = 50000
+
+def create_load_progress_table(cursor):
+    """Create the table recording how many input records of each table are committed"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS load_progress (
+            TABLE_NAME VARCHAR(128) PRIMARY KEY,
+            RECORDS_COMMITTED INTEGER
+        )
+    ''')
+
+def get_load_progress(cursor, table_name):
+    """Number of input records already committed for a table"""
+    create_load_progress_table(cursor)
+    cursor.execute("SELECT RECORDS_COMMITTED FROM load_progress WHERE TABLE_NAME = ?", (table_name,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def build_is_finished(build_file):
+    """
+    True for a build whose load committed in full but that was never
+    published: the final commit writes the stats catalog and drops
+    load_progress in one transaction
+    """
+    conn = sqlite3.connect(build_file)
+    try:
+        cursor = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        tables = {row[0] for row in cursor.fetchall()}
+    finally:
+        conn.close()
+    return "dataset_stats" in tables and "load_progress" not in tables
+
+def insert_with_checkpoints(cursor, data, table_name, insert_data, batch_size=LOAD_BATCH_SIZE):
+    """
+    Insert records in batches, committing each batch together with its
+    load_progress row. A --resume run skips the records already committed.
+    """
+    committed = get_load_progress(cursor, table_name)
+    if committed:
+        print(f"⏩ Resuming {table_name} after {committed:,} committed records")
+
+    records_inserted = 0
+    for start in range(committed, len(data), batch_size):
+        batch = data[start:start + batch_size]
+        records_inserted += insert_data(cursor, batch, table_name)
+        cursor.execute(
+            "INSERT OR REPLACE INTO load_progress (TABLE_NAME, RECORDS_COMMITTED) VALUES (?, ?)",
+            (table_name, start + len(batch))
+        )
+        cursor.connection.commit()
+
+    return records_inserted
+
 def load_json_file(filename):
     """Load and parse JSON file"""
     if not os.path.exists(filename):
@@ -187,23 +260,519 @@ def load_json_file(filename):
         print(f"❌ Error loading file '{filename}': {e}")
         return None
 
-def create_indexes(cursor):
+def iter_json_records(filename, chunk_size=1 << 20):
+    """
+    Stream records from a JSON array file or an NDJSON file without loading
+    the whole file into memory
+    """
+    decoder = json.JSONDecoder()
+
+    with open(filename, 'r') as f:
+        buffer = ""
+        position = 0
+        started = False
+        eof = False
+
+        while True:
+            # Skip whitespace and array punctuation between records
+            while position < len(buffer) and buffer[position] in " \t\r\n,]":
+                position += 1
+
+            if not started and position < len(buffer):
+                started = True
+                if buffer[position] == '[':
+                    position += 1
+                    continue
+
+            if position >= len(buffer) and eof:
+                return
+
+            try:
+                if position >= len(buffer):
+                    raise ValueError("need more data")
+                record, end = decoder.raw_decode(buffer, position)
+                yield record
+                position = end
+            except ValueError:
+                if eof:
+                    raise json.JSONDecodeError("Truncated record", buffer, position)
+                # Record spans the chunk boundary - read more
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    eof = True
+                buffer = buffer[position:] + chunk
+                position = 0
+
+def resolve_input_files(filename):
+    """
+    Return the files to load for an input name. If the file itself does not
+    exist, fall back to per-snapshot files written by the generator's
+    --partitioned mode (e.g. mpd_notional_data_FALL_2023.json).
+    """
+    if os.path.exists(filename):
+        return [filename]
+
+    stem, extension = os.path.splitext(filename)
+    return sorted(glob.glob(f"{stem}_*{extension}"))
+
+def partition_table_name(table_name, snapshot):
+    """Per-snapshot table name, e.g. mpd_data + FALL 2023 -> mpd_data_fall_2023"""
+    return f"{table_name}_{snapshot.lower().replace(' ', '_')}"
+
+def sql_string(value):
+    """SQL string literal for a value, e.g. for constants baked into view definitions"""
+    return "'" + value.replace("'", "''") + "'"
+
+def create_partition_registry(cursor):
+    """Create the table that tracks which partition table holds each snapshot"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS snapshot_partitions (
+            TABLE_NAME VARCHAR(128),
+            SNAPSHOT VARCHAR(128),
+            PARTITION_NAME VARCHAR(128),
+            PRIMARY KEY (TABLE_NAME, SNAPSHOT)
+        )
+    ''')
+
+# Seasons in calendar order, for sorting "SEASON YEAR" snapshot names
+SEASONS = ["WINTER", "SPRING", "SUMMER", "FALL"]
+
+def snapshot_sort_key(snapshot):
+    """Chronological sort key for a snapshot name: FALL 2023 < SPRING 2024 < FALL 2024"""
+    season, _, year = snapshot.upper().partition(" ")
+    if not year.isdigit() or season not in SEASONS:
+        # Unrecognized names sort after the known ones, alphabetically
+        return (1, 0, 0, snapshot)
+    return (0, int(year), SEASONS.index(season), snapshot)
+
+def get_partitions(cursor, table_name):
+    """Return (snapshot, partition_name) pairs for a logical table, oldest first"""
+    cursor.execute('''
+        SELECT SNAPSHOT, PARTITION_NAME FROM snapshot_partitions
+        WHERE TABLE_NAME = ?
+    ''', (table_name,))
+    return sorted(cursor.fetchall(), key=lambda partition: snapshot_sort_key(partition[0]))
+
+def insert_partitioned(cursor, table_name, data, create_table, insert_data):
+    """Route records into one table per SNAPSHOT, creating partitions as needed"""
+    by_snapshot = {}
+    for record in data:
+        by_snapshot.setdefault(record['SNAPSHOT'], []).append(record)
+
+    records_inserted = 0
+    for snapshot, records in sorted(by_snapshot.items()):
+        partition_name = partition_table_name(table_name, snapshot)
+        create_table(cursor, partition_name)
+        cursor.execute(
+            "INSERT OR IGNORE INTO snapshot_partitions (TABLE_NAME, SNAPSHOT, PARTITION_NAME) VALUES (?, ?, ?)",
+            (table_name, snapshot, partition_name)
+        )
+        print(f"  Partition {partition_name} ({snapshot}):")
+        records_inserted += insert_data(cursor, records, partition_name)
+
+    return records_inserted
+
+def create_partition_indexes(cursor, clustered=False):
+    """Create the standard indexes on every partition table"""
+    print("Creating partition indexes...")
+
+    # Clustered tables are already keyed by (SNAPSHOT, SID) but need an ID lookup index.
+    # A partition holds a single SNAPSHOT, so an index on that column alone narrows nothing
+    key_indexes = [("id", "ID")] if clustered else [("sid_snapshot", "SID, SNAPSHOT")]
+    index_columns = {
+        "mpd_data": key_indexes + [("affiliation", "AFFILIATION_TYPE")],
+        "test_scores": key_indexes + [("group", "TEST_GROUP"), ("language", "LANGUAGE")],
+    }
+
+    for table_name, columns in index_columns.items():
+        for snapshot, partition_name in get_partitions(cursor, table_name):
+            for suffix, column in columns:
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{partition_name}_{suffix} ON {partition_name}({column})"
+                )
+
+    analyze_database(cursor)
+
+    print("✅ Partition indexes created")
+
+def create_partition_views(cursor, table_name):
+    """
+    (Re)create the logical table as a UNION ALL view over its partitions.
+    Each branch repeats its partition's SNAPSHOT as a constant, so a SNAPSHOT
+    filter on the view (literal or bound parameter) leaves every other branch
+    with a constant-false condition that SQLite tests once before the branch
+    reads a row, whatever plan the statistics pick. The matching partition's
+    rows still pass through the view's co-routine or are materialized when
+    the query aggregates or joins; snapshot_source names the partition to
+    query directly instead.
+    """
+    partitions = get_partitions(cursor, table_name)
+    cursor.execute(f"DROP VIEW IF EXISTS {table_name}")
+    union = "\n        UNION ALL\n        ".join(
+        f"SELECT * FROM {partition_name} WHERE SNAPSHOT = {sql_string(snapshot)}"
+        for snapshot, partition_name in partitions
+    )
+    cursor.execute(f"CREATE VIEW {table_name} AS\n        {union}")
+
+def snapshot_source(cursor, table_name, snapshot):
+    """
+    Table or view holding a logical table's rows for one snapshot: its
+    partition if it is partitioned, the snapshot's v_mpd_snapshot_* view for
+    a delta-encoded mpd_data, else the table itself
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'snapshot_partitions'")
+    if cursor.fetchone() is not None:
+        cursor.execute(
+            "SELECT PARTITION_NAME FROM snapshot_partitions WHERE TABLE_NAME = ? AND SNAPSHOT = ?",
+            (table_name, snapshot)
+        )
+        row = cursor.fetchone()
+        return row[0] if row else table_name
+
+    if table_name == "mpd_data":
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'mpd_delta_snapshots'")
+        if cursor.fetchone() is not None:
+            cursor.execute("SELECT 1 FROM mpd_delta_snapshots WHERE SNAPSHOT = ?", (snapshot,))
+            if cursor.fetchone() is not None:
+                return partition_table_name("v_mpd_snapshot", snapshot)
+
+    return table_name
+
+def subtract_snapshot_stats(cursor, stats, table_name, snapshot, partition_name):
+    """
+    Take a partition that is about to be dropped out of the stats catalog:
+    delete its snapshot's row and subtract its rows, and the SIDs found in no
+    other snapshot, from the whole-table row. Each of the partition's SIDs
+    costs one (SID) seek per remaining partition. Returns False, changing
+    nothing, when the catalog has no rows to adjust for this table.
+    """
+    if (table_name, snapshot) not in stats or (table_name, ALL_SNAPSHOTS) not in stats:
+        return False
+
+    others = [
+        f"NOT EXISTS (SELECT 1 FROM {other_name} o WHERE o.SNAPSHOT = {sql_string(other)} AND o.SID = d.SID)"
+        for other, other_name in get_partitions(cursor, table_name) if other != snapshot
+    ]
+    cursor.execute(f"""
+        SELECT COUNT(*) FROM (SELECT DISTINCT SID FROM {partition_name}) d
+        WHERE {" AND ".join(others) or "1"}
+    """)
+    only_here = cursor.fetchone()[0]
+
+    row_count, _ = stats[(table_name, snapshot)]
+    cursor.execute("DELETE FROM dataset_stats WHERE TABLE_NAME = ? AND SNAPSHOT = ?", (table_name, snapshot))
+    cursor.execute(
+        "UPDATE dataset_stats SET ROW_COUNT = ROW_COUNT - ?, DISTINCT_SIDS = DISTINCT_SIDS - ? "
+        "WHERE TABLE_NAME = ? AND SNAPSHOT = ?",
+        (row_count, only_here, table_name, ALL_SNAPSHOTS)
+    )
+    return True
+
+def drop_snapshot(conn, snapshot):
+    """
+    Drop every partition for a snapshot and rebuild the UNION ALL views.
+    The snapshot's token bitmaps, catalog rows and person_summary rows are
+    deleted with it. The catalog's whole-table counts are adjusted by
+    subtract_snapshot_stats, so the cost grows with the dropped snapshot and
+    the number of partitions rather than with the rows that are kept.
+    """
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT TABLE_NAME, PARTITION_NAME FROM snapshot_partitions WHERE SNAPSHOT = ?", (snapshot,))
+    partitions = cursor.fetchall()
+    if not partitions:
+        print(f"❌ No partitions found for snapshot '{snapshot}'")
+        return False
+
+    for table_name, partition_name in partitions:
+        if len(get_partitions(cursor, table_name)) == 1:
+            print(f"❌ Cannot drop '{snapshot}': it is the only partition of {table_name}")
+            return False
+
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'token_bitmaps'")
+    has_token_index = cursor.fetchone() is not None
+    stats = read_stats(cursor)
+    stale_stats = []
+
+    for table_name, partition_name in partitions:
+        if stats and not subtract_snapshot_stats(cursor, stats, table_name, snapshot, partition_name):
+            stale_stats.append(table_name)
+
+        if has_token_index:
+            # Partitions have bitmaps of their own; only an index built before
+            # that, with one bitmap set per logical table, must be rewritten
+            cursor.execute("DELETE FROM token_bitmaps WHERE TABLE_NAME = ?", (partition_name,))
+            cursor.execute("SELECT 1 FROM token_bitmaps WHERE TABLE_NAME = ? LIMIT 1", (table_name,))
+            if cursor.fetchone() is not None:
+                cursor.execute(f"SELECT ID FROM {partition_name}")
+                remove_rows_from_token_index(cursor, table_name, [row[0] for row in cursor.fetchall()])
+
+        cursor.execute(f"DROP TABLE {partition_name}")
+        cursor.execute(
+            "DELETE FROM snapshot_partitions WHERE TABLE_NAME = ? AND SNAPSHOT = ?",
+            (table_name, snapshot)
+        )
+        create_partition_views(cursor, table_name)
+        print(f"🗑️  Dropped partition {partition_name}")
+
+    if stale_stats:
+        refresh_stats(cursor, stale_stats)
+
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'person_summary'")
+    if cursor.fetchone() is not None:
+        cursor.execute("DELETE FROM person_summary WHERE SNAPSHOT = ?", (snapshot,))
+
+    conn.commit()
+    return True
+
+def get_mpd_columns(cursor):
+    """(name, type) of every MPD column, read from the table definition"""
+    create_mpd_table(cursor, "temp.mpd_columns")
+    cursor.execute("PRAGMA temp.table_info(mpd_columns)")
+    columns = [(row[1], row[2]) for row in cursor.fetchall()]
+    cursor.execute("DROP TABLE temp.mpd_columns")
+    return columns
+
+# Columns the delta layout derives per snapshot instead of storing per row
+DELTA_DERIVED_COLUMNS = ["ID", "SID", "SNAPSHOT", "SNAPSHOT_MONTH"]
+
+def create_delta_tables(cursor, value_columns):
+    """
+    Create the delta-encoded MPD layout: mpd_base holds every role of the
+    first snapshot, mpd_delta holds one sparse row per role that was added,
+    changed (NULL = unchanged since the previous snapshot) or removed
+    (DELETED = 1) in a later snapshot, and mpd_roles lists every role key
+    ever seen so the rebuild views can seek by SID.
+    """
+    definitions = ",\n            ".join(f"{name} {column_type}" for name, column_type in value_columns)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS mpd_delta_snapshots (
+            SNAPSHOT_INDEX INTEGER PRIMARY KEY,
+            SNAPSHOT VARCHAR(128),
+            SNAPSHOT_MONTH DATE,
+            ID_OFFSET INTEGER
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS mpd_roles (
+            SID VARCHAR(128),
+            ROLE_INDEX INTEGER,
+            PRIMARY KEY (SID, ROLE_INDEX)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS mpd_base (
+            SID VARCHAR(128),
+            ROLE_INDEX INTEGER,
+            ROW_ID INTEGER,
+            {definitions},
+            PRIMARY KEY (SID, ROLE_INDEX)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS mpd_delta (
+            SNAPSHOT_INDEX INTEGER,
+            SID VARCHAR(128),
+            ROLE_INDEX INTEGER,
+            DELETED INTEGER NOT NULL DEFAULT 0,
+            ROW_ID INTEGER,
+            {definitions},
+            PRIMARY KEY (SNAPSHOT_INDEX, SID, ROLE_INDEX)
+        ) WITHOUT ROWID
+    ''')
+
+def delta_encode(data, value_columns):
+    """
+    Split full per-snapshot MPD records into base rows, delta rows and
+    per-snapshot ID offsets.
+
+    A role is keyed by (SID, ROLE_INDEX), its position among the person's
+    rows in ID order. IDs are stored as ROW_ID = ID - ID_OFFSET, where each
+    snapshot's offset is the most common ID shift of the roles it shares
+    with the previous snapshot, so stable IDs cost nothing per snapshot.
+    A value that changes to NULL cannot be told apart from "unchanged".
+    """
+    snapshots = sorted({(record['SNAPSHOT_MONTH'], record['SNAPSHOT']) for record in data})
+    by_snapshot = {snapshot: {} for _, snapshot in snapshots}
+    role_counts = {snapshot: {} for _, snapshot in snapshots}
+    for record in sorted(data, key=lambda record: record['ID']):
+        counts = role_counts[record['SNAPSHOT']]
+        role_index = counts.get(record['SID'], 0)
+        counts[record['SID']] = role_index + 1
+        by_snapshot[record['SNAPSHOT']][(record['SID'], role_index)] = record
+
+    snapshot_rows = []
+    base_rows = []
+    delta_rows = []
+    previous = {}
+    for snapshot_index, (snapshot_month, snapshot) in enumerate(snapshots):
+        rows = by_snapshot[snapshot]
+
+        shifts = Counter(record['ID'] - previous[key][0]
+                         for key, record in rows.items() if key in previous)
+        id_offset = shifts.most_common(1)[0][0] if shifts else 0
+        snapshot_rows.append((snapshot_index, snapshot, snapshot_month, id_offset))
+
+        current = {}
+        for key, record in rows.items():
+            state = (record['ID'] - id_offset,) + tuple(record[name] for name in value_columns)
+            current[key] = state
+            if snapshot_index == 0:
+                base_rows.append(key + state)
+            elif key not in previous:
+                delta_rows.append((snapshot_index,) + key + (0,) + state)
+            elif state != previous[key]:
+                changed = tuple(new if new != old else None for new, old in zip(state, previous[key]))
+                delta_rows.append((snapshot_index,) + key + (0,) + changed)
+
+        if snapshot_index:
+            for key in previous.keys() - current.keys():
+                delta_rows.append((snapshot_index,) + key + (1,) + (None,) * (len(value_columns) + 1))
+        previous = current
+
+    return snapshot_rows, base_rows, delta_rows
+
+def create_delta_views(cursor, columns):
+    """
+    Create one view per snapshot that rebuilds its full rows from mpd_base
+    and the deltas up to that snapshot, plus an mpd_data UNION ALL view over
+    all of them so queries written for the normal layout keep working.
+    """
+    cursor.execute("SELECT SNAPSHOT_INDEX, SNAPSHOT, SNAPSHOT_MONTH, ID_OFFSET FROM mpd_delta_snapshots ORDER BY SNAPSHOT_INDEX")
+    snapshots = cursor.fetchall()
+
+    view_names = []
+    for snapshot_index, snapshot, snapshot_month, id_offset in snapshots:
+        # Newest delta first, so the latest change of each column wins
+        sources = [f"d{index}" for index in range(snapshot_index, 0, -1)] + ["b"]
+
+        def latest(column):
+            if snapshot_index == 0:
+                return f"b.{column}"
+            return f"COALESCE({', '.join(f'{source}.{column}' for source in sources)})"
+
+        select = []
+        for name, _ in columns:
+            if name == "ID":
+                select.append(f"{latest('ROW_ID')} + {id_offset} AS ID")
+            elif name == "SID":
+                select.append("b.SID AS SID" if snapshot_index == 0 else "keys.SID AS SID")
+            elif name == "SNAPSHOT":
+                select.append(f"'{snapshot}' AS SNAPSHOT")
+            elif name == "SNAPSHOT_MONTH":
+                select.append(f"'{snapshot_month}' AS SNAPSHOT_MONTH")
+            else:
+                select.append(f"{latest(name)} AS {name}")
+
+        if snapshot_index == 0:
+            source_sql = "FROM mpd_base b"
+        else:
+            joins = "\n".join(
+                f"LEFT JOIN mpd_delta d{index} ON d{index}.SNAPSHOT_INDEX = {index} "
+                f"AND d{index}.SID = keys.SID AND d{index}.ROLE_INDEX = keys.ROLE_INDEX"
+                for index in range(1, snapshot_index + 1)
+            )
+            # The newest delta decides whether a role is live; with no delta
+            # yet, a role is live only if it is in the base snapshot
+            deleted = ", ".join(f"{source}.DELETED" for source in sources[:-1])
+            source_sql = f"""FROM mpd_roles keys
+            LEFT JOIN mpd_base b ON b.SID = keys.SID AND b.ROLE_INDEX = keys.ROLE_INDEX
+            {joins}
+            WHERE COALESCE({deleted}, b.SID IS NULL) = 0"""
+
+        view_name = partition_table_name("v_mpd_snapshot", snapshot)
+        cursor.execute(f"DROP VIEW IF EXISTS {view_name}")
+        cursor.execute(f"CREATE VIEW {view_name} AS SELECT {', '.join(select)} {source_sql}")
+        view_names.append(view_name)
+
+    cursor.execute("DROP VIEW IF EXISTS mpd_data")
+    cursor.execute(
+        "CREATE VIEW mpd_data AS " +
+        " UNION ALL ".join(f"SELECT * FROM {view_name}" for view_name in view_names)
+    )
+
+def store_delta_encoded(cursor, data):
+    """Store MPD records as a base snapshot plus per-snapshot deltas and create the rebuild views"""
+    columns = get_mpd_columns(cursor)
+    value_columns = [(name, column_type) for name, column_type in columns
+                     if name not in DELTA_DERIVED_COLUMNS]
+    value_names = [name for name, _ in value_columns]
+
+    create_delta_tables(cursor, value_columns)
+    for table_name in ["mpd_delta_snapshots", "mpd_roles", "mpd_base", "mpd_delta"]:
+        cursor.execute(f"DELETE FROM {table_name}")
+
+    snapshot_rows, base_rows, delta_rows = delta_encode(data, value_names)
+
+    placeholders = lambda count: ", ".join("?" for _ in range(count))
+    cursor.executemany(f"INSERT INTO mpd_delta_snapshots VALUES ({placeholders(4)})", snapshot_rows)
+    cursor.executemany(
+        "INSERT OR IGNORE INTO mpd_roles (SID, ROLE_INDEX) VALUES (?, ?)",
+        [row[:2] for row in base_rows] + [row[1:3] for row in delta_rows])
+    cursor.executemany(
+        f"INSERT INTO mpd_base (SID, ROLE_INDEX, ROW_ID, {', '.join(value_names)}) "
+        f"VALUES ({placeholders(len(value_names) + 3)})", base_rows)
+    cursor.executemany(
+        f"INSERT INTO mpd_delta (SNAPSHOT_INDEX, SID, ROLE_INDEX, DELETED, ROW_ID, {', '.join(value_names)}) "
+        f"VALUES ({placeholders(len(value_names) + 5)})", delta_rows)
+
+    create_delta_views(cursor, columns)
+
+    changed_values = sum(1 for row in delta_rows if not row[3] for value in row[4:] if value is not None)
+    print(f"✅ Stored {len(data):,} MPD records across {len(snapshot_rows)} snapshots as "
+          f"{len(base_rows):,} base rows + {len(delta_rows):,} delta rows ({changed_values:,} changed values)")
+    return len(data)
+
+# Rows sampled per index by ANALYZE, so statistics stay cheap on large databases
+ANALYSIS_LIMIT = 1000
+
+def analyze_database(cursor):
+    """
+    Collect planner statistics. Without them SQLite rates every single-column
+    equality alike and may join test_scores through idx_test_snapshot (a
+    quarter of the table per row) instead of idx_test_sid_snapshot; on the
+    clustered layout they let SID-only queries skip-scan the SNAPSHOT values.
+    """
+    cursor.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+    cursor.execute("ANALYZE")
+
+def create_indexes(cursor, clustered=False):
     """Create indexes for better query performance"""
     print("Creating database indexes...")
 
     indexes = [
-        "CREATE INDEX IF NOT EXISTS idx_mpd_sid ON mpd_data(SID)",
-        "CREATE INDEX IF NOT EXISTS idx_mpd_snapshot ON mpd_data(SNAPSHOT)",
         "CREATE INDEX IF NOT EXISTS idx_mpd_affiliation ON mpd_data(AFFILIATION_TYPE)",
-        "CREATE INDEX IF NOT EXISTS idx_test_sid ON test_scores(SID)",
-        "CREATE INDEX IF NOT EXISTS idx_test_snapshot ON test_scores(SNAPSHOT)",
         "CREATE INDEX IF NOT EXISTS idx_test_group ON test_scores(TEST_GROUP)",
         "CREATE INDEX IF NOT EXISTS idx_test_language ON test_scores(LANGUAGE)"
     ]
 
+    if clustered:
+        # The (SNAPSHOT, SID, ID) primary key serves SNAPSHOT and SID lookups;
+        # ID needs its own index
+        indexes += [
+            "CREATE INDEX IF NOT EXISTS idx_mpd_id ON mpd_data(ID)",
+            "CREATE INDEX IF NOT EXISTS idx_test_id ON test_scores(ID)"
+        ]
+    else:
+        # (SID, SNAPSHOT) serves SID lookups and the mpd_data/test_scores join on both keys
+        indexes += [
+            "CREATE INDEX IF NOT EXISTS idx_mpd_sid_snapshot ON mpd_data(SID, SNAPSHOT)",
+            "CREATE INDEX IF NOT EXISTS idx_mpd_snapshot ON mpd_data(SNAPSHOT)",
+            "CREATE INDEX IF NOT EXISTS idx_test_sid_snapshot ON test_scores(SID, SNAPSHOT)",
+            "CREATE INDEX IF NOT EXISTS idx_test_snapshot ON test_scores(SNAPSHOT)"
+        ]
+
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'view'")
+    views = {row[0] for row in cursor.fetchall()}
+
     for index_sql in indexes:
+        # Views (e.g. the delta-encoded mpd_data) cannot be indexed
+        if index_sql.rsplit(" ON ", 1)[1].partition("(")[0] in views:
+            continue
         cursor.execute(index_sql)
 
+    analyze_database(cursor)
+
     print("✅ Database indexes created")
 
 def create_views(cursor):
@@ -255,19 +824,212 @@ def create_views(cursor):
 
     print("✅ Database views created")
 
+def sample_hash(sid, snapshot):
+    """Deterministic CRC-32 of a person, stored as person_summary.SAMPLE_HASH"""
+    return zlib.crc32(f"{sid}|{snapshot}".encode())
+
+def create_person_summary(cursor):
+    """
+    Materialize one row per person (SID, SNAPSHOT) with role and test score
+    aggregates, so cross-dataset questions are a keyed lookup instead of a
+    join that repeats each test once per role. The primary role is the one
+    with the highest FTE (lowest ID on ties). SAMPLE_HASH is computed once
+    here so subsets can read each stratum in hash order from an index.
+    """
+    print("Building person summary...")
+    cursor.connection.create_function("sample_hash", 2, sample_hash, deterministic=True)
+    cursor.execute("DROP TABLE IF EXISTS person_summary")
+    cursor.execute('''
+        CREATE TABLE person_summary (
+            SID VARCHAR(128),
+            SNAPSHOT VARCHAR(128),
+            SNAPSHOT_MONTH DATE,
+            ROLE_COUNT INTEGER,
+            TOTAL_FTE REAL,
+            PRIMARY_DOMAIN VARCHAR(128),
+            PRIMARY_FUNCTION VARCHAR(128),
+            PRIMARY_DFP VARCHAR(256),
+            AFFILIATION_TYPE VARCHAR(128),
+            DUTY_ORG VARCHAR(128),
+            CITY VARCHAR(128),
+            STATE VARCHAR(128),
+            COUNTRY VARCHAR(128),
+            TOKENS VARCHAR(500),
+            TEST_COUNT INTEGER,
+            LANGUAGE_COUNT INTEGER,
+            BEST_LISTEN_SCORE INTEGER,
+            BEST_READ_SCORE INTEGER,
+            HIGHEST_TEST_GROUP VARCHAR(25),
+            SAMPLE_HASH INTEGER,
+            PRIMARY KEY (SID, SNAPSHOT)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        INSERT INTO person_summary
+        WITH roles AS (
+            SELECT
+                *,
+                ROW_NUMBER() OVER (PARTITION BY SID, SNAPSHOT ORDER BY FTE DESC, ID) AS ROLE_RANK,
+                COUNT(*) OVER person AS ROLE_COUNT,
+                SUM(FTE) OVER person AS TOTAL_FTE
+            FROM mpd_data
+            WINDOW person AS (PARTITION BY SID, SNAPSHOT)
+        ),
+        tests AS (
+            SELECT
+                SID,
+                SNAPSHOT,
+                COUNT(*) AS TEST_COUNT,
+                COUNT(DISTINCT LANGUAGE) AS LANGUAGE_COUNT,
+                MAX(CAST(LISTEN_SCORE AS INTEGER)) AS BEST_LISTEN_SCORE,
+                MAX(CAST(READ_SCORE AS INTEGER)) AS BEST_READ_SCORE,
+                MAX(CASE TEST_GROUP WHEN 'HIGH' THEN 3 WHEN 'MEDIUM' THEN 2 WHEN 'LOW' THEN 1 END) AS GROUP_RANK
+            FROM test_scores
+            GROUP BY SID, SNAPSHOT
+        )
+        SELECT
+            r.SID,
+            r.SNAPSHOT,
+            r.SNAPSHOT_MONTH,
+            r.ROLE_COUNT,
+            ROUND(r.TOTAL_FTE, 6),
+            r.DOMAIN,
+            r.FUNCTION,
+            r.DFP,
+            r.AFFILIATION_TYPE,
+            r.DUTY_ORG,
+            r.CITY,
+            r.STATE,
+            r.COUNTRY,
+            r.TOKENS,
+            COALESCE(t.TEST_COUNT, 0),
+            COALESCE(t.LANGUAGE_COUNT, 0),
+            t.BEST_LISTEN_SCORE,
+            t.BEST_READ_SCORE,
+            CASE t.GROUP_RANK WHEN 3 THEN 'HIGH' WHEN 2 THEN 'MEDIUM' WHEN 1 THEN 'LOW' END,
+            sample_hash(r.SID, r.SNAPSHOT)
+        FROM roles r
+        LEFT JOIN tests t ON t.SID = r.SID AND t.SNAPSHOT = r.SNAPSHOT
+        WHERE r.ROLE_RANK = 1
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_person_snapshot_group ON person_summary(SNAPSHOT, HIGHEST_TEST_GROUP)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_person_sample ON person_summary(SNAPSHOT, AFFILIATION_TYPE, PRIMARY_DOMAIN, SAMPLE_HASH)")
+
+    cursor.execute("SELECT COUNT(*) FROM person_summary")
+    print(f"✅ Summarized {cursor.fetchone()[0]:,} persons")
+
+# SNAPSHOT value of the whole-table row in the stats catalog
+ALL_SNAPSHOTS = "ALL"
+
+# Tables summarized in the stats catalog
+STATS_TABLES = ["mpd_data", "test_scores"]
+
+def create_stats_table(cursor):
+    """Create the stats catalog and the view deriving coverage from it"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS dataset_stats (
+            TABLE_NAME VARCHAR(128),
+            SNAPSHOT VARCHAR(128),
+            ROW_COUNT INTEGER,
+            DISTINCT_SIDS INTEGER,
+            PRIMARY KEY (TABLE_NAME, SNAPSHOT)
+        )
+    ''')
+    cursor.execute(f"""
+        CREATE VIEW IF NOT EXISTS v_dataset_stats AS
+        SELECT
+            m.SNAPSHOT,
+            m.ROW_COUNT AS MPD_RECORDS,
+            m.DISTINCT_SIDS AS MPD_SIDS,
+            COALESCE(t.ROW_COUNT, 0) AS TEST_RECORDS,
+            COALESCE(t.DISTINCT_SIDS, 0) AS TEST_SIDS,
+            ROUND(100.0 * COALESCE(t.DISTINCT_SIDS, 0) / NULLIF(m.DISTINCT_SIDS, 0), 1) AS TEST_COVERAGE_PCT,
+            ROUND(1.0 * t.ROW_COUNT / NULLIF(t.DISTINCT_SIDS, 0), 1) AS TESTS_PER_SID
+        FROM dataset_stats m
+        LEFT JOIN dataset_stats t ON t.TABLE_NAME = 'test_scores' AND t.SNAPSHOT = m.SNAPSHOT
+        WHERE m.TABLE_NAME = 'mpd_data'
+    """)
+
+def write_stats(cursor, table_name, rows):
+    """Replace a table's catalog rows with (snapshot, row_count, distinct_sids) rows"""
+    create_stats_table(cursor)
+    cursor.execute("DELETE FROM dataset_stats WHERE TABLE_NAME = ?", (table_name,))
+    cursor.executemany(
+        "INSERT INTO dataset_stats (TABLE_NAME, SNAPSHOT, ROW_COUNT, DISTINCT_SIDS) VALUES (?, ?, ?, ?)",
+        [(table_name, snapshot, count, sids) for snapshot, count, sids in rows]
+    )
+
+class StatsAccumulator:
+    """
+    Row counts and distinct SIDs per table and snapshot, collected from the
+    records as they are loaded so the catalog is written without scanning
+    the tables again
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.sids = {}
+
+    def add(self, table_name, records):
+        """Count a batch of records about to be inserted into table_name"""
+        counts = self.counts.setdefault(table_name, {})
+        sids = self.sids.setdefault(table_name, {})
+        for record in records:
+            snapshot = record['SNAPSHOT']
+            counts[snapshot] = counts.get(snapshot, 0) + 1
+            snapshot_sids = sids.get(snapshot)
+            if snapshot_sids is None:
+                snapshot_sids = sids[snapshot] = set()
+            snapshot_sids.add(record['SID'])
+
+    def write(self, cursor):
+        """Replace the catalog rows of every table counted"""
+        for table_name, counts in self.counts.items():
+            sids = self.sids[table_name]
+            rows = [(snapshot, count, len(sids[snapshot])) for snapshot, count in counts.items()]
+            rows.append((ALL_SNAPSHOTS, sum(counts.values()), len(set().union(*sids.values()))))
+            write_stats(cursor, table_name, rows)
+
+def refresh_stats(cursor, table_names=STATS_TABLES):
+    """
+    Recompute the catalog rows for the given tables: one grouped pass for the
+    per-snapshot counts plus one for SIDs across all snapshots. Used when the
+    loaded records can't be counted as they are inserted (resumed loads,
+    streamed pipelines, subsets).
+    """
+    for table_name in table_names:
+        cursor.execute(f"""
+            SELECT SNAPSHOT, COUNT(*), COUNT(DISTINCT SID)
+            FROM {table_name} GROUP BY SNAPSHOT
+        """)
+        rows = cursor.fetchall()
+
+        cursor.execute(f"SELECT COUNT(*), COUNT(DISTINCT SID) FROM {table_name}")
+        rows.append((ALL_SNAPSHOTS,) + tuple(cursor.fetchone()))
+
+        write_stats(cursor, table_name, rows)
+
+def read_stats(cursor):
+    """
+    Return {(table_name, snapshot): (row_count, distinct_sids)} from the
+    catalog, or {} for databases loaded before the catalog existed. Never
+    writes, so it works on read-only connections.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'dataset_stats'")
+    if cursor.fetchone() is None:
+        return {}
+
+    cursor.execute("SELECT TABLE_NAME, SNAPSHOT, ROW_COUNT, DISTINCT_SIDS FROM dataset_stats")
+    return {(table_name, snapshot): (count, sids) for table_name, snapshot, count, sids in cursor.fetchall()}
+
 def get_database_stats(cursor):
-    """Get statistics about the created database"""
-    cursor.execute("SELECT COUNT(*) FROM mpd_data")
-    mpd_count = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(*) FROM test_scores")
-    test_count = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(DISTINCT SID) FROM mpd_data")
-    unique_mpd_sids = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(DISTINCT SID) FROM test_scores")
-    unique_test_sids = cursor.fetchone()[0]
+    """Print statistics about the created database from the stats catalog"""
+    stats = read_stats(cursor)
+    if not stats:
+        print("\n⚠️  No stats catalog in this database; reload it or run refresh_stats(cursor) to create one")
+        return stats
+    mpd_count, unique_mpd_sids = stats.get(("mpd_data", ALL_SNAPSHOTS), (0, 0))
+    test_count, unique_test_sids = stats.get(("test_scores", ALL_SNAPSHOTS), (0, 0))
     
     print(f"\n📊 Database Statistics:")
     print(f"  MPD records: {mpd_count:,}")
@@ -283,6 +1045,114 @@ def get_database_stats(cursor):
         avg_tests = test_count / unique_test_sids
         print(f"  Average tests per SID: {avg_tests:.1f}")
 
+    snapshots = sorted((snapshot for table_name, snapshot in stats
+                        if table_name == "mpd_data" and snapshot != ALL_SNAPSHOTS), key=snapshot_sort_key)
+    if snapshots:
+        print("  By snapshot:")
+    for snapshot in snapshots:
+        snapshot_count, snapshot_sids = stats[("mpd_data", snapshot)]
+        snapshot_tests, snapshot_test_sids = stats.get(("test_scores", snapshot), (0, 0))
+        coverage = (snapshot_test_sids / snapshot_sids) * 100 if snapshot_sids else 0
+        print(f"    {snapshot}: {snapshot_count:,} MPD records, {snapshot_sids:,} SIDs, "
+              f"{snapshot_tests:,} tests ({coverage:.1f}% coverage)")
+
+    return stats
+
+def build_path(db_file):
+    """File a rebuild writes to - next to db_file so the final rename is atomic"""
+    return db_file + ".building"
+
+def remove_database_files(db_file):
+    """Remove a database file together with its journal/WAL side files"""
+    for path in (db_file, db_file + "-journal", db_file + "-wal", db_file + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+
+def start_rebuild(db_file, resume=False):
+    """
+    Return the path to build the new database in. The live db_file is not
+    touched until publish_database(); with resume an interrupted build is
+    continued instead of started over.
+    """
+    build_file = build_path(db_file)
+    if resume and os.path.exists(build_file):
+        print(f"⏩ Resuming load into unfinished build: {build_file}")
+    else:
+        remove_database_files(build_file)
+        print(f"🔨 Building new database in: {build_file}")
+    return build_file
+
+# Attempts (each also waits out the 5s busy timeout), and seconds between
+# them, to empty a WAL that readers are still using
+CHECKPOINT_ATTEMPTS = 5
+CHECKPOINT_RETRY_DELAY = 1.0
+
+def checkpoint_wal(db_file, journal_mode=None):
+    """
+    Copy every WAL frame of db_file into the database and truncate the WAL,
+    optionally switching the journal mode first. A long-running reader can
+    make the checkpoint return busy with frames left in the WAL, so it is
+    retried, and RuntimeError is raised if the WAL still isn't empty.
+    """
+    conn = sqlite3.connect(db_file)
+    try:
+        if journal_mode:
+            conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+        for attempt in range(CHECKPOINT_ATTEMPTS):
+            busy, log_frames, checkpointed_frames = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+            if not busy:
+                return
+            print(f"⏳ {db_file}: WAL checkpoint busy ({checkpointed_frames} of {log_frames} frames copied), retrying")
+            time.sleep(CHECKPOINT_RETRY_DELAY)
+    finally:
+        conn.close()
+    raise RuntimeError(f"Could not checkpoint the WAL of {db_file}: readers kept it busy "
+                       f"for {CHECKPOINT_ATTEMPTS} attempts")
+
+def publish_database(build_file, db_file):
+    """
+    Switch a finished build to WAL mode and atomically replace db_file with
+    it. Readers that still have the old file open keep reading it; new
+    connections (see live_database.py) get the new one. If either WAL can't
+    be emptied, nothing is replaced.
+    """
+    checkpoint_wal(build_file, journal_mode="WAL")
+
+    if os.path.exists(db_file):
+        # The -wal/-shm files belong to the path, not the file: make sure the
+        # live WAL is empty so the new file never sees the old file's frames
+        checkpoint_wal(db_file)
+
+    os.replace(build_file, db_file)
+    print(f"🔁 Switched {db_file} to the new build")
+
+def split_args(argv):
+    """Split command line arguments into positional values and --options"""
+    positional = []
+    options = {}
+    for arg in argv:
+        if arg.startswith('--'):
+            name, _, value = arg[2:].partition('=')
+            options[name] = value if value else True
+        else:
+            positional.append(arg)
+    return positional, options
+
+def load_input_files(filename, partitioned):
+    """Load one JSON file, or every per-snapshot file in partitioned mode"""
+    filenames = resolve_input_files(filename) if partitioned else [filename]
+    if not filenames:
+        print(f"❌ Error: No files found for '{filename}'")
+        return None
+
+    data = []
+    for name in filenames:
+        file_data = load_json_file(name)
+        if file_data is None:
+            return None
+        data.extend(file_data)
+    return data
+
 def main():
     print("=== JSON to SQLite Database Converter ===\n")
     
@@ -292,55 +1162,130 @@ def main():
     db_file = "development.db"
     
     # Check for command line arguments
-    if len(sys.argv) > 1:
-        mpd_file = sys.argv[1]
-    if len(sys.argv) > 2:
-        test_file = sys.argv[2]
-    if len(sys.argv) > 3:
-        db_file = sys.argv[3]
+    args, options = split_args(sys.argv[1:])
+    if len(args) > 0:
+        mpd_file = args[0]
+    if len(args) > 1:
+        test_file = args[1]
+    if len(args) > 2:
+        db_file = args[2]
+    partitioned = bool(options.get('partitioned'))
+    clustered = bool(options.get('clustered'))
+    resume = bool(options.get('resume'))
+    delta = bool(options.get('delta'))
+    if delta and (partitioned or clustered):
+        # The delta layout has its own tables and views for mpd_data
+        print("❌ Error: --delta cannot be combined with --partitioned or --clustered")
+        return 1
     
     print(f"Input files:")
     print(f"  MPD data: {mpd_file}")
     print(f"  Test scores: {test_file}")
-    print(f"Output database: {db_file}\n")
+    print(f"Output database: {db_file}")
+    if partitioned:
+        print("Layout: one table per SNAPSHOT behind UNION ALL views")
+    if clustered:
+        print("Layout: WITHOUT ROWID tables clustered by (SNAPSHOT, SID, ID)")
+    if delta:
+        print("Layout: MPD base snapshot plus per-snapshot deltas behind rebuild views")
+    print()
     
+    build_file = build_path(db_file)
+    if resume and os.path.exists(build_file) and build_is_finished(build_file):
+        # Only the swap failed last time (e.g. a reader kept the live WAL busy)
+        print(f"⏩ Build already finished, publishing: {build_file}")
+        try:
+            publish_database(build_file, db_file)
+        except Exception as e:
+            print(f"❌ Database error: {e}")
+            print("   The live database was not changed; rerun with --resume to publish the build")
+            return 1
+        print(f"\n🎉 Successfully created database: {db_file}")
+        return 0
+
     # Load JSON data
-    mpd_data = load_json_file(mpd_file)
+    mpd_data = load_input_files(mpd_file, partitioned)
     if mpd_data is None:
         return 1
     
-    test_data = load_json_file(test_file)
+    test_data = load_input_files(test_file, partitioned)
     if test_data is None:
         return 1
+
+    if clustered:
+        cluster_order(mpd_data)
+        cluster_order(test_data)
     
     # Create/connect to SQLite database
     try:
-        # Remove existing database if it exists
-        if os.path.exists(db_file):
-            os.remove(db_file)
-            print(f"🗑️  Removed existing database: {db_file}")
+        # Build next to the live database, which stays readable until the swap
+        build_file = start_rebuild(db_file, resume)
         
-        conn = sqlite3.connect(db_file)
+        conn = sqlite3.connect(build_file)
         cursor = conn.cursor()
-        print(f"✅ Connected to database: {db_file}")
+        print(f"✅ Connected to database: {build_file}")
         
-        # Create tables
-        print("\nCreating database tables...")
-        create_mpd_table(cursor)
-        create_test_scores_table(cursor)
-        print("✅ Database tables created")
-        
-        # Insert data
-        print("\nInserting data...")
-        mpd_inserted = insert_mpd_data(cursor, mpd_data)
-        test_inserted = insert_test_scores_data(cursor, test_data)
-        
-        # Create indexes
-        create_indexes(cursor)
+        if delta:
+            # Store the first snapshot in full and only changes after it
+            print("\nInserting data as a base snapshot plus deltas...")
+            create_test_scores_table(cursor)
+            mpd_inserted = store_delta_encoded(cursor, mpd_data)
+            test_inserted = insert_with_checkpoints(cursor, test_data, "test_scores", insert_test_scores_data)
+            create_indexes(cursor)
+        elif partitioned:
+            # Insert data into per-snapshot partitions
+            print("\nInserting data into snapshot partitions...")
+            create_partition_registry(cursor)
+            mpd_inserted = insert_partitioned(
+                cursor, "mpd_data", mpd_data,
+                lambda c, name: create_mpd_table(c, name, clustered),
+                lambda c, records, name: insert_with_checkpoints(c, records, name, insert_mpd_data))
+            test_inserted = insert_partitioned(
+                cursor, "test_scores", test_data,
+                lambda c, name: create_test_scores_table(c, name, clustered),
+                lambda c, records, name: insert_with_checkpoints(c, records, name, insert_test_scores_data))
+            create_partition_views(cursor, "mpd_data")
+            create_partition_views(cursor, "test_scores")
+            create_partition_indexes(cursor, clustered)
+        else:
+            # Create tables
+            print("\nCreating database tables...")
+            create_mpd_table(cursor, clustered=clustered)
+            create_test_scores_table(cursor, clustered=clustered)
+            print("✅ Database tables created")
+            
+            # Insert data
+            print("\nInserting data...")
+            mpd_inserted = insert_with_checkpoints(cursor, mpd_data, "mpd_data", insert_mpd_data)
+            test_inserted = insert_with_checkpoints(cursor, test_data, "test_scores", insert_test_scores_data)
+            
+            # Create indexes
+            create_indexes(cursor, clustered)
 
         # Create views
         create_views(cursor)
 
+        # One row per person with role and test aggregates
+        create_person_summary(cursor)
+
+        # Build token bitmap index
+        create_token_index(cursor)
+
+        # Record row and SID counts so stats reads never rescan the tables.
+        # A resumed load (or one with failed inserts) didn't insert every
+        # record in this run, so it counts what the tables actually hold.
+        if mpd_inserted == len(mpd_data) and test_inserted == len(test_data):
+            stats = StatsAccumulator()
+            stats.add("mpd_data", mpd_data)
+            stats.add("test_scores", test_data)
+            stats.write(cursor)
+        else:
+            refresh_stats(cursor)
+
+        # Resume bookkeeping is only needed while loading; dropping it in the
+        # final transaction also marks the build as finished
+        cursor.execute("DROP TABLE IF EXISTS load_progress")
+
         # Commit changes
         conn.commit()
         print("\n✅ All data committed to database")
@@ -350,6 +1295,9 @@ def main():
         
         # Close connection
         conn.close()
+
+        # Atomically replace the live database
+        publish_database(build_file, db_file)
         
         print(f"\n🎉 Successfully created database: {db_file}")
         print(f"   MPD records: {mpd_inserted:,}")
@@ -359,12 +1307,25 @@ def main():
         
     except Exception as e:
         print(f"❌ Database error: {e}")
+        print("   The live database was not changed; rerun with --resume to continue the build")
         return 1
 
+def drop_snapshot_main(snapshot, db_file="development.db"):
+    """Drop one snapshot from a partitioned database"""
+    if not os.path.exists(db_file):
+        print(f"❌ Error: Database '{db_file}' not found")
+        return 1
+
+    conn = sqlite3.connect(db_file)
+    dropped = drop_snapshot(conn, snapshot.upper())
+    conn.close()
+    return 0 if dropped else 1
+
 def show_usage():
     """Show usage instructions"""
     print("Usage:")
-    print("  python json_to_sqlite.py [mpd_file] [test_file] [database_file]")
+    print("  python json_to_sqlite.py [mpd_file] [test_file] [database_file] [--partitioned] [--clustered] [--delta] [--resume]")
+    print("  python json_to_sqlite.py --drop-snapshot \"SNAPSHOT\" [database_file]")
     print("")
     print("Examples:")
     print("  python json_to_sqlite.py")
@@ -372,11 +1333,31 @@ def show_usage():
     print("")
     print("  python json_to_sqlite.py my_mpd.json my_tests.json my_database.db")
     print("    Uses custom file names")
+    print("")
+    print("  python json_to_sqlite.py --partitioned")
+    print("    Stores each SNAPSHOT in its own table behind mpd_data/test_scores UNION ALL views")
+    print("    (reads per-snapshot files such as mpd_notional_data_FALL_2023.json if present)")
+    print("")
+    print("  python json_to_sqlite.py --clustered")
+    print("    Uses WITHOUT ROWID tables keyed by (SNAPSHOT, SID, ID) so per-person reads are range scans")
+    print("")
+    print("  python json_to_sqlite.py --delta")
+    print("    Stores the first snapshot in full and later snapshots as changed values only,")
+    print("    rebuilt by v_mpd_snapshot_* views (use with generate-data.py --temporal)")
+    print("")
+    print("  python json_to_sqlite.py --resume")
+    print("    Continues an interrupted build after the last committed batch instead of starting over")
+    print("")
+    print("  python json_to_sqlite.py --drop-snapshot \"FALL 2023\" development.db")
+    print("    Drops a snapshot's partitions from a partitioned database")
 
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] in ['-h', '--help', 'help']:
         show_usage()
         sys.exit(0)
+
+    if len(sys.argv) > 2 and sys.argv[1] == '--drop-snapshot':
+        sys.exit(drop_snapshot_main(*sys.argv[2:4]))
     
     exit_code = main()
     sys.exit(exit_code)
\ No newline at end of file
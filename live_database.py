@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import sys
+import time
+from urllib.request import pathname2url
+
+def open_read_only(db_file):
+    """Open a database read-only; in WAL mode readers never wait for a writer"""
+    conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(db_file))}?mode=ro", uri=True)
+    return conn
+
+def file_identity(db_file):
+    """(device, inode) of a file - changes when a rebuild is swapped in with os.replace"""
+    stat = os.stat(db_file)
+    return (stat.st_dev, stat.st_ino)
+
+class LiveDatabase:
+    """
+    Read-only handle to a database that the loader may replace at any time.
+
+    connection() compares the file's identity with the one it opened (one
+    stat call, at most every check_interval seconds) and reopens after a
+    rebuild was swapped in. Queries already running on the old connection
+    finish against the old file. Call connection() per request rather than
+    holding on to a connection; use one LiveDatabase per thread.
+    """
+
+    def __init__(self, db_file, check_interval=0.0):
+        self.db_file = db_file
+        self.check_interval = check_interval
+        self.reopen_count = 0
+        self._conn = None
+        self._identity = None
+        self._checked_at = 0.0
+
+    def connection(self):
+        now = time.monotonic()
+        if self._conn is not None and now - self._checked_at < self.check_interval:
+            return self._conn
+        self._checked_at = now
+
+        identity = file_identity(self.db_file)
+        if identity != self._identity:
+            if self._conn is not None:
+                self._conn.close()
+                self.reopen_count += 1
+            # Identity is taken before opening: if the file is swapped in
+            # between, the next check sees the mismatch and reopens again
+            self._conn = open_read_only(self.db_file)
+            self._identity = identity
+        return self._conn
+
+    def execute(self, sql, parameters=()):
+        """Run a query on the current file"""
+        return self.connection().execute(sql, parameters)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+            self._identity = None
+
+def main():
+    # Poll a database the way a dashboard would and report every swap
+    db_file = sys.argv[1] if len(sys.argv) > 1 else "development.db"
+    interval = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+
+    if not os.path.exists(db_file):
+        print(f"❌ Error: Database '{db_file}' not found")
+        return 1
+
+    database = LiveDatabase(db_file)
+    print(f"Watching {db_file} (Ctrl+C to stop)")
+    reopen_count = None
+    try:
+        while True:
+            mpd_count = database.execute("SELECT COUNT(*) FROM mpd_data").fetchone()[0]
+            if database.reopen_count != reopen_count:
+                reopen_count = database.reopen_count
+                print(f"  {time.strftime('%H:%M:%S')} MPD records: {mpd_count:,} "
+                      f"(reopened {reopen_count} times)")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+    database.close()
+    return 0
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ['-h', '--help', 'help']:
+        print("Usage:")
+        print("  python live_database.py [database_file] [poll_seconds]")
+        print("    Polls the database read-only and reports when a rebuild is swapped in")
+        sys.exit(0)
+
+    exit_code = main()
+    sys.exit(exit_code)
@@ -0,0 +1,122 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Default number of batches allowed in flight between stages
+DEFAULT_MAX_PENDING = 4
+
+def encode_json_batch(batch):
+    """
+    Encode a batch of records as JSON array items. The output is byte-for-byte
+    what json.dump(data, f, indent=2) writes for the same records.
+    """
+    return ",\n".join(
+        "  " + json.dumps(record, indent=2).replace("\n", "\n  ")
+        for record in batch
+    )
+
+def encode_row_batch(batch, columns):
+    """Convert a batch of records into parameter tuples for executemany"""
+    return [tuple(record.get(column) for column in columns) for record in batch]
+
+def write_json_chunks(filename, chunks):
+    """Writer stage: stream encoded chunks into a JSON array file until a None sentinel"""
+    with open(filename, 'w') as f:
+        first = True
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                break
+            if not chunk:
+                continue
+            f.write("[\n" if first else ",\n")
+            f.write(chunk)
+            first = False
+        f.write("[]" if first else "\n]")
+
+def write_sqlite_rows(db_file, table_name, columns, chunks):
+    """Writer stage: insert row chunks into a SQLite table until a None sentinel"""
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+    insert_query = (f"INSERT INTO {table_name} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' for _ in columns)})")
+    while True:
+        rows = chunks.get()
+        if rows is None:
+            break
+        cursor.executemany(insert_query, rows)
+    conn.commit()
+    conn.close()
+
+def run_pipeline(batches, encode, write, encode_args=(), workers=None, max_pending=DEFAULT_MAX_PENDING):
+    """
+    Run generate -> encode -> write as concurrent stages.
+
+    The caller's thread pulls batches from the generator and submits them to a
+    process pool for encoding; a dedicated writer thread consumes encoded chunks
+    in order. At most max_pending batches wait for encoding and max_pending
+    chunks wait for the writer, so memory stays flat whichever stage is slowest.
+    Returns the number of records pushed through.
+    """
+    chunks = queue.Queue(maxsize=max_pending)
+    writer_error = []
+
+    def writer():
+        try:
+            write(chunks)
+        except Exception as e:
+            writer_error.append(e)
+            # Keep draining so the producer never blocks on a dead writer
+            while chunks.get() is not None:
+                pass
+
+    writer_thread = threading.Thread(target=writer, name="pipeline-writer")
+    writer_thread.start()
+
+    records = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            pending = deque()
+            for batch in batches:
+                pending.append(pool.submit(encode, batch, *encode_args))
+                records += len(batch)
+                if len(pending) >= max_pending:
+                    # Blocks when the writer's queue is full (backpressure)
+                    chunks.put(pending.popleft().result())
+            while pending:
+                chunks.put(pending.popleft().result())
+    finally:
+        chunks.put(None)
+        writer_thread.join()
+
+    if writer_error:
+        raise writer_error[0]
+    return records
+
+def pipeline_to_json(batches, filename, workers=None, max_pending=DEFAULT_MAX_PENDING):
+    """Stream record batches into a JSON array file"""
+    records = run_pipeline(
+        batches, encode_json_batch,
+        lambda chunks: write_json_chunks(filename, chunks),
+        workers=workers, max_pending=max_pending
+    )
+    print(f"Data saved to {filename} ({records:,} records)")
+    return records
+
+def pipeline_to_sqlite(batches, db_file, table_name, workers=None, max_pending=DEFAULT_MAX_PENDING):
+    """Stream record batches into an existing SQLite table"""
+    conn = sqlite3.connect(db_file)
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table_name})")]
+    conn.close()
+
+    records = run_pipeline(
+        batches, encode_row_batch,
+        lambda chunks: write_sqlite_rows(db_file, table_name, columns, chunks),
+        encode_args=(columns,), workers=workers, max_pending=max_pending
+    )
+    print(f"✅ Inserted {records:,} records into {table_name}")
+    return records
@@ -0,0 +1,307 @@
+import json
+import os
+import random
+import re
+import string
+import sys
+
+DEFAULT_SCHEMA_FILE = "mpd_schema.json"
+
+# Number of persons drawn per batch by the compiled generator
+BATCH_SIZE = 10000
+
+def load_schema(filename=DEFAULT_SCHEMA_FILE):
+    """Load a declarative schema spec from a JSON file"""
+    # Fall back to the spec shipped next to this script
+    if not os.path.exists(filename):
+        bundled = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+        if os.path.exists(bundled):
+            filename = bundled
+
+    with open(filename, 'r') as f:
+        return json.load(f)
+
+def field_names(field):
+    """Names of the columns produced by a field spec (choice fields may produce several)"""
+    return field.get("names") or [field["name"]]
+
+def variable_name(name):
+    """Python identifier used for a column inside the generated code"""
+    return "v_" + re.sub(r'\W', '_', name)
+
+def cumulative_weights(weights):
+    """Turn weights into the cum_weights form random.choices accepts"""
+    total = 0
+    result = []
+    for weight in weights:
+        total += weight
+        result.append(total)
+    return result
+
+def template_values(field):
+    """Expand a template field ("GROUP {}", 1..20) into its full list of values"""
+    prefix, _, suffix = field["format"].partition("{}")
+    if "values" in field:
+        values = field["values"]
+    else:
+        values = range(field["min"], field["max"] + 1)
+    return [f"{prefix}{value}{suffix}" for value in values]
+
+def concat_source(parts):
+    """Source for a string concatenation of literal and expression parts"""
+    return " + ".join(parts) if parts else "''"
+
+def token_pattern_source(pattern, tokens_name):
+    """Compile a token pattern like ({T}|{T})&{T} into a concatenation of random picks"""
+    parts = []
+    literals = pattern.split("{T}")
+    for position, literal in enumerate(literals):
+        if literal:
+            parts.append(repr(literal))
+        if position < len(literals) - 1:
+            parts.append(f"choice({tokens_name})")
+    return concat_source(parts)
+
+def fte_split(num_roles, step, rng):
+    """
+    FTE values in multiples of step summing to 1.0 over num_roles roles,
+    drawn from rng the same way as the compiled generator's fte_split fields
+    """
+    steps = round(1 / step)
+    if num_roles == 1:
+        return [1.0]
+    splits = []
+    remaining_steps = steps
+    for k in range(num_roles - 1):
+        max_steps = max(1, remaining_steps - (num_roles - k - 1))
+        drawn = rng.randint(1, max_steps)
+        splits.append(drawn / float(steps))
+        remaining_steps -= drawn
+    splits.append(remaining_steps / float(steps))
+    return splits
+
+def compile_schema(schema):
+    """
+    Compile a schema spec into a specialized batch generator.
+
+    Returns (generate_batches, source). generate_batches(total_rows, rng)
+    yields lists of records; source is the generated Python code, useful
+    for inspection.
+    """
+    constants = {}
+
+    def constant(value):
+        name = f"C{len(constants)}"
+        constants[name] = value
+        return name
+
+    prelude = []
+    person_setup = []
+    role_setup = []
+    person_assign = []
+    role_assign = []
+    choice_values = {}
+    sequence_start = 1
+    has_sequence = False
+
+    for field in schema["fields"]:
+        kind = field["kind"]
+        level = field.get("level", "person")
+        names = field_names(field)
+        variables = [variable_name(name) for name in names]
+        column = "col_" + variables[0][2:]
+
+        if level == "person":
+            count, index, setup, assign = "person_count", "i", person_setup, person_assign
+        elif level == "role":
+            count, index, setup, assign = "role_total", "j", role_setup, role_assign
+        else:
+            raise ValueError(f"Field {names[0]}: unknown level '{level}'")
+
+        if kind == "sequence":
+            if level != "role":
+                raise ValueError(f"Field {names[0]}: sequence fields must be role-level")
+            has_sequence = True
+            sequence_start = field.get("start", 1)
+            assign.append(f"{variables[0]} = record_id")
+
+        elif kind in ("choice", "template"):
+            values = field["values"] if kind == "choice" else template_values(field)
+            if len(names) > 1:
+                values = [tuple(value) for value in values]
+            else:
+                choice_values[names[0]] = values
+
+            draw = f"choices({constant(values)}, k={count})"
+            if field.get("weights"):
+                draw = (f"choices({constant(values)}, "
+                        f"cum_weights={constant(cumulative_weights(field['weights']))}, k={count})")
+            setup.append(f"{column} = {draw}")
+            assign.append(f"{', '.join(variables)} = {column}[{index}]")
+
+        elif kind == "constant":
+            assign.append(f"{variables[0]} = {field['value']!r}")
+
+        elif kind == "copy":
+            assign.append(f"{variables[0]} = {variable_name(field['from'])}")
+
+        elif kind == "format":
+            parts = []
+            for literal, reference, _, _ in string.Formatter().parse(field["format"]):
+                if literal:
+                    parts.append(repr(literal))
+                if reference:
+                    parts.append(f"str({variable_name(reference)})")
+            assign.append(f"{variables[0]} = {concat_source(parts)}")
+
+        elif kind == "product_rank":
+            # Stable rank over the cartesian product of the source vocabularies
+            sources = field["of"]
+            for source in sources:
+                if source not in choice_values:
+                    raise ValueError(f"Field {names[0]}: '{source}' must be an earlier single-column choice field")
+            ranks = {}
+            for combination in _product([choice_values[source] for source in sources]):
+                ranks[combination] = str(len(ranks) + 1)
+            key = ", ".join(variable_name(source) for source in sources)
+            assign.append(f"{variables[0]} = {constant(ranks)}[({key},)]")
+
+        elif kind == "sid":
+            letters = constant(string.ascii_uppercase)
+            alphanumeric = constant(string.ascii_uppercase + string.digits)
+            prelude.append("seen_sids = set()")
+            prelude.append("def next_sid():")
+            prelude.append("    while True:")
+            prelude.append(f"        sid = ''.join(choices({letters}, k={field['letters']})) + "
+                           f"''.join(choices({alphanumeric}, k={field['alphanumeric']}))")
+            if field.get("unique"):
+                prelude.append("        if sid in seen_sids:")
+                prelude.append("            continue")
+                prelude.append("        seen_sids.add(sid)")
+            prelude.append("        return sid")
+            setup.append(f"{column} = [next_sid() for _ in range({count})]")
+            assign.append(f"{variables[0]} = {column}[{index}]")
+
+        elif kind == "token_expression":
+            tokens_name = constant(field["tokens"])
+            function_name = f"token_expression_{variables[0][2:]}"
+            levels = field["complexity"]
+
+            prelude.append(f"def {function_name}():")
+            prelude.append(f"    complexity = choices({constant(list(range(len(levels))))}, "
+                           f"cum_weights={constant(cumulative_weights([c['weight'] for c in levels]))})[0]")
+            for position, complexity in enumerate(levels):
+                prelude.append(f"    if complexity == {position}:")
+                favored = complexity.get("favored")
+                if favored:
+                    prelude.append(f"        if random_value() < {favored['probability']!r}:")
+                    prelude.append(f"            return {favored['expression']!r}")
+                patterns = complexity["patterns"]
+                prelude.append(f"        pattern = randint(0, {len(patterns) - 1})")
+                for pattern_index, pattern in enumerate(patterns):
+                    prelude.append(f"        if pattern == {pattern_index}:")
+                    prelude.append(f"            return {token_pattern_source(pattern, tokens_name)}")
+            setup.append(f"{column} = [{function_name}() for _ in range({count})]")
+            assign.append(f"{variables[0]} = {column}[{index}]")
+
+        elif kind == "fte_split":
+            if level != "role":
+                raise ValueError(f"Field {names[0]}: fte_split fields must be role-level")
+            steps = round(1 / field["step"])
+            prelude.append("def fte_split(num_roles):")
+            prelude.append("    if num_roles == 1:")
+            prelude.append("        return [1.0]")
+            prelude.append("    splits = []")
+            prelude.append(f"    remaining_steps = {steps}")
+            prelude.append("    for k in range(num_roles - 1):")
+            prelude.append("        max_steps = remaining_steps - (num_roles - k - 1)")
+            prelude.append("        if max_steps < 1:")
+            prelude.append("            max_steps = 1")
+            prelude.append("        steps = randint(1, max_steps)")
+            prelude.append(f"        splits.append(steps / {float(steps)!r})")
+            prelude.append("        remaining_steps -= steps")
+            prelude.append(f"    splits.append(remaining_steps / {float(steps)!r})")
+            prelude.append("    return splits")
+            person_assign.append(f"fte_{variables[0][2:]} = fte_split(num_roles)")
+            assign.append(f"{variables[0]} = fte_{variables[0][2:]}[r]")
+
+        else:
+            raise ValueError(f"Field {names[0]}: unknown kind '{kind}'")
+
+    if not has_sequence:
+        raise ValueError("Schema needs one role-level sequence field for record IDs")
+
+    columns = schema.get("columns") or [name for field in schema["fields"] for name in field_names(field)]
+    record_source = ", ".join(f"{name!r}: {variable_name(name)}" for name in columns)
+
+    roles = schema["roles_per_person"]
+    role_values = constant(roles["values"])
+    role_weights = constant(cumulative_weights(roles["weights"]))
+
+    def indent(lines, depth):
+        return [" " * depth + line for line in lines]
+
+    source_lines = [
+        "def generate_batches(total_rows, rng, start_id=None):",
+        "    choices = rng.choices",
+        "    choice = rng.choice",
+        "    randint = rng.randint",
+        "    random_value = rng.random",
+        *indent(prelude, 4),
+        f"    record_id = {sequence_start} if start_id is None else start_id",
+        "    remaining = total_rows",
+        "    while remaining > 0:",
+        "        data = []",
+        "        append = data.append",
+        "        person_count = min(BATCH_SIZE, remaining)",
+        f"        roles = choices({role_values}, cum_weights={role_weights}, k=person_count)",
+        "        role_total = sum(roles)",
+        *indent(person_setup, 8),
+        *indent(role_setup, 8),
+        "        j = 0",
+        "        for i in range(person_count):",
+        "            num_roles = roles[i]",
+        "            if num_roles > remaining:",
+        "                num_roles = remaining",
+        *indent(person_assign, 12),
+        "            for r in range(num_roles):",
+        *indent(role_assign, 16),
+        f"                append({{{record_source}}})",
+        "                record_id += 1",
+        "                j += 1",
+        "            remaining -= num_roles",
+        "            if remaining == 0:",
+        "                break",
+        "        yield data",
+    ]
+    source = "\n".join(source_lines) + "\n"
+
+    namespace = dict(constants)
+    namespace["BATCH_SIZE"] = BATCH_SIZE
+    exec(compile(source, f"<schema {schema.get('name', 'unnamed')}>", "exec"), namespace)
+    return namespace["generate_batches"], source
+
+def _product(vocabularies):
+    """Cartesian product of vocabularies in declaration order"""
+    combinations = [()]
+    for values in vocabularies:
+        combinations = [combination + (value,) for combination in combinations for value in values]
+    return combinations
+
+def generate_from_schema(total_rows=100000, schema_file=DEFAULT_SCHEMA_FILE, rng=random):
+    """Generate MPD records using the compiled generator for a schema spec"""
+    schema = load_schema(schema_file)
+    generate_batches, _ = compile_schema(schema)
+
+    print(f"Generating {total_rows:,} MPD records from schema {schema_file}...")
+    data = []
+    for batch in generate_batches(total_rows, rng):
+        data.extend(batch)
+        print(f"Generated {len(data):,} MPD records...")
+    return data
+
+if __name__ == "__main__":
+    # Print the generated source for a schema spec
+    schema_file = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SCHEMA_FILE
+    _, generated_source = compile_schema(load_schema(schema_file))
+    print(generated_source)
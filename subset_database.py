@@ -0,0 +1,243 @@
+import os
+import sqlite3
+import sys
+import zlib
+from urllib.request import pathname2url
+from json_to_sqlite import (create_mpd_table, create_test_scores_table, create_indexes, create_views,
+                            create_person_summary, refresh_stats, get_database_stats,
+                            partition_table_name, sample_hash, start_rebuild, publish_database,
+                            split_args)
+from token_index import create_token_index
+
+def salt_offset(salt):
+    """Position in SAMPLE_HASH order where a salt's selection starts"""
+    return zlib.crc32(salt.encode())
+
+def persons_source(cursor):
+    """
+    Table with one row per source person, its stratum (SNAPSHOT,
+    AFFILIATION_TYPE, PRIMARY_DOMAIN) and SAMPLE_HASH, indexed by stratum
+    and hash: src.person_summary, or a temp table hashed here for databases
+    built before person_summary had SAMPLE_HASH
+    """
+    cursor.execute("PRAGMA src.table_info(person_summary)")
+    columns = {row[1] for row in cursor.fetchall()}
+    if "SAMPLE_HASH" in columns:
+        return "src.person_summary"
+
+    if columns:
+        persons = "SELECT SID, SNAPSHOT, AFFILIATION_TYPE, PRIMARY_DOMAIN FROM src.person_summary"
+    else:
+        # Older databases: any one role's DOMAIN stands in for the primary domain
+        persons = """SELECT SID, SNAPSHOT, MIN(AFFILIATION_TYPE) AS AFFILIATION_TYPE, MIN(DOMAIN) AS PRIMARY_DOMAIN
+                     FROM src.mpd_data GROUP BY SID, SNAPSHOT"""
+    cursor.connection.create_function("sample_hash", 2, sample_hash, deterministic=True)
+    cursor.execute(f"""
+        CREATE TEMP TABLE persons AS
+        SELECT SID, SNAPSHOT, AFFILIATION_TYPE, PRIMARY_DOMAIN, sample_hash(SID, SNAPSHOT) AS SAMPLE_HASH
+        FROM ({persons})
+    """)
+    cursor.execute("""
+        CREATE INDEX temp.idx_persons_sample
+        ON persons(SNAPSHOT, AFFILIATION_TYPE, PRIMARY_DOMAIN, SAMPLE_HASH, SID)
+    """)
+    return "temp.persons"
+
+def select_persons(cursor, fraction, salt):
+    """
+    Fill temp.selected with about fraction of the persons in every
+    SNAPSHOT/AFFILIATION_TYPE/DOMAIN stratum: each stratum keeps the
+    ROUND(size * fraction) persons at or after the salt's offset in
+    SAMPLE_HASH order (wrapping around to the lowest hashes), and at least
+    one, so small strata are never dropped from the subset. Each stratum is
+    an index range read that stops at its quota. Strata with NULL keys are
+    matched with IS and form strata of their own.
+    """
+    persons = persons_source(cursor)
+
+    cursor.execute(f"""
+        CREATE TEMP TABLE strata AS
+        SELECT SNAPSHOT, AFFILIATION_TYPE, PRIMARY_DOMAIN, COUNT(*) AS SIZE,
+               MAX(1, CAST(ROUND(COUNT(*) * ?) AS INTEGER)) AS QUOTA
+        FROM {persons}
+        GROUP BY SNAPSHOT, AFFILIATION_TYPE, PRIMARY_DOMAIN
+    """, (fraction,))
+
+    cursor.execute("""
+        CREATE TEMP TABLE selected (
+            SID VARCHAR(128),
+            SNAPSHOT VARCHAR(128),
+            PRIMARY KEY (SID, SNAPSHOT)
+        ) WITHOUT ROWID
+    """)
+
+    offset = salt_offset(salt)
+    cursor.execute("SELECT SNAPSHOT, AFFILIATION_TYPE, PRIMARY_DOMAIN, QUOTA FROM temp.strata")
+    for snapshot, affiliation_type, primary_domain, quota in cursor.fetchall():
+        for hash_range in ("SAMPLE_HASH >= ?", "SAMPLE_HASH < ?"):
+            cursor.execute(f"""
+                INSERT INTO temp.selected
+                SELECT SID, SNAPSHOT FROM {persons}
+                WHERE SNAPSHOT IS ? AND AFFILIATION_TYPE IS ? AND PRIMARY_DOMAIN IS ? AND {hash_range}
+                ORDER BY SAMPLE_HASH, SID
+                LIMIT ?
+            """, (snapshot, affiliation_type, primary_domain, offset, quota))
+            quota -= cursor.rowcount
+            if not quota:
+                break
+
+    cursor.execute("SELECT COUNT(*) FROM temp.strata WHERE ROUND(SIZE * ?) < 1", (fraction,))
+    rounded_up = cursor.fetchone()[0]
+    if rounded_up:
+        print(f"⚠️  {rounded_up} strata are too small for {fraction:.2%} and keep one person each")
+
+    cursor.execute("SELECT COUNT(*) FROM temp.selected")
+    return cursor.fetchone()[0]
+
+def copy_sources(cursor, table_name):
+    """
+    (source, snapshot) pairs that together hold a source table's rows, each
+    one a table or view SQLite can probe by (SID, SNAPSHOT): the partitions
+    of a partitioned table, the per-snapshot views of a delta-encoded
+    mpd_data, or else the table itself (snapshot None). The UNION ALL views
+    over partitions and delta snapshots can't be probed by key - SQLite scans
+    every partition or materializes the whole view instead.
+    """
+    cursor.execute("SELECT 1 FROM src.sqlite_master WHERE name = 'snapshot_partitions'")
+    if cursor.fetchone():
+        cursor.execute("SELECT SNAPSHOT, PARTITION_NAME FROM src.snapshot_partitions WHERE TABLE_NAME = ?",
+                       (table_name,))
+        partitions = cursor.fetchall()
+        if partitions:
+            return [(f"src.{partition_name}", snapshot) for snapshot, partition_name in partitions]
+
+    if table_name == "mpd_data":
+        cursor.execute("SELECT 1 FROM src.sqlite_master WHERE name = 'mpd_delta_snapshots'")
+        if cursor.fetchone():
+            cursor.execute("SELECT SNAPSHOT FROM src.mpd_delta_snapshots ORDER BY SNAPSHOT_INDEX")
+            return [(f"src.{partition_table_name('v_mpd_snapshot', snapshot)}", snapshot)
+                    for (snapshot,) in cursor.fetchall()]
+
+    return [(f"src.{table_name}", None)]
+
+def copy_rows(cursor, table_name):
+    """Bulk-copy the selected persons' rows, seeking each source by (SID, SNAPSHOT)"""
+    cursor.execute(f"PRAGMA main.table_info({table_name})")
+    columns = [row[1] for row in cursor.fetchall()]
+
+    copied = 0
+    for source, snapshot in copy_sources(cursor, table_name):
+        condition = "" if snapshot is None else "s.SNAPSHOT = ? AND "
+        # CROSS JOIN keeps temp.selected as the outer loop: one (SID, SNAPSHOT)
+        # index seek per selected person instead of a scan of the source
+        cursor.execute(f"""
+            INSERT INTO main.{table_name} ({", ".join(columns)})
+            SELECT {", ".join(f"t.{column}" for column in columns)}
+            FROM temp.selected s CROSS JOIN {source} t
+            WHERE {condition}t.SID = s.SID AND t.SNAPSHOT = s.SNAPSHOT
+            ORDER BY t.ID
+        """, () if snapshot is None else (snapshot,))
+        copied += cursor.rowcount
+
+    print(f"✅ Copied {copied:,} {table_name} records")
+    return copied
+
+def print_mix(cursor, column):
+    """Compare the share of each value of a column between source and subset"""
+    print(f"\n  {column} mix (source -> subset):")
+    shares = {}
+    for schema in ("src", "main"):
+        # ORDER BY rather than sorted(): a NULL value doesn't compare with strings
+        cursor.execute(f"SELECT {column}, COUNT(*) FROM {schema}.mpd_data GROUP BY {column} ORDER BY {column}")
+        rows = cursor.fetchall()
+        total = sum(count for _, count in rows) or 1
+        shares[schema] = {value: count / total * 100 for value, count in rows}
+    for value, share in shares["src"].items():
+        print(f"    {value}: {share:.1f}% -> {shares['main'].get(value, 0):.1f}%")
+
+def create_subset(source_db, output_db, fraction=0.01, salt="subset"):
+    """Build output_db from about fraction of the persons in source_db"""
+    build_file = start_rebuild(output_db)
+    conn = sqlite3.connect(build_file)
+    cursor = conn.cursor()
+
+    # Attach the source read-only so a production database is never modified
+    cursor.execute("ATTACH DATABASE ? AS src", (f"file:{pathname2url(os.path.abspath(source_db))}?mode=ro",))
+
+    create_mpd_table(cursor)
+    create_test_scores_table(cursor)
+
+    selected = select_persons(cursor, fraction, salt)
+    print(f"✅ Selected {selected:,} persons ({fraction:.2%} of each SNAPSHOT/AFFILIATION_TYPE/DOMAIN stratum)")
+
+    mpd_count = copy_rows(cursor, "mpd_data")
+    test_count = copy_rows(cursor, "test_scores")
+    conn.commit()
+
+    print_mix(cursor, "SNAPSHOT")
+    print_mix(cursor, "AFFILIATION_TYPE")
+    print_mix(cursor, "DOMAIN")
+
+    cursor.execute("DETACH DATABASE src")
+    create_indexes(cursor)
+    create_views(cursor)
+    create_person_summary(cursor)
+    create_token_index(cursor)
+    refresh_stats(cursor)
+    conn.commit()
+    get_database_stats(cursor)
+    conn.close()
+
+    publish_database(build_file, output_db)
+    return mpd_count, test_count
+
+def main():
+    args, options = split_args(sys.argv[1:])
+    if len(args) < 2:
+        show_usage()
+        return 1
+
+    source_db, output_db = args[0], args[1]
+    fraction = float(options['fraction']) if options.get('fraction') else 0.01
+    salt = options['salt'] if isinstance(options.get('salt'), str) else "subset"
+
+    if not os.path.exists(source_db):
+        print(f"❌ Error: Database '{source_db}' not found")
+        return 1
+    if os.path.abspath(source_db) == os.path.abspath(output_db):
+        print("❌ Error: Output database must differ from the source")
+        return 1
+    if not 0 < fraction <= 1:
+        print(f"❌ Error: --fraction must be in (0, 1], got {fraction}")
+        return 1
+
+    print("=== MPD Database Subset ===\n")
+    print(f"Source database: {source_db}")
+    print(f"Output database: {output_db}\n")
+
+    mpd_count, test_count = create_subset(source_db, output_db, fraction, salt)
+
+    print(f"\n🎉 Successfully created subset: {output_db}")
+    print(f"   MPD records: {mpd_count:,}")
+    print(f"   Test records: {test_count:,}")
+    return 0
+
+def show_usage():
+    """Show usage instructions"""
+    print("Usage:")
+    print("  python subset_database.py source_db output_db [--fraction=0.01] [--salt=subset]")
+    print("")
+    print("Examples:")
+    print("  python subset_database.py development.db ci.db")
+    print("    Copies 1% of the persons of every SNAPSHOT/AFFILIATION_TYPE/DOMAIN stratum, with their tests")
+    print("")
+    print("  python subset_database.py development.db dev.db --fraction=0.1 --salt=other")
+    print("    A 10% slice; a different salt picks a different (still reproducible) set of persons")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ['-h', '--help', 'help']:
+        show_usage()
+        sys.exit(0)
+
+    exit_code = main()
+    sys.exit(exit_code)
@@ -0,0 +1,44 @@
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import random
+import sys
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+@pytest.fixture(scope="session")
+def generate_data():
+    """The generate-data.py module (its file name isn't importable)"""
+    spec = importlib.util.spec_from_file_location("generate_data", os.path.join(REPO_ROOT, "generate-data.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture
+def seeded_random():
+    """Seed the global random module for the test and restore its state afterwards"""
+    state = random.getstate()
+    random.seed(1234)
+    yield
+    random.setstate(state)
+
+def quietly(function, *args, **kwargs):
+    """Call function with its progress output suppressed"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+def write_json(path, records):
+    with open(path, 'w') as f:
+        json.dump(records, f)
+    return str(path)
+
+def load_database(monkeypatch, mpd_file, test_file, db_file, *options):
+    """Run the json_to_sqlite.py loader on JSON files"""
+    import json_to_sqlite
+    monkeypatch.setattr(sys, "argv", ["json_to_sqlite.py", mpd_file, test_file, db_file, *options])
+    assert quietly(json_to_sqlite.main) == 0
+    return db_file
@@ -0,0 +1,121 @@
+import os
+import random
+import sqlite3
+import sys
+import pytest
+import json_to_sqlite
+from json_to_sqlite import build_path
+from conftest import quietly, write_json, load_database
+
+MPD_ROWS = 25000
+TEST_ROWS = 25000
+OUTPUT_FILES = ["mpd_notional_data.json", "test_scores_notional_data.json"]
+
+class Crash(Exception):
+    pass
+
+def read_outputs():
+    outputs = {}
+    for name in OUTPUT_FILES:
+        with open(name, 'rb') as f:
+            outputs[name] = f.read()
+    return outputs
+
+@pytest.fixture
+def uninterrupted(tmp_path, monkeypatch, generate_data):
+    """Files written by a checkpointed run that never crashed"""
+    monkeypatch.chdir(tmp_path)
+    random.seed(99)
+    quietly(generate_data.run_checkpointed_generation, MPD_ROWS, TEST_ROWS)
+    outputs = read_outputs()
+    for name in OUTPUT_FILES:
+        os.remove(name)
+    return outputs
+
+@pytest.mark.parametrize("crash_at", [3, 6], ids=["mpd_stage", "test_stage"])
+def test_resume_after_crash_gives_identical_files(uninterrupted, monkeypatch, generate_data, crash_at):
+    save_checkpoint = generate_data.save_checkpoint
+    calls = []
+
+    def crashing_save(checkpoint, filename=generate_data.CHECKPOINT_FILE):
+        calls.append(checkpoint["stage"])
+        if len(calls) == crash_at:
+            raise Crash()
+        save_checkpoint(checkpoint, filename)
+
+    random.seed(99)
+    monkeypatch.setattr(generate_data, "save_checkpoint", crashing_save)
+    with pytest.raises(Crash):
+        quietly(generate_data.run_checkpointed_generation, MPD_ROWS, TEST_ROWS)
+    monkeypatch.setattr(generate_data, "save_checkpoint", save_checkpoint)
+
+    assert os.path.exists(generate_data.CHECKPOINT_FILE)
+    # The resumed run must not depend on the state the crashed process left behind
+    random.seed(0)
+    quietly(generate_data.run_checkpointed_generation, MPD_ROWS, TEST_ROWS, resume=True)
+
+    assert read_outputs() == uninterrupted
+    assert not os.path.exists(generate_data.CHECKPOINT_FILE)
+
+def test_resume_without_checkpoint_starts_fresh(tmp_path, monkeypatch, generate_data):
+    monkeypatch.chdir(tmp_path)
+    files, test_count = quietly(generate_data.run_checkpointed_generation, 2000, 500, resume=True)
+    assert files == OUTPUT_FILES and test_count == 500
+    assert not os.path.exists(generate_data.CHECKPOINT_FILE)
+
+@pytest.fixture
+def json_files(tmp_path, generate_data, seeded_random):
+    mpd_data = quietly(generate_data.generate_mpd_dataset, 1000)
+    test_data = quietly(generate_data.generate_test_scores_dataset, mpd_data, 400)
+    return write_json(tmp_path / "mpd.json", mpd_data), write_json(tmp_path / "tests.json", test_data)
+
+def table_names(db_file):
+    conn = sqlite3.connect(db_file)
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    return names
+
+def failed_load(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["json_to_sqlite.py", *argv])
+    assert quietly(json_to_sqlite.main) == 1
+
+def row_counts(db_file):
+    conn = sqlite3.connect(db_file)
+    counts = [conn.execute(f"SELECT COUNT(*), COUNT(DISTINCT ID) FROM {name}").fetchone()
+              for name in ("mpd_data", "test_scores")]
+    conn.close()
+    return counts
+
+def test_resumed_load_is_complete_and_drops_load_progress(tmp_path, monkeypatch, json_files):
+    db_file = str(tmp_path / "loaded.db")
+    insert_test_scores_data = json_to_sqlite.insert_test_scores_data
+
+    def crashing_insert(*args):
+        raise Crash()
+
+    # MPD batches are committed before the test score load crashes
+    monkeypatch.setattr(json_to_sqlite, "insert_test_scores_data", crashing_insert)
+    failed_load(monkeypatch, *json_files, db_file)
+    assert "load_progress" in table_names(build_path(db_file))
+    monkeypatch.setattr(json_to_sqlite, "insert_test_scores_data", insert_test_scores_data)
+
+    load_database(monkeypatch, *json_files, db_file, "--resume")
+    assert "load_progress" not in table_names(db_file)
+    assert row_counts(db_file) == [(1000, 1000), (400, 400)]
+
+def test_resume_publishes_a_finished_build(tmp_path, monkeypatch, json_files):
+    db_file = str(tmp_path / "loaded.db")
+
+    def failing_publish(build_file, db_file):
+        raise RuntimeError("live WAL is busy")
+
+    monkeypatch.setattr(json_to_sqlite, "publish_database", failing_publish)
+    failed_load(monkeypatch, *json_files, db_file)
+    monkeypatch.undo()
+
+    # The finished build is published as is, without reading the input files
+    for json_file in json_files:
+        os.remove(json_file)
+    load_database(monkeypatch, *json_files, db_file, "--resume")
+    assert not os.path.exists(build_path(db_file))
+    assert row_counts(db_file) == [(1000, 1000), (400, 400)]
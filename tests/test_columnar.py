@@ -0,0 +1,93 @@
+import math
+import sqlite3
+import pytest
+
+# columnar.py is the one module that needs NumPy
+np = pytest.importorskip("numpy")
+from columnar import ColumnarReader, DictionaryColumn
+from conftest import quietly, write_json, load_database
+
+@pytest.fixture(scope="module")
+def database(tmp_path_factory, generate_data):
+    import random
+    state = random.getstate()
+    random.seed(40)
+    mpd_data = quietly(generate_data.generate_mpd_dataset, 3000)
+    test_data = quietly(generate_data.generate_test_scores_dataset, mpd_data, 800)
+    random.setstate(state)
+
+    directory = tmp_path_factory.mktemp("columnar")
+    monkeypatch = pytest.MonkeyPatch()
+    db_file = load_database(monkeypatch, write_json(directory / "mpd.json", mpd_data),
+                            write_json(directory / "tests.json", test_data), str(directory / "columnar.db"))
+    monkeypatch.undo()
+    return db_file
+
+def as_python(column):
+    """A column's values as Python objects (NaN as None) for comparison with SQL rows"""
+    values = column.decode() if isinstance(column, DictionaryColumn) else column
+    return [None if isinstance(value, float) and math.isnan(value) else
+            value.item() if isinstance(value, np.generic) else value for value in values]
+
+def concatenate(batches):
+    columns = {}
+    for batch in batches:
+        for name, column in batch.items():
+            columns.setdefault(name, []).extend(as_python(column))
+    return columns
+
+@pytest.mark.parametrize("table_name, order_by", [("mpd_data", "ID"), ("test_scores", "ID"),
+                                                  ("person_summary", "SID, SNAPSHOT")])
+def test_batches_round_trip_against_sql(database, table_name, order_by):
+    conn = sqlite3.connect(database)
+    cursor = conn.execute(f"SELECT * FROM {table_name} ORDER BY {order_by}")
+    names = [description[0] for description in cursor.description]
+    expected = cursor.fetchall()
+
+    reader = ColumnarReader(database, batch_size=700)
+    columns = concatenate(reader.iter_table(table_name, order_by=order_by))
+    reader.close()
+
+    assert list(columns) == names
+    for position, name in enumerate(names):
+        values = [row[position] for row in expected]
+        if name in ("LISTEN_SCORE", "READ_SCORE"):
+            # Stored as VARCHAR, read as int8
+            values = [int(value) for value in values]
+        assert columns[name] == values, name
+
+def test_column_types_and_shared_dictionaries(database):
+    reader = ColumnarReader(database, batch_size=500)
+    batches = list(reader.iter_table("test_scores"))
+    reader.close()
+
+    assert len(batches) == 2
+    first, second = batches
+    assert first["ID"].dtype == np.int64 and first["LISTEN_SCORE"].dtype == np.int8
+    assert isinstance(first["LANGUAGE"], DictionaryColumn)
+    # Codes mean the same value in every batch of a reader
+    assert first["LANGUAGE"].encoder is second["LANGUAGE"].encoder
+
+    reader = ColumnarReader(database)
+    summary = reader.read("SELECT BEST_LISTEN_SCORE, TOTAL_FTE FROM person_summary")
+    assert summary["BEST_LISTEN_SCORE"].dtype == np.float64 and np.isnan(summary["BEST_LISTEN_SCORE"]).any()
+    assert summary["TOTAL_FTE"].dtype == np.float64
+    reader.close()
+
+def test_query_results_match_sql(database):
+    sql = "SELECT DOMAIN, COUNT(*) AS ROLE_COUNT, AVG(FTE) AS MEAN_FTE FROM mpd_data GROUP BY DOMAIN ORDER BY DOMAIN"
+    expected = sqlite3.connect(database).execute(sql).fetchall()
+
+    reader = ColumnarReader(database)
+    columns = reader.read(sql)
+    reader.close()
+
+    assert columns["ROLE_COUNT"].dtype == np.int64
+    assert list(zip(as_python(columns["DOMAIN"]), as_python(columns["ROLE_COUNT"]),
+                    as_python(columns["MEAN_FTE"]))) == expected
+
+def test_nulls_in_an_integer_column_are_rejected(database):
+    reader = ColumnarReader(database)
+    with pytest.raises(ValueError, match="float64"):
+        reader.read("SELECT BEST_LISTEN_SCORE FROM person_summary", dtypes={"BEST_LISTEN_SCORE": np.int64})
+    reader.close()
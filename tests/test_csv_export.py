@@ -0,0 +1,84 @@
+import csv
+import gzip
+import os
+import sqlite3
+import pytest
+from csv_export import csv_filename, chunked, write_csv_batches, export_table
+from conftest import quietly, write_json, load_database
+
+def read_csv(filename):
+    """Header and rows of a CSV file, gzip-compressed or not"""
+    opener = gzip.open if filename.endswith(".gz") else open
+    with opener(filename, 'rt', newline='') as f:
+        rows = list(csv.reader(f))
+    return rows[0], rows[1:]
+
+def as_csv(value):
+    """How the csv module writes a value"""
+    return "" if value is None else str(value)
+
+@pytest.fixture(scope="module")
+def databases(tmp_path_factory, generate_data):
+    import random
+    state = random.getstate()
+    random.seed(35)
+    mpd_data = quietly(generate_data.generate_mpd_dataset, 3000)
+    test_data = quietly(generate_data.generate_test_scores_dataset, mpd_data, 1000)
+    random.setstate(state)
+
+    directory = tmp_path_factory.mktemp("csv")
+    mpd_file = write_json(directory / "mpd.json", mpd_data)
+    test_file = write_json(directory / "tests.json", test_data)
+    monkeypatch = pytest.MonkeyPatch()
+    databases = {
+        layout: load_database(monkeypatch, mpd_file, test_file, str(directory / f"{layout}.db"), *options)
+        for layout, options in [("plain", []), ("partitioned", ["--partitioned"]), ("clustered", ["--clustered"])]
+    }
+    monkeypatch.undo()
+    return databases
+
+def test_csv_filename():
+    assert csv_filename("mpd_data.csv") == "mpd_data.csv"
+    assert csv_filename("mpd_data", "FALL 2023", compress=True) == "mpd_data_FALL_2023.csv.gz"
+
+def test_split_gzip_batches_round_trip(tmp_path):
+    records = [{"ID": i, "SNAPSHOT": ["FALL 2023", "SPRING 2024"][i % 2], "FTE": i / 10, "STATE": None}
+               for i in range(1, 11)]
+    filename = str(tmp_path / "records.csv")
+
+    counts = write_csv_batches(chunked(records, 3), filename, split_by_snapshot=True, compress=True)
+
+    assert counts == {csv_filename(filename, "FALL 2023", True): 5, csv_filename(filename, "SPRING 2024", True): 5}
+    for snapshot in ["FALL 2023", "SPRING 2024"]:
+        header, rows = read_csv(csv_filename(filename, snapshot, True))
+        assert header == ["ID", "SNAPSHOT", "FTE", "STATE"]
+        assert rows == [[as_csv(record[column]) for column in header]
+                        for record in records if record["SNAPSHOT"] == snapshot]
+
+@pytest.mark.parametrize("layout", ["plain", "partitioned", "clustered"])
+def test_exported_table_matches_the_database(databases, layout, tmp_path):
+    conn = sqlite3.connect(databases[layout])
+    cursor = conn.execute("SELECT * FROM mpd_data")
+    columns = [description[0] for description in cursor.description]
+    expected = sorted([as_csv(value) for value in row] for row in cursor.fetchall())
+
+    filename = str(tmp_path / "mpd_data.csv")
+    counts = quietly(export_table, databases[layout], "mpd_data", filename, chunk_size=500,
+                     split_by_snapshot=True, compress=True)
+    assert sum(counts.values()) == len(expected)
+
+    exported = []
+    for name, count in counts.items():
+        assert os.path.basename(name).startswith("mpd_data_") and name.endswith(".csv.gz")
+        header, rows = read_csv(name)
+        assert header == columns and len(rows) == count
+        assert {row[columns.index("SNAPSHOT")] for row in rows} == {os.path.basename(name)[9:-7].replace("_", " ")}
+        exported += rows
+    assert sorted(exported) == expected
+
+def test_plain_export_is_in_id_order(databases, tmp_path):
+    filename = str(tmp_path / "test_scores.csv")
+    quietly(export_table, databases["plain"], "test_scores", filename, chunk_size=100)
+    header, rows = read_csv(filename)
+    ids = [int(row[header.index("ID")]) for row in rows]
+    assert ids == sorted(ids) and len(ids) == 1000
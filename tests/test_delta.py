@@ -0,0 +1,62 @@
+import sqlite3
+import sys
+from collections import Counter
+import pytest
+import json_to_sqlite
+from conftest import quietly, write_json, load_database
+
+@pytest.mark.parametrize("total_rows", [4000, 4001, 2003])
+def test_temporal_dataset_has_exactly_the_requested_rows(generate_data, seeded_random, total_rows):
+    mpd_data = quietly(generate_data.generate_temporal_dataset, total_rows, churn=0.2, change_rate=0.5)
+    assert len(mpd_data) == total_rows
+    assert len({record["ID"] for record in mpd_data}) == total_rows
+
+    # Only whole persons are hired, so every person's FTE still sums to 1.0
+    fte = Counter()
+    for record in mpd_data:
+        fte[record["SID"], record["SNAPSHOT"]] += record["FTE"]
+    assert all(total == pytest.approx(1.0) for total in fte.values())
+
+@pytest.mark.parametrize("layout", ["--partitioned", "--clustered"])
+def test_delta_rejects_other_layouts(tmp_path, monkeypatch, generate_data, seeded_random, layout):
+    mpd_data = quietly(generate_data.generate_mpd_dataset, 200)
+    test_data = quietly(generate_data.generate_test_scores_dataset, mpd_data, 50)
+    db_file = str(tmp_path / "delta.db")
+    monkeypatch.setattr(sys, "argv", ["json_to_sqlite.py", write_json(tmp_path / "mpd.json", mpd_data),
+                                      write_json(tmp_path / "tests.json", test_data), db_file, "--delta", layout])
+    assert quietly(json_to_sqlite.main) == 1
+    assert not (tmp_path / "delta.db").exists()
+
+def test_delta_views_rebuild_every_snapshot(tmp_path, monkeypatch, generate_data, seeded_random):
+    mpd_data = quietly(generate_data.generate_temporal_dataset, 2000, churn=0.1, change_rate=0.3)
+    test_data = quietly(generate_data.generate_test_scores_dataset, mpd_data, 500)
+    db_file = load_database(monkeypatch, write_json(tmp_path / "mpd.json", mpd_data),
+                            write_json(tmp_path / "tests.json", test_data), str(tmp_path / "delta.db"), "--delta")
+
+    conn = sqlite3.connect(db_file)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+
+    # Only the first snapshot is stored in full
+    cursor.execute("SELECT COUNT(*) FROM mpd_base")
+    assert cursor.fetchone()[0] < len(mpd_data)
+
+    cursor.execute("SELECT * FROM mpd_data")
+    rebuilt = {row["ID"]: dict(row) for row in cursor.fetchall()}
+    assert len(rebuilt) == len(mpd_data)
+    for record in mpd_data:
+        assert rebuilt[record["ID"]] == record
+
+def test_delta_snapshot_view_matches_its_slice(tmp_path, monkeypatch, generate_data, seeded_random):
+    mpd_data = quietly(generate_data.generate_temporal_dataset, 1000, churn=0.2, change_rate=0.5)
+    test_data = quietly(generate_data.generate_test_scores_dataset, mpd_data, 100)
+    db_file = load_database(monkeypatch, write_json(tmp_path / "mpd.json", mpd_data),
+                            write_json(tmp_path / "tests.json", test_data), str(tmp_path / "delta.db"), "--delta")
+
+    cursor = sqlite3.connect(db_file).cursor()
+    cursor.execute("SELECT SNAPSHOT FROM mpd_delta_snapshots ORDER BY SNAPSHOT_INDEX")
+    for (snapshot,) in cursor.fetchall():
+        view_name = f"v_mpd_snapshot_{snapshot.lower().replace(' ', '_')}"
+        cursor.execute(f"SELECT ID FROM {view_name} ORDER BY ID")
+        expected = sorted(record["ID"] for record in mpd_data if record["SNAPSHOT"] == snapshot)
+        assert [row[0] for row in cursor.fetchall()] == expected
@@ -0,0 +1,222 @@
+import contextlib
+import io
+import sqlite3
+import pytest
+from json_to_sqlite import (get_partitions, snapshot_source, sql_string, partition_table_name, drop_snapshot,
+                            read_stats, refresh_stats, get_database_stats, StatsAccumulator)
+from conftest import quietly, write_json, load_database
+
+GROUP_RANKS = {"LOW": 1, "MEDIUM": 2, "HIGH": 3}
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory, generate_data):
+    """A small generated dataset and its JSON files"""
+    import random
+    state = random.getstate()
+    random.seed(7)
+    mpd_data = quietly(generate_data.generate_mpd_dataset, 4000)
+    test_data = quietly(generate_data.generate_test_scores_dataset, mpd_data, 1500)
+    random.setstate(state)
+
+    directory = tmp_path_factory.mktemp("loader")
+    files = (write_json(directory / "mpd.json", mpd_data), write_json(directory / "tests.json", test_data))
+    return directory, files, mpd_data, test_data
+
+def build(dataset, name, *options):
+    directory, (mpd_file, test_file), _, _ = dataset
+    db_file = str(directory / name)
+    monkeypatch = pytest.MonkeyPatch()
+    load_database(monkeypatch, mpd_file, test_file, db_file, *options)
+    monkeypatch.undo()
+    return db_file
+
+def test_partitioned_load_routes_each_snapshot_to_its_partition(dataset):
+    _, _, mpd_data, test_data = dataset
+    conn = sqlite3.connect(build(dataset, "routed.db", "--partitioned"))
+    cursor = conn.cursor()
+
+    for table_name, records in [("mpd_data", mpd_data), ("test_scores", test_data)]:
+        by_snapshot = {}
+        for record in records:
+            by_snapshot.setdefault(record["SNAPSHOT"], set()).add(record["ID"])
+
+        partitions = get_partitions(cursor, table_name)
+        assert partitions == [(snapshot, partition_table_name(table_name, snapshot))
+                              for snapshot in ["FALL 2023", "SPRING 2024", "FALL 2024", "SPRING 2025"]]
+        for snapshot, partition_name in partitions:
+            cursor.execute(f"SELECT DISTINCT SNAPSHOT FROM {partition_name}")
+            assert cursor.fetchall() == [(snapshot,)]
+            cursor.execute(f"SELECT ID FROM {partition_name}")
+            assert {row[0] for row in cursor.fetchall()} == by_snapshot[snapshot]
+
+        cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+        assert cursor.fetchone()[0] == len(records)
+
+def test_drop_snapshot_removes_it_everywhere(tmp_path, monkeypatch, generate_data, seeded_random):
+    # Persons of a temporal dataset recur across snapshots, so dropping one
+    # snapshot removes only some of its SIDs from the whole-table count
+    mpd_data = quietly(generate_data.generate_temporal_dataset, 3000, churn=0.2, change_rate=0.1)
+    test_data = quietly(generate_data.generate_test_scores_dataset, mpd_data, 800)
+    conn = sqlite3.connect(load_database(monkeypatch, write_json(tmp_path / "mpd.json", mpd_data),
+                                         write_json(tmp_path / "tests.json", test_data),
+                                         str(tmp_path / "dropped.db"), "--partitioned"))
+    cursor = conn.cursor()
+    sids_before = read_stats(cursor)[("mpd_data", "ALL")][1]
+    cursor.execute("SELECT COUNT(*) FROM mpd_data WHERE SNAPSHOT != 'FALL 2023'")
+    kept = cursor.fetchone()[0]
+
+    assert quietly(drop_snapshot, conn, "FALL 2023") is True
+
+    cursor.execute("SELECT name FROM sqlite_master WHERE name LIKE '%fall_2023%'")
+    assert cursor.fetchall() == []
+    cursor.execute("SELECT COUNT(*) FROM token_bitmaps WHERE TABLE_NAME LIKE '%fall_2023'")
+    assert cursor.fetchone()[0] == 0
+    for table_name in ["mpd_data", "test_scores", "person_summary"]:
+        cursor.execute(f"SELECT COUNT(*) FROM {table_name} WHERE SNAPSHOT = 'FALL 2023'")
+        assert cursor.fetchone()[0] == 0, table_name
+    cursor.execute("SELECT COUNT(*) FROM mpd_data")
+    assert cursor.fetchone()[0] == kept
+
+    # The incrementally adjusted catalog equals a full recount
+    adjusted = read_stats(cursor)
+    assert 0 < sids_before - adjusted[("mpd_data", "ALL")][1] < len({record["SID"] for record in mpd_data
+                                                                     if record["SNAPSHOT"] == "FALL 2023"})
+    refresh_stats(cursor)
+    assert adjusted == read_stats(cursor)
+
+    assert quietly(drop_snapshot, conn, "FALL 2023") is False
+    for snapshot in ["SPRING 2024", "FALL 2024"]:
+        assert quietly(drop_snapshot, conn, snapshot) is True
+    # The last partition of a table can't be dropped
+    assert quietly(drop_snapshot, conn, "SPRING 2025") is False
+
+def test_clustered_layout_stores_rows_by_person(dataset):
+    plain = sqlite3.connect(build(dataset, "unclustered.db"))
+    clustered = sqlite3.connect(build(dataset, "clustered.db", "--clustered"))
+
+    for table_name in ["mpd_data", "test_scores"]:
+        sql = clustered.execute("SELECT sql FROM sqlite_master WHERE name = ?", (table_name,)).fetchone()[0]
+        assert "PRIMARY KEY (SNAPSHOT, SID, ID)" in sql and sql.rstrip().endswith("WITHOUT ROWID")
+
+        # Same rows, stored in (SNAPSHOT, SID, ID) order
+        rows = clustered.execute(f"SELECT * FROM {table_name}").fetchall()
+        assert sorted(rows) == sorted(plain.execute(f"SELECT * FROM {table_name}").fetchall())
+        columns = [row[1] for row in clustered.execute(f"PRAGMA table_info({table_name})")]
+        key = [columns.index(column) for column in ["SNAPSHOT", "SID", "ID"]]
+        assert rows == sorted(rows, key=lambda row: [row[position] for position in key])
+
+    indexes = {row[0] for row in clustered.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_mpd_id", "idx_test_id"} <= indexes
+    assert not indexes & {"idx_mpd_sid_snapshot", "idx_test_sid_snapshot"}
+
+    # Person lookups and the two-key join are primary-key range scans
+    sid, snapshot = clustered.execute("SELECT SID, SNAPSHOT FROM mpd_data LIMIT 1").fetchone()
+    plan = sorted(row[3] for row in clustered.execute("""
+        EXPLAIN QUERY PLAN SELECT * FROM mpd_data m JOIN test_scores t ON m.SID = t.SID AND m.SNAPSHOT = t.SNAPSHOT
+        WHERE m.SID = ? AND m.SNAPSHOT = ?
+    """, (sid, snapshot)))
+    assert plan == ["SEARCH m USING PRIMARY KEY (SNAPSHOT=? AND SID=?)",
+                    "SEARCH t USING PRIMARY KEY (SNAPSHOT=? AND SID=?)"]
+
+@pytest.mark.parametrize("options", [[], ["--partitioned"]], ids=["plain", "partitioned"])
+def test_stats_counted_while_loading_match_a_recount(dataset, options):
+    conn = sqlite3.connect(build(dataset, "stats_" + "_".join(option.strip("-") for option in options) + ".db",
+                                 *options))
+    cursor = conn.cursor()
+    counted = read_stats(cursor)
+    refresh_stats(cursor)
+    assert counted == read_stats(cursor)
+    assert len(counted) == 2 * 5
+
+def test_stats_accumulator_counts_batches():
+    accumulator = StatsAccumulator()
+    accumulator.add("mpd_data", [{"SID": "A", "SNAPSHOT": "FALL 2023"}, {"SID": "A", "SNAPSHOT": "FALL 2023"}])
+    accumulator.add("mpd_data", [{"SID": "A", "SNAPSHOT": "FALL 2024"}, {"SID": "B", "SNAPSHOT": "FALL 2024"}])
+    cursor = sqlite3.connect(":memory:").cursor()
+    accumulator.write(cursor)
+    assert read_stats(cursor) == {
+        ("mpd_data", "FALL 2023"): (2, 1),
+        ("mpd_data", "FALL 2024"): (2, 2),
+        ("mpd_data", "ALL"): (4, 2),
+    }
+
+def test_database_stats_list_snapshots_chronologically(dataset):
+    cursor = sqlite3.connect(build(dataset, "printed.db")).cursor()
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        get_database_stats(cursor)
+    printed = [line.split(":")[0].strip() for line in output.getvalue().splitlines() if " MPD records, " in line]
+    assert printed == ["FALL 2023", "SPRING 2024", "FALL 2024", "SPRING 2025"]
+
+def count_steps(conn, sql, parameters=()):
+    """SQLite VM instructions (in units of 100) a query executes"""
+    steps = [0]
+
+    def tick():
+        steps[0] += 1
+        return 0
+
+    conn.set_progress_handler(tick, 100)
+    conn.execute(sql, parameters).fetchall()
+    conn.set_progress_handler(None, 0)
+    return steps[0]
+
+@pytest.mark.parametrize("options", [["--partitioned"], ["--partitioned", "--clustered"]],
+                         ids=["partitioned", "partitioned_clustered"])
+def test_snapshot_filter_reads_one_partition(dataset, options):
+    conn = sqlite3.connect(build(dataset, "_".join(option.strip("-") for option in options) + ".db", *options))
+    cursor = conn.cursor()
+    partitions = get_partitions(cursor, "mpd_data")
+    assert len(partitions) > 1
+
+    for snapshot, partition_name in partitions:
+        # Queried through its partition, a snapshot's plan names no other partition
+        sql = f"SELECT DOMAIN, COUNT(*) FROM {snapshot_source(cursor, 'mpd_data', snapshot)} " \
+              "WHERE SNAPSHOT = ? GROUP BY DOMAIN"
+        plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, (snapshot,)))
+        assert [name for _, name in partitions if name in plan] == [partition_name]
+
+        # Through the view, the other branches are skipped before they read a row:
+        # the view costs what the same query over a one-branch view does
+        view_steps = count_steps(conn, "SELECT ID FROM mpd_data WHERE SNAPSHOT = ?", (snapshot,))
+        branch = f"SELECT * FROM {partition_name} WHERE SNAPSHOT = {sql_string(snapshot)}"
+        branch_steps = count_steps(conn, f"SELECT ID FROM ({branch}) WHERE SNAPSHOT = ?", (snapshot,))
+        assert view_steps <= branch_steps + 1
+
+    # An unknown snapshot reads nothing at all (one tick covers opening the cursors)
+    assert count_steps(conn, "SELECT ID FROM mpd_data WHERE SNAPSHOT = ?", ("NO SUCH SNAPSHOT",)) <= 1
+    assert snapshot_source(cursor, "mpd_data", "NO SUCH SNAPSHOT") == "mpd_data"
+
+def test_person_summary_matches_the_loaded_records(dataset):
+    _, _, mpd_data, test_data = dataset
+    conn = sqlite3.connect(build(dataset, "summary.db"))
+    conn.row_factory = sqlite3.Row
+
+    roles = {}
+    for record in mpd_data:
+        roles.setdefault((record["SID"], record["SNAPSHOT"]), []).append(record)
+    tests = {}
+    for record in test_data:
+        tests.setdefault((record["SID"], record["SNAPSHOT"]), []).append(record)
+
+    summary = {(row["SID"], row["SNAPSHOT"]): row for row in conn.execute("SELECT * FROM person_summary")}
+    assert summary.keys() == roles.keys()
+
+    for person, person_roles in roles.items():
+        row = summary[person]
+        primary = min(person_roles, key=lambda record: (-record["FTE"], record["ID"]))
+        assert row["ROLE_COUNT"] == len(person_roles)
+        assert row["TOTAL_FTE"] == pytest.approx(sum(record["FTE"] for record in person_roles))
+        assert (row["PRIMARY_DOMAIN"], row["PRIMARY_FUNCTION"], row["CITY"], row["TOKENS"]) == \
+            (primary["DOMAIN"], primary["FUNCTION"], primary["CITY"], primary["TOKENS"])
+
+        person_tests = tests.get(person, [])
+        assert row["TEST_COUNT"] == len(person_tests)
+        assert row["LANGUAGE_COUNT"] == len({record["LANGUAGE"] for record in person_tests})
+        if person_tests:
+            assert row["BEST_LISTEN_SCORE"] == max(int(record["LISTEN_SCORE"]) for record in person_tests)
+            assert row["BEST_READ_SCORE"] == max(int(record["READ_SCORE"]) for record in person_tests)
+            assert row["HIGHEST_TEST_GROUP"] == max((record["TEST_GROUP"] for record in person_tests),
+                                                    key=GROUP_RANKS.get)
+        else:
+            assert row["BEST_LISTEN_SCORE"] is None and row["HIGHEST_TEST_GROUP"] is None
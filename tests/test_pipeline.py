@@ -0,0 +1,40 @@
+import json
+import random
+import sqlite3
+from validate_data import stage_json_files, validate_database
+from conftest import quietly
+
+# Several MPD batches, so test scores are drawn from more than one of them
+MPD_ROWS = 25000
+TEST_ROWS = 6000
+
+def test_pipeline_json_output_validates(tmp_path, monkeypatch, generate_data, seeded_random):
+    monkeypatch.chdir(tmp_path)
+    state = random.getstate()
+    files, test_count = quietly(generate_data.run_generation_pipeline, MPD_ROWS, TEST_ROWS, workers=2)
+    assert test_count == TEST_ROWS
+
+    with open(files[0]) as f:
+        mpd_data = json.load(f)
+    with open(files[1]) as f:
+        test_data = json.load(f)
+    assert len(mpd_data) == MPD_ROWS and len(test_data) == TEST_ROWS
+    assert [record["ID"] for record in test_data] == list(range(1, TEST_ROWS + 1))
+
+    # The MPD rows are the ones the sequential generator draws from the same state
+    random.setstate(state)
+    assert mpd_data == quietly(generate_data.generate_mpd_dataset, MPD_ROWS)
+
+    conn = quietly(stage_json_files, files[0], files[1], str(tmp_path / "staging.db"))
+    assert quietly(validate_database, conn) is True
+
+def test_pipeline_database_output_validates(tmp_path, generate_data, seeded_random):
+    db_file = str(tmp_path / "pipeline.db")
+    files, test_count = quietly(generate_data.run_generation_pipeline, MPD_ROWS, TEST_ROWS,
+                                db_file=db_file, workers=2)
+    assert files == [db_file] and test_count == TEST_ROWS
+
+    conn = sqlite3.connect(db_file)
+    assert conn.execute("SELECT COUNT(*) FROM mpd_data").fetchone()[0] == MPD_ROWS
+    assert conn.execute("SELECT COUNT(*) FROM test_scores").fetchone()[0] == TEST_ROWS
+    assert quietly(validate_database, conn) is True
@@ -0,0 +1,57 @@
+import os
+import sqlite3
+import pytest
+import json_to_sqlite
+from json_to_sqlite import build_path, publish_database
+from live_database import LiveDatabase
+from conftest import quietly
+
+def make_database(path, value, journal_mode="WAL"):
+    conn = sqlite3.connect(path)
+    conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+    conn.execute("CREATE TABLE t (VALUE INTEGER)")
+    conn.execute("INSERT INTO t VALUES (?)", (value,))
+    conn.commit()
+    conn.close()
+
+def test_swap_keeps_open_readers_on_the_old_file(tmp_path):
+    db_file = str(tmp_path / "live.db")
+    make_database(db_file, 1)
+    live = LiveDatabase(db_file)
+    old_reader = sqlite3.connect(db_file)
+    assert live.execute("SELECT VALUE FROM t").fetchone() == (1,)
+
+    build_file = build_path(db_file)
+    make_database(build_file, 2, journal_mode="DELETE")
+    quietly(publish_database, build_file, db_file)
+
+    assert not os.path.exists(build_file)
+    assert old_reader.execute("SELECT VALUE FROM t").fetchone() == (1,)
+    assert live.execute("SELECT VALUE FROM t").fetchone() == (2,)
+    assert sqlite3.connect(db_file).execute("PRAGMA journal_mode").fetchone() == ("wal",)
+
+def test_busy_checkpoint_aborts_the_swap(tmp_path, monkeypatch):
+    monkeypatch.setattr(json_to_sqlite, "CHECKPOINT_ATTEMPTS", 1)
+    monkeypatch.setattr(json_to_sqlite, "CHECKPOINT_RETRY_DELAY", 0)
+
+    db_file = str(tmp_path / "live.db")
+    make_database(db_file, 1)
+    # A reader pinned to an old snapshot keeps newer frames in the live WAL
+    reader = sqlite3.connect(db_file, isolation_level=None)
+    reader.execute("BEGIN")
+    reader.execute("SELECT VALUE FROM t").fetchall()
+    writer = sqlite3.connect(db_file)
+    writer.execute("UPDATE t SET VALUE = 3")
+    writer.commit()
+
+    build_file = build_path(db_file)
+    make_database(build_file, 2, journal_mode="DELETE")
+    with pytest.raises(RuntimeError):
+        quietly(publish_database, build_file, db_file)
+
+    assert os.path.exists(build_file)
+    assert writer.execute("SELECT VALUE FROM t").fetchone() == (3,)
+
+    reader.execute("COMMIT")
+    quietly(publish_database, build_file, db_file)
+    assert sqlite3.connect(db_file).execute("SELECT VALUE FROM t").fetchone() == (2,)
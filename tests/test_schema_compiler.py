@@ -0,0 +1,85 @@
+import random
+from collections import Counter
+import pytest
+from schema_compiler import load_schema, compile_schema, generate_from_schema
+from token_index import classify_complexity
+from conftest import quietly
+
+ROWS = 20000
+
+# Largest total variation distance allowed between two value distributions
+# of ROWS records: sampling noise alone stays well below it. Noise grows with
+# the number of values, so fields with more than SMALL_VOCABULARY values get
+# twice the allowance
+MAX_DISTANCE = 0.05
+SMALL_VOCABULARY = 20
+
+# Fields drawn from large vocabularies, compared by shape rather than value
+UNIQUE_FIELDS = {"ID", "SID"}
+
+@pytest.fixture(scope="module")
+def datasets(generate_data):
+    state = random.getstate()
+    random.seed(31)
+    baseline = quietly(generate_data.generate_mpd_dataset, ROWS)
+    random.setstate(state)
+    compiled = quietly(generate_from_schema, ROWS, rng=random.Random(31))
+    return baseline, compiled
+
+def distribution(values):
+    counts = Counter(values)
+    return {value: count / len(values) for value, count in counts.items()}
+
+def distance(first, second):
+    """Total variation distance between two value distributions"""
+    return sum(abs(first.get(value, 0) - second.get(value, 0)) for value in first.keys() | second.keys()) / 2
+
+def persons(data):
+    by_person = {}
+    for record in data:
+        by_person.setdefault((record["SID"], record["SNAPSHOT"]), []).append(record)
+    return by_person
+
+def test_same_columns_and_row_ids(datasets):
+    baseline, compiled = datasets
+    assert len(compiled) == ROWS
+    assert [record["ID"] for record in compiled] == list(range(1, ROWS + 1))
+    assert list(compiled[0]) == list(baseline[0])
+
+def test_column_distributions_match_the_baseline(datasets):
+    baseline, compiled = datasets
+    for column in baseline[0]:
+        if column in UNIQUE_FIELDS or column == "TOKENS":
+            continue
+        expected = distribution([record[column] for record in baseline])
+        actual = distribution([record[column] for record in compiled])
+        assert actual.keys() == expected.keys(), column
+        allowed = MAX_DISTANCE if len(expected) <= SMALL_VOCABULARY else 2 * MAX_DISTANCE
+        assert distance(expected, actual) < allowed, column
+
+def test_token_complexity_and_sid_shape_match_the_baseline(datasets):
+    baseline, compiled = datasets
+    assert distance(distribution([classify_complexity(record["TOKENS"]) for record in baseline]),
+                    distribution([classify_complexity(record["TOKENS"]) for record in compiled])) < MAX_DISTANCE
+    assert {(len(record["SID"]), record["SID"].isalnum()) for record in compiled} == \
+        {(len(record["SID"]), record["SID"].isalnum()) for record in baseline}
+
+def test_persons_match_the_baseline(datasets):
+    baseline, compiled = datasets
+    assert distance(distribution([len(roles) for roles in persons(baseline).values()]),
+                    distribution([len(roles) for roles in persons(compiled).values()])) < MAX_DISTANCE
+
+    for roles in persons(compiled).values():
+        assert sum(record["FTE"] for record in roles) == pytest.approx(1.0)
+        # Person-level fields are shared by all of a person's roles
+        for column in ["CITY", "STATE", "AFFILIATION_TYPE", "TOKENS"]:
+            assert len({record[column] for record in roles}) == 1, column
+        for record in roles:
+            assert record["DFP"] == f"{record['DOMAIN']}-{record['FUNCTION']}"
+
+def test_compiled_generator_is_deterministic_per_rng():
+    generate_batches, source = compile_schema(load_schema())
+    assert "def generate_batches" in source
+    first = [record for batch in generate_batches(3000, random.Random(5)) for record in batch]
+    again = [record for batch in generate_batches(3000, random.Random(5)) for record in batch]
+    assert first == again
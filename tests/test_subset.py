@@ -0,0 +1,138 @@
+import shutil
+import sqlite3
+import pytest
+from subset_database import create_subset, salt_offset
+from conftest import quietly, write_json, load_database
+
+FRACTION = 0.05
+
+@pytest.fixture(scope="module")
+def sources(tmp_path_factory, generate_data):
+    """The same dataset loaded in the plain and partitioned layouts"""
+    import random
+    state = random.getstate()
+    random.seed(4321)
+    mpd_data = quietly(generate_data.generate_mpd_dataset, 6000)
+    test_data = quietly(generate_data.generate_test_scores_dataset, mpd_data, 3000)
+    random.setstate(state)
+
+    # One person without a DOMAIN forms a stratum of their own with a NULL key
+    first = mpd_data[0]
+    for record in mpd_data:
+        if (record["SID"], record["SNAPSHOT"]) == (first["SID"], first["SNAPSHOT"]):
+            record["DOMAIN"] = None
+
+    directory = tmp_path_factory.mktemp("subset")
+    mpd_file = write_json(directory / "mpd.json", mpd_data)
+    test_file = write_json(directory / "tests.json", test_data)
+    monkeypatch = pytest.MonkeyPatch()
+    databases = {
+        "plain": load_database(monkeypatch, mpd_file, test_file, str(directory / "plain.db")),
+        "partitioned": load_database(monkeypatch, mpd_file, test_file, str(directory / "partitioned.db"),
+                                     "--partitioned"),
+    }
+    monkeypatch.undo()
+    return directory, databases
+
+def make_subset(sources, layout, name, salt="subset"):
+    directory, databases = sources
+    output_db = str(directory / name)
+    quietly(create_subset, databases[layout], output_db, FRACTION, salt)
+    return sqlite3.connect(output_db)
+
+def persons(conn):
+    return set(conn.execute("SELECT SID, SNAPSHOT FROM person_summary").fetchall())
+
+def test_every_stratum_gets_its_quota(sources):
+    subset = make_subset(sources, "plain", "quota.db")
+    subset.execute("ATTACH DATABASE ? AS src", (sources[1]["plain"],))
+
+    strata = subset.execute("""
+        SELECT s.SNAPSHOT, s.AFFILIATION_TYPE, s.PRIMARY_DOMAIN, s.SIZE,
+               (SELECT COUNT(*) FROM main.person_summary p
+                WHERE p.SNAPSHOT IS s.SNAPSHOT AND p.AFFILIATION_TYPE IS s.AFFILIATION_TYPE
+                  AND p.PRIMARY_DOMAIN IS s.PRIMARY_DOMAIN) AS KEPT,
+               MAX(1, CAST(ROUND(s.SIZE * ?) AS INTEGER)) AS QUOTA
+        FROM (SELECT SNAPSHOT, AFFILIATION_TYPE, PRIMARY_DOMAIN, COUNT(*) AS SIZE
+              FROM src.person_summary GROUP BY SNAPSHOT, AFFILIATION_TYPE, PRIMARY_DOMAIN) s
+    """, (FRACTION,)).fetchall()
+
+    assert any(primary_domain is None for _, _, primary_domain, _, _, _ in strata)
+    assert any(round(size * FRACTION) == 0 for _, _, _, size, _, _ in strata)
+    for snapshot, affiliation_type, primary_domain, size, kept, quota in strata:
+        assert kept == quota, (snapshot, affiliation_type, primary_domain, size)
+
+def test_selected_persons_keep_all_their_rows(sources):
+    subset = make_subset(sources, "plain", "rows.db")
+    subset.execute("ATTACH DATABASE ? AS src", (sources[1]["plain"],))
+    subset.execute("CREATE TEMP TABLE picked AS SELECT SID, SNAPSHOT FROM main.person_summary")
+
+    for table_name in ["mpd_data", "test_scores"]:
+        expected = subset.execute(f"""
+            SELECT COUNT(*) FROM src.{table_name} t
+            WHERE EXISTS (SELECT 1 FROM temp.picked p WHERE p.SID = t.SID AND p.SNAPSHOT = t.SNAPSHOT)
+        """).fetchone()[0]
+        assert subset.execute(f"SELECT COUNT(*) FROM main.{table_name}").fetchone()[0] == expected
+
+    assert subset.execute("""
+        SELECT COUNT(*) FROM main.test_scores t
+        WHERE NOT EXISTS (SELECT 1 FROM main.mpd_data m WHERE m.SID = t.SID AND m.SNAPSHOT = t.SNAPSHOT)
+    """).fetchone()[0] == 0
+
+def test_subset_is_reproducible_across_runs_and_layouts(sources):
+    first = make_subset(sources, "plain", "first.db")
+    again = make_subset(sources, "plain", "again.db")
+    partitioned = make_subset(sources, "partitioned", "partitioned_subset.db")
+    salted = make_subset(sources, "plain", "salted.db", salt="other")
+
+    rows = "SELECT * FROM mpd_data ORDER BY ID"
+    assert persons(first) == persons(again) == persons(partitioned)
+    assert first.execute(rows).fetchall() == partitioned.execute(rows).fetchall()
+    assert persons(salted) != persons(first)
+
+def test_strata_keep_the_persons_after_the_salt_offset(sources):
+    subset = make_subset(sources, "plain", "offset.db", salt="offset")
+    source = sqlite3.connect(sources[1]["plain"])
+    offset = salt_offset("offset")
+
+    strata = {}
+    for row in source.execute("""
+        SELECT SNAPSHOT, AFFILIATION_TYPE, PRIMARY_DOMAIN, SAMPLE_HASH, SID FROM person_summary
+        ORDER BY SAMPLE_HASH, SID
+    """):
+        strata.setdefault(row[:3], []).append(row[3:])
+
+    expected = set()
+    for (snapshot, _, _), members in strata.items():
+        # Hash order starting at the offset, wrapping around to the lowest hashes
+        members = [member for member in members if member[0] >= offset] + \
+                  [member for member in members if member[0] < offset]
+        quota = max(1, round(len(members) * FRACTION))
+        expected |= {(sid, snapshot) for _, sid in members[:quota]}
+    assert persons(subset) == expected
+
+    plan = source.execute("""
+        EXPLAIN QUERY PLAN
+        SELECT SID, SNAPSHOT FROM person_summary
+        WHERE SNAPSHOT IS ? AND AFFILIATION_TYPE IS ? AND PRIMARY_DOMAIN IS ? AND SAMPLE_HASH >= ?
+        ORDER BY SAMPLE_HASH, SID LIMIT ?
+    """, ("FALL 2024", None, None, offset, 5)).fetchall()
+    assert [row[3] for row in plan] == [
+        "SEARCH person_summary USING COVERING INDEX idx_person_sample "
+        "(SNAPSHOT=? AND AFFILIATION_TYPE=? AND PRIMARY_DOMAIN=? AND SAMPLE_HASH>?)"
+    ]
+
+def test_sources_without_sample_hash_give_the_same_subset(sources):
+    directory, databases = sources
+    older = str(directory / "older.db")
+    shutil.copy(databases["plain"], older)
+    conn = sqlite3.connect(older)
+    conn.execute("DROP INDEX idx_person_sample")
+    conn.execute("ALTER TABLE person_summary DROP COLUMN SAMPLE_HASH")
+    conn.commit()
+    conn.close()
+
+    databases = dict(databases, older=older)
+    current = make_subset(sources, "plain", "current.db")
+    hashed_here = make_subset((directory, databases), "older", "hashed_here.db")
+    assert persons(hashed_here) == persons(current)
@@ -0,0 +1,97 @@
+import sqlite3
+import pytest
+from token_index import (TOKENS, build_token_index, create_token_index_table, load_token_index, index_keys,
+                         parse_token_expression, complexity_counts, count_rows, row_ids, rows_with_all)
+from conftest import quietly, write_json, load_database
+
+# The README token-analysis query the COMPLEXITY:* bitmaps must agree with
+COMPLEXITY_SQL = """
+    SELECT
+        CASE
+            WHEN TOKENS LIKE '%(%' THEN 'COMPLEX'
+            WHEN TOKENS LIKE '%&%&%' OR TOKENS LIKE '%|%|%' THEN 'MEDIUM'
+            ELSE 'SIMPLE'
+        END AS complexity,
+        COUNT(*)
+    FROM mpd_data {where}
+    GROUP BY complexity
+"""
+
+@pytest.fixture(scope="module")
+def databases(tmp_path_factory, generate_data):
+    """A small dataset loaded plain and partitioned, with the loader's token bitmaps"""
+    import random
+    state = random.getstate()
+    random.seed(2024)
+    mpd_data = quietly(generate_data.generate_mpd_dataset, 3000)
+    test_data = quietly(generate_data.generate_test_scores_dataset, mpd_data, 500)
+    random.setstate(state)
+
+    directory = tmp_path_factory.mktemp("token_index")
+    mpd_file = write_json(directory / "mpd.json", mpd_data)
+    test_file = write_json(directory / "tests.json", test_data)
+    monkeypatch = pytest.MonkeyPatch()
+    databases = {
+        "plain": load_database(monkeypatch, mpd_file, test_file, str(directory / "plain.db")),
+        "partitioned": load_database(monkeypatch, mpd_file, test_file, str(directory / "partitioned.db"),
+                                     "--partitioned"),
+    }
+    monkeypatch.undo()
+    return databases
+
+def test_parse_token_expression():
+    assert parse_token_expression("AAA") == ({"AAA"}, set(), set())
+    # Every token directly inside a group with an OR counts as a disjunction operand
+    assert parse_token_expression("AAA&BBB|CCC") == ({"AAA", "BBB", "CCC"}, {"AAA", "BBB", "CCC"}, {"AND", "OR"})
+    assert parse_token_expression("AAA&(BBB|CCC)") == ({"AAA", "BBB", "CCC"}, {"BBB", "CCC"}, {"AND", "OR", "NESTED"})
+
+def test_index_keys():
+    assert sorted(index_keys("AAA|BBB")) == ["AAA", "BBB", "COMPLEXITY:SIMPLE", "OR:AAA", "OR:BBB", "SHAPE:OR"]
+    assert "COMPLEXITY:MEDIUM" in index_keys("AAA&BBB&CCC")
+    assert "COMPLEXITY:COMPLEX" in index_keys("(AAA&BBB)|CCC")
+
+@pytest.mark.parametrize("layout", ["plain", "partitioned"])
+def test_token_bitmaps_match_like(databases, layout):
+    cursor = sqlite3.connect(databases[layout]).cursor()
+    index = load_token_index(cursor, "mpd_data")
+
+    for token in TOKENS:
+        cursor.execute("SELECT ID FROM mpd_data WHERE TOKENS LIKE ?", (f"%{token}%",))
+        expected = sorted(row[0] for row in cursor.fetchall())
+        assert count_rows(index.get(token, 0)) == len(expected), token
+        assert list(row_ids(index.get(token, 0))) == expected, token
+
+    cursor.execute("SELECT COUNT(*) FROM mpd_data WHERE TOKENS LIKE '%AAA%'")
+    expected_count = cursor.fetchone()[0]
+    cursor.execute("SELECT SUM(ROW_COUNT) FROM token_bitmaps WHERE BITMAP_KEY = 'AAA' AND TABLE_NAME LIKE 'mpd_data%'")
+    assert cursor.fetchone()[0] == expected_count
+
+@pytest.mark.parametrize("layout", ["plain", "partitioned"])
+def test_complexity_counts_match_the_readme_query(databases, layout):
+    cursor = sqlite3.connect(databases[layout]).cursor()
+    index = load_token_index(cursor, "mpd_data")
+
+    cursor.execute(COMPLEXITY_SQL.format(where=""))
+    expected = dict(cursor.fetchall())
+    assert {bucket: count for bucket, count in complexity_counts(index).items() if count} == expected
+
+    cursor.execute(COMPLEXITY_SQL.format(where="WHERE TOKENS LIKE '%AAA%' AND TOKENS LIKE '%BBB%'"))
+    expected = dict(cursor.fetchall())
+    within = rows_with_all(index, ["AAA", "BBB"])
+    assert {bucket: count for bucket, count in complexity_counts(index, within).items() if count} == expected
+
+def test_build_token_index_on_a_table(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "tokens.db"))
+    cursor = conn.cursor()
+    cursor.execute("CREATE TABLE mpd_data (ID INTEGER PRIMARY KEY, TOKENS VARCHAR(500))")
+    rows = [(1, "AAA"), (2, "AAA|BBB"), (3, "(AAA|BBB)&CCC"), (9, "BBB&CCC&DDD"), (10, None)]
+    cursor.executemany("INSERT INTO mpd_data VALUES (?, ?)", rows)
+    create_token_index_table(cursor)
+
+    assert quietly(build_token_index, cursor, "mpd_data") == len(set().union(
+        *(index_keys(expression or "") for _, expression in rows)))
+    index = load_token_index(cursor, "mpd_data")
+    assert list(row_ids(index["AAA"])) == [1, 2, 3]
+    assert list(row_ids(index["OR:BBB"])) == [2, 3]
+    assert list(row_ids(index["SHAPE:NESTED"])) == [3]
+    assert complexity_counts(index) == {"SIMPLE": 3, "MEDIUM": 1, "COMPLEX": 1}
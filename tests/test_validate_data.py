@@ -0,0 +1,43 @@
+import pytest
+from validate_data import stage_json_files, build_rules, run_rule, validate_database
+from conftest import quietly, write_json
+
+PRESENT_RULE = "Test SID/SNAPSHOT/SNAPSHOT_MONTH are present"
+MATCH_RULE = "Test SID/SNAPSHOT/SNAPSHOT_MONTH match MPD"
+
+@pytest.fixture
+def staged(tmp_path, generate_data, seeded_random):
+    """Staging database over a generated dataset plus one test row per broken key"""
+    mpd_data = quietly(generate_data.generate_mpd_dataset, 500)
+    test_data = quietly(generate_data.generate_test_scores_dataset, mpd_data, 200)
+
+    def broken(row_id, **changes):
+        return dict(test_data[0], ID=row_id, **changes)
+
+    test_data += [
+        broken(900001, SID=None),
+        broken(900002, SNAPSHOT_MONTH=None),
+        broken(900003, SID="NOSUCH1"),
+        broken(900004, SNAPSHOT_MONTH="1999-01-31"),
+    ]
+    conn = quietly(stage_json_files, write_json(tmp_path / "mpd.json", mpd_data),
+                   write_json(tmp_path / "tests.json", test_data), str(tmp_path / "staging.db"))
+    yield conn
+    conn.close()
+
+def rule_result(conn, name):
+    rules = dict(build_rules(conn.cursor()))
+    return run_rule(conn.cursor(), rules[name], sample_size=10)
+
+def test_null_keys_are_reported_as_missing(staged):
+    violations, samples = rule_result(staged, PRESENT_RULE)
+    assert violations == 2
+    assert sorted(samples) == [900001, 900002]
+
+def test_unmatched_keys_are_reported_and_null_keys_are_not_double_counted(staged):
+    violations, samples = rule_result(staged, MATCH_RULE)
+    assert violations == 2
+    assert sorted(samples) == [900003, 900004]
+
+def test_broken_keys_fail_validation(staged):
+    assert quietly(validate_database, staged) is False
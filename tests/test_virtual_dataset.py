@@ -0,0 +1,62 @@
+import os
+import random
+import pytest
+from virtual_dataset import CounterRandom, VirtualDataset
+from conftest import quietly
+
+def person_fte(records):
+    totals = {}
+    for record in records:
+        totals[record["SID"]] = totals.get(record["SID"], 0) + record["FTE"]
+    return totals
+
+def test_counter_random_streams_depend_only_on_their_key():
+    first = CounterRandom(7, "test_scores")
+    first.random()
+    again = CounterRandom(7, "test_scores")
+    again.random()
+    assert [first.randint(1, 100) for _ in range(50)] == [again.randint(1, 100) for _ in range(50)]
+    assert CounterRandom(7, "other").random() != CounterRandom(7, "test_scores").random()
+
+def test_random_access_matches_iteration():
+    dataset = VirtualDataset(3000, seed=3)
+    rows = list(dataset)
+    assert len(rows) == len(dataset) == 3000
+    assert [record["ID"] for record in rows] == list(range(1, 3001))
+    assert dataset[:] == rows
+    assert [dataset[index] for index in (0, 1023, 1024, 2999, -1)] == [rows[0], rows[1023], rows[1024],
+                                                                      rows[2999], rows[-1]]
+    assert list(dataset.iter_rows(1000, 2100, 7)) == rows[1000:2100:7]
+
+@pytest.mark.parametrize("seed", range(20))
+def test_last_person_fte_sums_to_one(seed):
+    dataset = VirtualDataset(1000, seed)
+    for rows in (dataset[:], list(dataset)):
+        assert all(total == pytest.approx(1.0) for total in person_fte(rows).values())
+
+def test_rows_before_the_cut_are_shared_with_larger_datasets():
+    small = VirtualDataset(1000, seed=11)[:]
+    large = VirtualDataset(5000, seed=11)[:1000]
+    last_sid = small[-1]["SID"]
+    assert [record for record in small if record["SID"] != last_sid] == \
+        [record for record in large if record["SID"] != last_sid]
+    assert [{**record, "FTE": None} for record in small] == [{**record, "FTE": None} for record in large]
+
+def test_seeded_samples_are_reproducible(tmp_path, monkeypatch, generate_data):
+    monkeypatch.chdir(tmp_path)
+
+    def sample_files():
+        random.seed()  # the global random state must not matter
+        quietly(generate_data.generate_samples, 1000, 100, seed=42)
+        files = {}
+        for name in ("mpd_sample_1000.json", "test_scores_sample_100.json"):
+            with open(name, 'rb') as f:
+                files[name] = f.read()
+            os.remove(name)
+        return files
+
+    state = random.getstate()
+    try:
+        assert sample_files() == sample_files()
+    finally:
+        random.setstate(state)
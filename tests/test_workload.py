@@ -0,0 +1,114 @@
+import itertools
+import sqlite3
+import pytest
+import workload
+from token_index import TOKENS, evaluate_expression
+from workload import QUERY_MIX, build_access_rows, create_access_table, snapshot_queries, viewer_parameters
+from conftest import quietly, write_json, load_database
+
+EXPRESSIONS = [
+    "AAA",
+    "AAA&BBB",
+    "AAA|BBB",
+    "AAA|BBB&CCC",
+    "AAA&BBB|CCC",
+    "(AAA|BBB)&CCC",
+    "AAA&(BBB|CCC)&(DDD|XXX)",
+    "(AAA&BBB&CCC)|(DDD&XXX)",
+    "AAA&BBB&(CCC|DDD|XXX|YYY)",
+]
+
+def python_expression(expression):
+    """The same expression in Python syntax, where 'and' also binds tighter than 'or'"""
+    return expression.replace("&", " and ").replace("|", " or ")
+
+@pytest.mark.parametrize("expression", EXPRESSIONS)
+def test_boolean_evaluation_matches_python(expression):
+    for held in itertools.product([False, True], repeat=len(TOKENS)):
+        values = dict(zip(TOKENS, held))
+        assert evaluate_expression(expression, values) == eval(python_expression(expression), {}, values)
+
+def test_and_binds_tighter_than_or():
+    values = {"AAA": True, "BBB": False, "CCC": False}
+    assert evaluate_expression("AAA|BBB&CCC", values) is True
+    assert evaluate_expression("(AAA|BBB)&CCC", values) is False
+
+@pytest.mark.parametrize("expression", EXPRESSIONS)
+def test_bitmask_evaluation_answers_every_token_set(expression):
+    # Bit s of a token's mask is set when token set s holds the token
+    token_sets = range(1 << len(TOKENS))
+    masks = {token: sum(1 << s for s in token_sets if s >> bit & 1) for bit, token in enumerate(TOKENS)}
+
+    visible = evaluate_expression(expression, masks)
+
+    for s in token_sets:
+        values = {token: bool(s >> bit & 1) for bit, token in enumerate(TOKENS)}
+        assert bool(visible >> s & 1) == evaluate_expression(expression, values)
+
+# The README queries the summary-table rewrites in QUERY_MIX must agree with
+FULL_TABLE_QUERIES = {
+    "token_complexity": f"""
+        SELECT
+            CASE
+                WHEN m.TOKENS LIKE '%(%' THEN 'COMPLEX'
+                WHEN m.TOKENS LIKE '%&%&%' OR m.TOKENS LIKE '%|%|%' THEN 'MEDIUM'
+                ELSE 'SIMPLE'
+            END AS complexity,
+            COUNT(*) AS count
+        FROM mpd_data m {workload.visible("m")}
+        GROUP BY complexity
+    """,
+    "coverage_by_snapshot": f"""
+        SELECT
+            m.SNAPSHOT,
+            COUNT(DISTINCT m.SID) AS total_personnel,
+            COUNT(DISTINCT t.SID) AS personnel_with_tests
+        FROM mpd_data m {workload.visible("m", "a")}
+        LEFT JOIN test_scores t ON m.SID = t.SID AND m.SNAPSHOT = t.SNAPSHOT
+        GROUP BY m.SNAPSHOT ORDER BY m.SNAPSHOT
+    """,
+}
+
+@pytest.fixture(scope="module")
+def layouts(tmp_path_factory, generate_data):
+    """The same temporal dataset loaded in every layout that changes where a snapshot lives"""
+    import random
+    state = random.getstate()
+    random.seed(2468)
+    mpd_data = quietly(generate_data.generate_temporal_dataset, 3000, churn=0.2, change_rate=0.3)
+    test_data = quietly(generate_data.generate_test_scores_dataset, mpd_data, 1500)
+    random.setstate(state)
+
+    directory = tmp_path_factory.mktemp("workload")
+    mpd_file = write_json(directory / "mpd.json", mpd_data)
+    test_file = write_json(directory / "tests.json", test_data)
+    monkeypatch = pytest.MonkeyPatch()
+    databases = {
+        layout: load_database(monkeypatch, mpd_file, test_file, str(directory / f"{layout}.db"), *options)
+        for layout, options in [("plain", []), ("partitioned", ["--partitioned"]), ("delta", ["--delta"])]
+    }
+    monkeypatch.undo()
+    return databases
+
+@pytest.mark.parametrize("layout", ["plain", "partitioned", "delta"])
+def test_query_mix_matches_full_table_queries(layouts, layout):
+    conn = sqlite3.connect(layouts[layout])
+    create_access_table(conn, build_access_rows(conn))
+    snapshots = [row[0] for row in conn.execute("SELECT DISTINCT SNAPSHOT FROM person_summary")]
+    queries = snapshot_queries(conn, snapshots)
+    full_table = {name: sql.format(mpd_data="mpd_data", test_scores="test_scores") for name, _, sql in QUERY_MIX}
+    full_table.update(FULL_TABLE_QUERIES)
+
+    if layout != "plain":
+        assert queries[snapshots[0]]["domain_counts"] != full_table["domain_counts"]
+
+    cities = [row[0] for row in conn.execute("SELECT CITY FROM mpd_data GROUP BY CITY ORDER BY COUNT(*) DESC LIMIT 2")]
+    for token_set in [0b1111111, 0b0000101, 0b1010010]:
+        low, high = viewer_parameters(token_set)
+        for snapshot in snapshots:
+            sid = conn.execute("SELECT MIN(SID) FROM person_summary WHERE SNAPSHOT = ?", (snapshot,)).fetchone()[0]
+            values = {"low": low, "high": high, "sid": sid, "person_snapshot": snapshot,
+                      "snapshot": snapshot, "city": cities[token_set % 2]}
+            for name, sql in queries[snapshot].items():
+                expected = sorted(conn.execute(full_table[name], values).fetchall(), key=repr)
+                assert sorted(conn.execute(sql, values).fetchall(), key=repr) == expected, (snapshot, name)
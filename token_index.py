@@ -0,0 +1,337 @@
+import sqlite3
+import sys
+import os
+import zlib
+
+# ABAC tokens - must match the generator's token set
+TOKENS = ["AAA", "BBB", "CCC", "DDD", "XXX", "YYY", "ZZZ"]
+
+# Tables that carry a TOKENS column
+INDEXED_TABLES = ["mpd_data", "test_scores"]
+
+def create_token_index_table(cursor):
+    """Create the table holding one compressed row-id bitmap per key"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS token_bitmaps (
+            TABLE_NAME VARCHAR(128),
+            BITMAP_KEY VARCHAR(128),
+            ROW_COUNT INTEGER,
+            BITMAP BLOB,
+            PRIMARY KEY (TABLE_NAME, BITMAP_KEY)
+        )
+    ''')
+
+def classify_complexity(expression):
+    """Return the README complexity bucket (SIMPLE, MEDIUM, COMPLEX) for an expression"""
+    # Mirrors the README token-analysis query so bitmap counts match it exactly
+    if '(' in expression:
+        return "COMPLEX"
+    if expression.count('&') >= 2 or expression.count('|') >= 2:
+        return "MEDIUM"
+    return "SIMPLE"
+
+def parse_token_expression(expression):
+    """
+    Split an ABAC expression into the keys it should be indexed under.
+
+    Returns the set of tokens used, the set of tokens that appear directly
+    as an operand of an OR, and the operator shapes (AND, OR, NESTED).
+    """
+    used = set()
+    in_disjunction = set()
+    shapes = set()
+
+    # Each group holds the tokens directly inside it and whether it contains '|'
+    groups = [[[], False]]
+    current = ""
+
+    def flush_token(token):
+        if token:
+            used.add(token)
+            groups[-1][0].append(token)
+
+    def close_group(group):
+        if group[1]:
+            in_disjunction.update(group[0])
+
+    for char in expression:
+        if char.isalpha():
+            current += char
+            continue
+
+        flush_token(current)
+        current = ""
+
+        if char == '(':
+            shapes.add("NESTED")
+            groups.append([[], False])
+        elif char == ')':
+            close_group(groups.pop())
+        elif char == '&':
+            shapes.add("AND")
+        elif char == '|':
+            shapes.add("OR")
+            groups[-1][1] = True
+
+    flush_token(current)
+    while groups:
+        close_group(groups.pop())
+
+    return used, in_disjunction, shapes
+
+def evaluate_expression(expression, values):
+    """
+    Evaluate an ABAC expression with values[token] combined by & and |
+    (& binds tighter than |). With booleans this answers whether one viewer
+    may see the row; with int bitmasks it answers for many token sets at once.
+    """
+    parts = []
+    current = ""
+    for char in expression:
+        if char.isalpha():
+            current += char
+            continue
+        if current:
+            parts.append(current)
+            current = ""
+        if char in "&|()":
+            parts.append(char)
+    if current:
+        parts.append(current)
+
+    position = 0
+
+    def parse_or():
+        nonlocal position
+        result = parse_and()
+        while position < len(parts) and parts[position] == '|':
+            position += 1
+            result = result | parse_and()
+        return result
+
+    def parse_and():
+        nonlocal position
+        result = parse_operand()
+        while position < len(parts) and parts[position] == '&':
+            position += 1
+            result = result & parse_operand()
+        return result
+
+    def parse_operand():
+        nonlocal position
+        part = parts[position]
+        position += 1
+        if part == '(':
+            result = parse_or()
+            position += 1  # ')'
+            return result
+        return values[part]
+
+    return parse_or()
+
+def index_keys(expression):
+    """Return every bitmap key a row with this TOKENS expression belongs to"""
+    used, in_disjunction, shapes = parse_token_expression(expression)
+
+    keys = list(used)
+    keys.extend(f"OR:{token}" for token in in_disjunction)
+    keys.extend(f"SHAPE:{shape}" for shape in shapes)
+    keys.append(f"COMPLEXITY:{classify_complexity(expression)}")
+    return keys
+
+def build_token_index(cursor, table_name, batch_size=50000):
+    """Scan a table once and store one zlib-compressed bitmap per key, indexed by row ID"""
+    print(f"Building token index for {table_name}...")
+
+    cursor.execute(f"SELECT MAX(ID) FROM {table_name}")
+    max_id = cursor.fetchone()[0] or 0
+    bitmap_size = (max_id >> 3) + 1
+
+    bitmaps = {}
+    row_counts = {}
+
+    read_cursor = cursor.connection.cursor()
+    read_cursor.execute(f"SELECT ID, TOKENS FROM {table_name}")
+
+    rows_scanned = 0
+    while True:
+        rows = read_cursor.fetchmany(batch_size)
+        if not rows:
+            break
+
+        for row_id, expression in rows:
+            byte_index = row_id >> 3
+            bit = 1 << (row_id & 7)
+            for key in index_keys(expression or ""):
+                bitmap = bitmaps.get(key)
+                if bitmap is None:
+                    bitmap = bitmaps[key] = bytearray(bitmap_size)
+                    row_counts[key] = 0
+                bitmap[byte_index] |= bit
+                row_counts[key] += 1
+
+        rows_scanned += len(rows)
+
+    cursor.execute("DELETE FROM token_bitmaps WHERE TABLE_NAME = ?", (table_name,))
+    cursor.executemany(
+        "INSERT INTO token_bitmaps (TABLE_NAME, BITMAP_KEY, ROW_COUNT, BITMAP) VALUES (?, ?, ?, ?)",
+        [(table_name, key, row_counts[key], zlib.compress(bytes(bitmap)))
+         for key, bitmap in bitmaps.items()]
+    )
+
+    print(f"✅ Indexed {rows_scanned:,} {table_name} rows into {len(bitmaps)} bitmaps")
+    return len(bitmaps)
+
+def get_index_partitions(cursor, table_name):
+    """Partition tables of a snapshot-partitioned logical table (empty for other layouts)"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'snapshot_partitions'")
+    if cursor.fetchone() is None:
+        return []
+    cursor.execute("SELECT PARTITION_NAME FROM snapshot_partitions WHERE TABLE_NAME = ?", (table_name,))
+    return [row[0] for row in cursor.fetchall()]
+
+def create_token_index(cursor):
+    """
+    Build the token bitmap index for every table with a TOKENS column. A
+    partitioned table gets one set of bitmaps per partition, so dropping a
+    snapshot deletes its bitmaps instead of rewriting everyone else's.
+    """
+    create_token_index_table(cursor)
+    for table_name in INDEXED_TABLES:
+        partitions = get_index_partitions(cursor, table_name)
+        if partitions:
+            cursor.execute("DELETE FROM token_bitmaps WHERE TABLE_NAME = ?", (table_name,))
+        for source_name in partitions or [table_name]:
+            build_token_index(cursor, source_name)
+
+def load_token_index(cursor, table_name):
+    """
+    Load all bitmaps for a table as Python integers (bit N set = row ID N
+    matches), OR-ing together the bitmaps of its partitions if it has any
+    """
+    source_names = [table_name] + get_index_partitions(cursor, table_name)
+    cursor.execute(
+        f"SELECT BITMAP_KEY, BITMAP FROM token_bitmaps WHERE TABLE_NAME IN ({', '.join('?' * len(source_names))})",
+        source_names
+    )
+    index = {}
+    for key, blob in cursor.fetchall():
+        index[key] = index.get(key, 0) | int.from_bytes(zlib.decompress(blob), 'little')
+    return index
+
+def remove_rows_from_token_index(cursor, table_name, removed_ids):
+    """
+    Clear the given row IDs from every bitmap of a table. This decompresses
+    and rewrites all of the table's bitmaps, so it costs O(rows in the table)
+    however few IDs are removed.
+    """
+    removed = bytearray((max(removed_ids, default=0) >> 3) + 1)
+    for row_id in removed_ids:
+        removed[row_id >> 3] |= 1 << (row_id & 7)
+    removed_mask = int.from_bytes(removed, 'little')
+
+    cursor.execute("SELECT BITMAP_KEY, BITMAP FROM token_bitmaps WHERE TABLE_NAME = ?", (table_name,))
+    updates = []
+    for key, blob in cursor.fetchall():
+        bitmap = int.from_bytes(zlib.decompress(blob), 'little') & ~removed_mask
+        data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+        updates.append((count_rows(bitmap), zlib.compress(data), table_name, key))
+
+    cursor.executemany(
+        "UPDATE token_bitmaps SET ROW_COUNT = ?, BITMAP = ? WHERE TABLE_NAME = ? AND BITMAP_KEY = ?",
+        updates
+    )
+
+def rows_with_all(index, keys):
+    """Bitmap of rows present under every key (e.g. ["AAA", "OR:DDD"])"""
+    result = None
+    for key in keys:
+        bitmap = index.get(key, 0)
+        result = bitmap if result is None else result & bitmap
+    return result or 0
+
+def rows_with_any(index, keys):
+    """Bitmap of rows present under at least one key"""
+    result = 0
+    for key in keys:
+        result |= index.get(key, 0)
+    return result
+
+def count_rows(bitmap):
+    """Number of rows in a bitmap"""
+    return bitmap.bit_count()
+
+def row_ids(bitmap):
+    """Yield the row IDs set in a bitmap in ascending order"""
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    for byte_index, byte in enumerate(data):
+        while byte:
+            low_bit = byte & -byte
+            yield (byte_index << 3) + low_bit.bit_length() - 1
+            byte ^= low_bit
+
+def complexity_counts(index, within=None):
+    """Count rows per complexity bucket, optionally restricted to another bitmap"""
+    counts = {}
+    for bucket in ["SIMPLE", "MEDIUM", "COMPLEX"]:
+        bitmap = index.get(f"COMPLEXITY:{bucket}", 0)
+        if within is not None:
+            bitmap &= within
+        counts[bucket] = count_rows(bitmap)
+    return counts
+
+def print_token_index_summary(cursor, table_name):
+    """Print token containment and complexity counts straight from the bitmaps"""
+    index = load_token_index(cursor, table_name)
+
+    print(f"\n🔎 Token Index Summary ({table_name}):")
+    for token in TOKENS:
+        contains = count_rows(index.get(token, 0))
+        in_or = count_rows(index.get(f"OR:{token}", 0))
+        print(f"  {token}: {contains:,} rows ({in_or:,} in a disjunction)")
+
+    print("  Complexity:")
+    for bucket, count in complexity_counts(index).items():
+        print(f"    {bucket}: {count:,} rows")
+
+def main():
+    db_file = "development.db"
+    if len(sys.argv) > 1:
+        db_file = sys.argv[1]
+
+    if not os.path.exists(db_file):
+        print(f"❌ Error: Database '{db_file}' not found")
+        return 1
+
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+
+    if len(sys.argv) > 2 and sys.argv[2] == '--rebuild':
+        create_token_index(cursor)
+        conn.commit()
+
+    for table_name in INDEXED_TABLES:
+        print_token_index_summary(cursor, table_name)
+
+    conn.close()
+    return 0
+
+def show_usage():
+    """Show usage instructions"""
+    print("Usage:")
+    print("  python token_index.py [database_file] [--rebuild]")
+    print("")
+    print("Examples:")
+    print("  python token_index.py")
+    print("    Prints token and complexity counts for development.db from the bitmap index")
+    print("")
+    print("  python token_index.py my_database.db --rebuild")
+    print("    Rebuilds the bitmap index before printing counts")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ['-h', '--help', 'help']:
+        show_usage()
+        sys.exit(0)
+
+    exit_code = main()
+    sys.exit(exit_code)
@@ -0,0 +1,251 @@
+import sqlite3
+import sys
+import os
+import tempfile
+from json_to_sqlite import create_mpd_table, create_test_scores_table, iter_json_records
+
+US_COUNTRY = "UNITED STATES OF AMERICA"
+
+# Tolerance for floating point FTE comparisons
+FTE_EPSILON = 1e-6
+
+def get_text_columns(cursor, table_name):
+    """Return the names of non-numeric columns in a table or view"""
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    columns = []
+    for _, name, column_type, *_ in cursor.fetchall():
+        if not column_type:
+            # Computed view columns (e.g. the delta layout) have no declared
+            # type, so use the type of a stored value
+            cursor.execute(f"SELECT typeof({name}) FROM {table_name} WHERE {name} IS NOT NULL LIMIT 1")
+            row = cursor.fetchone()
+            column_type = row[0] if row else ""
+        if column_type.upper() not in ("INTEGER", "REAL"):
+            columns.append(name)
+    return columns
+
+def get_columns(cursor, table_name):
+    """Return all column names of a table in schema order"""
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    return [row[1] for row in cursor.fetchall()]
+
+def load_records_in_batches(cursor, table_name, filename, batch_size=50000):
+    """Stream a JSON or NDJSON file into a table with batched executemany"""
+    columns = get_columns(cursor, table_name)
+    insert_query = (f"INSERT INTO {table_name} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' for _ in columns)})")
+
+    batch = []
+    records_loaded = 0
+    for record in iter_json_records(filename):
+        batch.append(tuple(record.get(column) for column in columns))
+        if len(batch) >= batch_size:
+            cursor.executemany(insert_query, batch)
+            records_loaded += len(batch)
+            batch = []
+            print(f"  Loaded {records_loaded:,} {table_name} records...")
+
+    if batch:
+        cursor.executemany(insert_query, batch)
+        records_loaded += len(batch)
+
+    print(f"✅ Loaded {records_loaded:,} records from {filename}")
+    return records_loaded
+
+def stage_json_files(mpd_file, test_file, staging_db):
+    """Load JSON/NDJSON inputs into a scratch SQLite database so rules run as SQL"""
+    conn = sqlite3.connect(staging_db)
+    cursor = conn.cursor()
+
+    # Scratch database - durability is irrelevant
+    cursor.execute("PRAGMA journal_mode = OFF")
+    cursor.execute("PRAGMA synchronous = OFF")
+
+    create_mpd_table(cursor)
+    create_test_scores_table(cursor)
+    load_records_in_batches(cursor, "mpd_data", mpd_file)
+    load_records_in_batches(cursor, "test_scores", test_file)
+
+    # Same key index the loader creates, for the test -> MPD match probe
+    cursor.execute("CREATE INDEX idx_mpd_sid_snapshot ON mpd_data(SID, SNAPSHOT)")
+    conn.commit()
+    return conn
+
+def build_rules(cursor):
+    """
+    Return (name, sql) pairs. Each query selects one identifying value per
+    violation, so the report can show a count and a few samples.
+    """
+    capital_checks = {}
+    for table_name in ["mpd_data", "test_scores"]:
+        columns = get_text_columns(cursor, table_name)
+        capital_checks[table_name] = " OR ".join(
+            f"{column} <> UPPER({column})" for column in columns
+        )
+
+    return [
+        ("MPD values are capitalized",
+         f"SELECT ID FROM mpd_data WHERE {capital_checks['mpd_data']}"),
+
+        ("Test score values are capitalized",
+         f"SELECT ID FROM test_scores WHERE {capital_checks['test_scores']}"),
+
+        ("STATE is blank exactly when COUNTRY is non-US",
+         f"""SELECT ID FROM mpd_data
+             WHERE (COUNTRY = '{US_COUNTRY}') <> (COALESCE(STATE, '') <> '')
+                OR (COUNTRY = '{US_COUNTRY}' AND LENGTH(STATE) <> 2)"""),
+
+        ("FTE is in 0.1 steps between 0.1 and 1.0",
+         f"""SELECT ID FROM mpd_data
+             WHERE FTE IS NULL OR FTE < 0.1 - {FTE_EPSILON} OR FTE > 1.0 + {FTE_EPSILON}
+                OR ABS(FTE * 10 - ROUND(FTE * 10)) > {FTE_EPSILON}"""),
+
+        ("FTE sums to 1.0 per person",
+         f"""SELECT SID || ' / ' || SNAPSHOT FROM mpd_data
+             GROUP BY SID, SNAPSHOT
+             HAVING ABS(SUM(FTE) - 1.0) > {FTE_EPSILON}"""),
+
+        ("DFP equals DOMAIN-FUNCTION",
+         "SELECT ID FROM mpd_data WHERE DFP IS NOT DOMAIN || '-' || FUNCTION"),
+
+        ("Each DFP has one CIMPL_RANK",
+         """SELECT DFP FROM mpd_data GROUP BY DFP
+            HAVING COUNT(DISTINCT CIMPL_RANK) > 1"""),
+
+        ("Each CIMPL_RANK has one DFP",
+         """SELECT CIMPL_RANK FROM mpd_data GROUP BY CIMPL_RANK
+            HAVING COUNT(DISTINCT DFP) > 1"""),
+
+        # A person's roles are written consecutively with identical
+        # person-level fields, so a shared SID shows up as a broken ID run
+        # or conflicting attributes within one snapshot
+        ("SIDs are unique per person",
+         """SELECT SID || ' / ' || SNAPSHOT FROM mpd_data
+            GROUP BY SID, SNAPSHOT
+            HAVING MAX(ID) - MIN(ID) + 1 <> COUNT(*)
+                OR COUNT(DISTINCT CITY) > 1
+                OR COUNT(DISTINCT DUTY_ORG) > 1
+                OR COUNT(DISTINCT AFFILIATION_TYPE) > 1
+                OR COUNT(DISTINCT TOKENS) > 1"""),
+
+        # Missing keys are reported here rather than by the match rule below,
+        # where a NULL would never equal an MPD value
+        ("Test SID/SNAPSHOT/SNAPSHOT_MONTH are present",
+         """SELECT ID FROM test_scores
+            WHERE SID IS NULL OR SNAPSHOT IS NULL OR SNAPSHOT_MONTH IS NULL"""),
+
+        # One (SID, SNAPSHOT) index seek per test row
+        ("Test SID/SNAPSHOT/SNAPSHOT_MONTH match MPD",
+         """SELECT t.ID FROM test_scores t
+            WHERE t.SID IS NOT NULL AND t.SNAPSHOT IS NOT NULL AND t.SNAPSHOT_MONTH IS NOT NULL
+              AND NOT EXISTS (
+                SELECT 1 FROM mpd_data m
+                WHERE m.SID = t.SID
+                  AND m.SNAPSHOT = t.SNAPSHOT
+                  AND m.SNAPSHOT_MONTH = t.SNAPSHOT_MONTH
+            )"""),
+
+        ("TEST_GROUP follows score logic",
+         """SELECT ID FROM test_scores
+            WHERE TEST_GROUP IS NOT CASE
+                WHEN MAX(CAST(LISTEN_SCORE AS INTEGER), CAST(READ_SCORE AS INTEGER)) >= 3 THEN 'HIGH'
+                WHEN MAX(CAST(LISTEN_SCORE AS INTEGER), CAST(READ_SCORE AS INTEGER)) = 2 THEN 'MEDIUM'
+                ELSE 'LOW'
+            END"""),
+    ]
+
+def run_rule(cursor, sql, sample_size=5):
+    """Run one rule query, returning the violation count and a few samples"""
+    cursor.execute(f"SELECT COUNT(*) FROM ({sql})")
+    violations = cursor.fetchone()[0]
+
+    samples = []
+    if violations:
+        cursor.execute(f"{sql} LIMIT {sample_size}")
+        samples = [row[0] for row in cursor.fetchall()]
+
+    return violations, samples
+
+def validate_database(conn):
+    """Check every README data rule against an open database. Returns True if all pass"""
+    cursor = conn.cursor()
+
+    print("\n🔍 Validating data rules...")
+    all_passed = True
+    for name, sql in build_rules(cursor):
+        violations, samples = run_rule(cursor, sql)
+        if violations == 0:
+            print(f"  ✅ {name}")
+        else:
+            all_passed = False
+            print(f"  ❌ {name}: {violations:,} violations (e.g. {', '.join(map(str, samples))})")
+
+    return all_passed
+
+def main():
+    print("=== MPD Dataset Validator ===\n")
+
+    args = sys.argv[1:]
+    if not args:
+        args = ["mpd_notional_data.json", "test_scores_notional_data.json"]
+
+    staging_db = None
+    try:
+        if len(args) == 1:
+            db_file = args[0]
+            if not os.path.exists(db_file):
+                print(f"❌ Error: Database '{db_file}' not found")
+                return 1
+            print(f"Validating database: {db_file}")
+            conn = sqlite3.connect(db_file)
+        else:
+            mpd_file, test_file = args[0], args[1]
+            for filename in (mpd_file, test_file):
+                if not os.path.exists(filename):
+                    print(f"❌ Error: File '{filename}' not found")
+                    return 1
+
+            print(f"Validating files:")
+            print(f"  MPD data: {mpd_file}")
+            print(f"  Test scores: {test_file}\n")
+
+            handle, staging_db = tempfile.mkstemp(suffix=".db")
+            os.close(handle)
+            conn = stage_json_files(mpd_file, test_file, staging_db)
+
+        all_passed = validate_database(conn)
+        conn.close()
+
+    finally:
+        if staging_db and os.path.exists(staging_db):
+            os.remove(staging_db)
+
+    if all_passed:
+        print("\n🎉 All data rules passed")
+        return 0
+
+    print("\n❌ Data rule violations found")
+    return 1
+
+def show_usage():
+    """Show usage instructions"""
+    print("Usage:")
+    print("  python validate_data.py [mpd_file test_file | database_file]")
+    print("")
+    print("Examples:")
+    print("  python validate_data.py")
+    print("    Validates mpd_notional_data.json and test_scores_notional_data.json")
+    print("")
+    print("  python validate_data.py my_mpd.ndjson my_tests.ndjson")
+    print("    Validates JSON or NDJSON files (streamed, so memory stays bounded)")
+    print("")
+    print("  python validate_data.py development.db")
+    print("    Validates an existing SQLite database in place")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ['-h', '--help', 'help']:
+        show_usage()
+        sys.exit(0)
+
+    exit_code = main()
+    sys.exit(exit_code)
@@ -0,0 +1,179 @@
+import hashlib
+import random
+import struct
+import sys
+from functools import lru_cache
+from schema_compiler import DEFAULT_SCHEMA_FILE, load_schema, compile_schema, field_names, fte_split
+
+# Rows per block; a block is generated as a whole, so this is the cost of a random access
+BLOCK_SIZE = 1024
+
+# Recently used blocks kept in memory
+CACHED_BLOCKS = 8
+
+# 2 ** -53, to turn 53 random bits into a float in [0, 1)
+RECIP_BPF = 2 ** -53
+
+class CounterRandom(random.Random):
+    """
+    random.Random whose stream is BLAKE2b(key, counter) for counter = 0, 1, ...
+    Any stream can be recreated from its key alone, with no state carried
+    over from other streams, and choice/choices/randint work as usual.
+    """
+
+    def __init__(self, *key):
+        self._key = hashlib.blake2b(repr(key).encode(), digest_size=32).digest()
+        self._counter = 0
+        self._words = []
+        super().__init__()
+
+    def seed(self, *args, **kwargs):
+        # Streams are defined by their key, not by a seed
+        pass
+
+    def _next_word(self):
+        """Next 64 random bits, hashing a new counter value every 8 words"""
+        if not self._words:
+            digest = hashlib.blake2b(self._counter.to_bytes(8, 'little'), key=self._key).digest()
+            self._counter += 1
+            self._words = list(struct.unpack('<8Q', digest))
+        return self._words.pop()
+
+    def random(self):
+        return (self._next_word() >> 11) * RECIP_BPF
+
+    def getrandbits(self, k):
+        if k <= 0:
+            return 0
+        words = (k + 63) // 64
+        value = 0
+        for _ in range(words):
+            value = (value << 64) | self._next_word()
+        return value >> (words * 64 - k)
+
+class VirtualDataset:
+    """
+    A read-only sequence of total_rows MPD records where record i depends
+    only on (seed, i). Nothing is generated up front: rows are split into
+    blocks of BLOCK_SIZE, and a block is produced on first access by the
+    compiled schema generator driven by CounterRandom(seed, block). Persons
+    never span blocks (the last person of a block gets the remaining rows,
+    with FTE split accordingly).
+
+    Supports len(), indexing, slicing and iteration. Because blocks are
+    independent, workers can each take a row range and get exactly the rows
+    a single process would. As with the regular generator, SIDs are random
+    and only checked for uniqueness within a block. When total_rows cuts the
+    last person short, that person keeps only the roles that fit and their
+    FTE is split again over those roles, as the regular generator does for
+    its last person, so it still sums to 1.0. Every other row is the same in
+    any VirtualDataset with the same seed.
+    """
+
+    def __init__(self, total_rows, seed=0, schema_file=DEFAULT_SCHEMA_FILE, block_size=BLOCK_SIZE):
+        self.total_rows = total_rows
+        self.seed = seed
+        self.block_size = block_size
+        schema = load_schema(schema_file)
+        self._generate_batches, _ = compile_schema(schema)
+        self._block = lru_cache(maxsize=CACHED_BLOCKS)(self._generate_block)
+        fields = {field["kind"]: field for field in schema["fields"]}
+        self._sid_name = field_names(fields["sid"])[0] if "sid" in fields else None
+        self._fte_name = field_names(fields["fte_split"])[0] if "fte_split" in fields else None
+        self._fte_step = fields["fte_split"]["step"] if "fte_split" in fields else None
+        self._last_person_fte = None
+
+    def _generate_block(self, block_index):
+        """All records of one block (always a full block, so a row never depends on total_rows)"""
+        rng = CounterRandom(self.seed, block_index)
+        records = []
+        for batch in self._generate_batches(self.block_size, rng, start_id=block_index * self.block_size + 1):
+            records.extend(batch)
+        return records
+
+    def _cut_person_fte(self):
+        """{row index: FTE} for the roles of a person cut off at total_rows ({} if nobody is)"""
+        if self._last_person_fte is not None:
+            return self._last_person_fte
+
+        self._last_person_fte = {}
+        block_index, end = divmod(self.total_rows, self.block_size)
+        if end == 0 or self._sid_name is None or self._fte_name is None:
+            # Persons never span blocks, so a cut at a block boundary splits nobody
+            return self._last_person_fte
+
+        records = self._block(block_index)
+        sid = records[end - 1][self._sid_name]
+        if records[end][self._sid_name] != sid:
+            return self._last_person_fte
+
+        start = end - 1
+        while start > 0 and records[start - 1][self._sid_name] == sid:
+            start -= 1
+        splits = fte_split(end - start, self._fte_step, CounterRandom(self.seed, "fte", self.total_rows))
+        first_row = block_index * self.block_size + start
+        self._last_person_fte = {first_row + role: fte for role, fte in enumerate(splits)}
+        return self._last_person_fte
+
+    def _record(self, index, record):
+        """Copy of a block record as row index of this dataset"""
+        record = dict(record)
+        fte = self._cut_person_fte().get(index)
+        if fte is not None:
+            record[self._fte_name] = fte
+        return record
+
+    def __len__(self):
+        return self.total_rows
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self.iter_rows(*index.indices(self.total_rows)))
+
+        if index < 0:
+            index += self.total_rows
+        if not 0 <= index < self.total_rows:
+            raise IndexError("VirtualDataset index out of range")
+
+        block_index, offset = divmod(index, self.block_size)
+        return self._record(index, self._block(block_index)[offset])
+
+    def __iter__(self):
+        for batch in self.iter_batches():
+            yield from batch
+
+    def iter_rows(self, start, stop, step=1):
+        """Yield the records for range(start, stop, step), generating each block at most once"""
+        for index in range(start, stop, step):
+            block_index, offset = divmod(index, self.block_size)
+            yield self._record(index, self._block(block_index)[offset])
+
+    def iter_batches(self, start=0, stop=None):
+        """Yield lists of records for rows start..stop, one block at a time"""
+        stop = self.total_rows if stop is None else min(stop, self.total_rows)
+        while start < stop:
+            block_index, offset = divmod(start, self.block_size)
+            end = min(stop, (block_index + 1) * self.block_size)
+            # Not cached: a sequential scan would only evict useful blocks
+            records = self._generate_block(block_index)
+            batch = records[offset:offset + end - start]
+            for index, fte in self._cut_person_fte().items():
+                if start <= index < end:
+                    batch[index - start][self._fte_name] = fte
+            yield batch
+            start = end
+
+    def sample(self, count, rng=random):
+        """count distinct random records, generating only the blocks they fall in"""
+        indices = sorted(rng.sample(range(self.total_rows), count))
+        return [self[index] for index in indices]
+
+if __name__ == "__main__":
+    # Print a few rows from any position, e.g. python virtual_dataset.py 100000000 99999990 3
+    total_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    start = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    count = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    dataset = VirtualDataset(total_rows)
+    for record in dataset[start:start + count]:
+        print(record)
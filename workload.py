@@ -0,0 +1,346 @@
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+from live_database import LiveDatabase
+from schema_compiler import DEFAULT_SCHEMA_FILE, load_schema
+from token_index import TOKENS, evaluate_expression
+from json_to_sqlite import snapshot_source, split_args
+
+# Every subset of TOKENS is a possible viewer token set
+TOKEN_SET_COUNT = 2 ** len(TOKENS)
+
+# How many tokens a viewer holds -> relative weight
+VIEWER_TOKEN_COUNTS = {1: 5, 2: 15, 3: 25, 4: 25, 5: 15, 6: 10, 7: 5}
+
+# Persons sampled from the database for point lookups
+SAMPLED_PERSONS = 1000
+
+# Queries running longer than this many seconds are interrupted and counted as
+# timeouts - well above any healthy plan, so only runaway plans hit it
+DEFAULT_QUERY_TIMEOUT = 5.0
+
+# SQLite VM instructions between query timeout checks
+TIMEOUT_CHECK_INTERVAL = 50000
+
+def visible(alias, access="a"):
+    """Join that keeps only the rows of alias whose TOKENS the current viewer satisfies"""
+    return (f"JOIN temp.token_access {access} ON {access}.EXPRESSION = {alias}.TOKENS "
+            f"AND (({access}.LOW & :low) | ({access}.HIGH & :high)) != 0")
+
+# Dashboard query mix: (name, relative weight, SQL). Queries follow the README
+# examples, with every table filtered down to what the viewer may see.
+# Single-snapshot queries read {mpd_data}/{test_scores}, filled in per snapshot
+# by snapshot_queries. Questions about every snapshot read person_summary,
+# which holds one row per person with their TOKENS and test count, instead of
+# joining or aggregating the full tables
+QUERY_MIX = [
+    ("person_detail", 30, f"""
+        SELECT v.* FROM v_mpd_data v {visible("v")}
+        WHERE v.SID = :sid AND v.SNAPSHOT = :person_snapshot
+    """),
+    ("person_tests", 15, f"""
+        SELECT t.LANGUAGE, t.LISTEN_SCORE, t.READ_SCORE, t.TEST_GROUP
+        FROM test_scores t {visible("t")}
+        WHERE t.SID = :sid AND t.SNAPSHOT = :person_snapshot
+    """),
+    ("domain_counts", 20, f"""
+        SELECT m.DOMAIN, COUNT(*) AS count
+        FROM {{mpd_data}} m {visible("m")}
+        WHERE m.SNAPSHOT = :snapshot
+        GROUP BY m.DOMAIN ORDER BY count DESC
+    """),
+    ("language_counts", 10, f"""
+        SELECT t.LANGUAGE, COUNT(*) AS test_count
+        FROM {{test_scores}} t {visible("t")}
+        WHERE t.SNAPSHOT = :snapshot
+        GROUP BY t.LANGUAGE ORDER BY test_count DESC
+    """),
+    ("domain_function_top10", 10, f"""
+        SELECT m.DOMAIN, m.FUNCTION, COUNT(*) AS count
+        FROM {{mpd_data}} m {visible("m")}
+        WHERE m.SNAPSHOT = :snapshot
+        GROUP BY m.DOMAIN, m.FUNCTION ORDER BY count DESC LIMIT 10
+    """),
+    ("city_tests", 10, f"""
+        SELECT m.SID, m.FUNCTION, m.DOMAIN, t.LANGUAGE, t.LISTEN_SCORE, t.READ_SCORE, t.TEST_GROUP
+        FROM {{mpd_data}} m {visible("m", "a")}
+        JOIN {{test_scores}} t ON m.SID = t.SID AND m.SNAPSHOT = t.SNAPSHOT
+        {visible("t", "b")}
+        WHERE m.CITY = :city AND m.SNAPSHOT = :snapshot
+    """),
+    # TOKENS is a person-level field, so a person's ROLE_COUNT rows share one complexity
+    ("token_complexity", 3, f"""
+        SELECT
+            CASE
+                WHEN p.TOKENS LIKE '%(%' THEN 'COMPLEX'
+                WHEN p.TOKENS LIKE '%&%&%' OR p.TOKENS LIKE '%|%|%' THEN 'MEDIUM'
+                ELSE 'SIMPLE'
+            END AS complexity,
+            SUM(p.ROLE_COUNT) AS count
+        FROM person_summary p {visible("p")}
+        GROUP BY complexity
+    """),
+    ("coverage_by_snapshot", 2, f"""
+        SELECT
+            p.SNAPSHOT,
+            COUNT(*) AS total_personnel,
+            SUM(p.TEST_COUNT > 0) AS personnel_with_tests
+        FROM person_summary p {visible("p", "a")}
+        GROUP BY p.SNAPSHOT ORDER BY p.SNAPSHOT
+    """),
+]
+
+def schema_values(schema, name):
+    """Values of a choice field in the schema spec (first element for grouped fields)"""
+    for field in schema["fields"]:
+        names = field.get("names") or [field.get("name")]
+        if name in names and "values" in field:
+            position = names.index(name)
+            return [value[position] if isinstance(value, list) else value for value in field["values"]]
+    return []
+
+def make_viewers(count, rng):
+    """count viewer token sets, as indexes into the TOKEN_SET_COUNT possible sets"""
+    sizes, weights = zip(*VIEWER_TOKEN_COUNTS.items())
+    viewers = []
+    for _ in range(count):
+        tokens = rng.sample(TOKENS, rng.choices(sizes, weights)[0])
+        viewers.append(sum(1 << TOKENS.index(token) for token in tokens))
+    return viewers
+
+def viewer_tokens(token_set):
+    """Tokens held by a token set index"""
+    return [token for position, token in enumerate(TOKENS) if token_set >> position & 1]
+
+def signed64(value):
+    """Reinterpret an unsigned 64-bit value as SQLite's signed INTEGER"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+def build_access_rows(conn):
+    """
+    (EXPRESSION, LOW, HIGH) for every distinct TOKENS expression. Bit s of
+    the 128-bit mask HIGH:LOW is set when token set s satisfies the
+    expression; evaluating with bitmasks answers all sets in one pass.
+    """
+    token_masks = {
+        token: sum(1 << token_set for token_set in range(TOKEN_SET_COUNT) if token_set >> position & 1)
+        for position, token in enumerate(TOKENS)
+    }
+    low_mask = (1 << 64) - 1
+
+    rows = []
+    for (expression,) in conn.execute("SELECT TOKENS FROM mpd_data UNION SELECT TOKENS FROM test_scores"):
+        if not expression:
+            continue
+        mask = evaluate_expression(expression, token_masks)
+        rows.append((expression, signed64(mask & low_mask), signed64(mask >> 64)))
+    return rows
+
+def create_access_table(conn, access_rows):
+    """Load the expression access masks into a per-connection temp table"""
+    conn.execute("DROP TABLE IF EXISTS temp.token_access")
+    conn.execute("""
+        CREATE TEMP TABLE token_access (
+            EXPRESSION VARCHAR(500) PRIMARY KEY,
+            LOW INTEGER,
+            HIGH INTEGER
+        ) WITHOUT ROWID
+    """)
+    conn.executemany("INSERT INTO temp.token_access VALUES (?, ?, ?)", access_rows)
+    conn.commit()
+
+def viewer_parameters(token_set):
+    """:low/:high bind values that select one token set's bit in the access masks"""
+    if token_set < 64:
+        return signed64(1 << token_set), 0
+    return 0, signed64(1 << (token_set - 64))
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+def snapshot_queries(conn, snapshots):
+    """
+    {snapshot: {query name: SQL}}: QUERY_MIX with {mpd_data} and {test_scores}
+    replaced by the snapshot's partition or per-snapshot view (snapshot_source),
+    which SQLite reads directly instead of materializing a UNION ALL view
+    """
+    cursor = conn.cursor()
+    queries = {}
+    for snapshot in snapshots:
+        sources = {table_name: snapshot_source(cursor, table_name, snapshot)
+                   for table_name in ("mpd_data", "test_scores")}
+        queries[snapshot] = {name: sql.format(**sources) for name, _, sql in QUERY_MIX}
+    return queries
+
+def run_reader(db_file, access_rows, viewers, parameters, deadline, seed, query_timeout,
+               latencies, timeouts, errors):
+    """One dashboard reader: run weighted random queries until the deadline"""
+    rng = random.Random(seed)
+    names = [name for name, _, _ in QUERY_MIX]
+    weights = [weight for _, weight, _ in QUERY_MIX]
+    queries = {}
+    interrupt_at = 0.0
+
+    def past_timeout():
+        # A true result makes SQLite abort the running query
+        return time.perf_counter() > interrupt_at
+
+    database = LiveDatabase(db_file)
+    prepared = None
+    while time.perf_counter() < deadline:
+        conn = database.connection()
+        if conn is not prepared:
+            # Temp tables live on the connection, and a rebuild swapped in may
+            # use another layout: reload both
+            create_access_table(conn, access_rows)
+            queries = snapshot_queries(conn, parameters["snapshots"])
+            conn.set_progress_handler(past_timeout, TIMEOUT_CHECK_INTERVAL)
+            prepared = conn
+
+        name = rng.choices(names, weights)[0]
+        low, high = viewer_parameters(rng.choice(viewers))
+        sid, person_snapshot = rng.choice(parameters["persons"])
+        values = {
+            "low": low,
+            "high": high,
+            "sid": sid,
+            "person_snapshot": person_snapshot,
+            "snapshot": rng.choice(parameters["snapshots"]),
+            "city": rng.choice(parameters["cities"]),
+        }
+
+        start = time.perf_counter()
+        interrupt_at = start + query_timeout
+        try:
+            conn.execute(queries[values["snapshot"]][name], values).fetchall()
+        except sqlite3.OperationalError as e:
+            if time.perf_counter() > interrupt_at:
+                timeouts.append(name)
+            else:
+                errors.append((name, str(e)))
+            continue
+        except sqlite3.Error as e:
+            errors.append((name, str(e)))
+            continue
+        latencies[name].append(time.perf_counter() - start)
+
+    database.close()
+
+def run_workload(db_file, readers=4, duration=10.0, viewer_count=50, seed=0,
+                 query_timeout=DEFAULT_QUERY_TIMEOUT, schema_file=DEFAULT_SCHEMA_FILE):
+    """
+    Replay the dashboard query mix with readers concurrent threads for
+    duration seconds. Returns {query name: sorted latencies in seconds} of
+    completed queries, the names of queries that hit query_timeout and the
+    list of (query name, error) for failed queries.
+    """
+    rng = random.Random(seed)
+    schema = load_schema(schema_file)
+    viewers = make_viewers(viewer_count, rng)
+
+    setup = LiveDatabase(db_file)
+    conn = setup.connection()
+    access_rows = build_access_rows(conn)
+    has_statistics = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+    parameters = {
+        "snapshots": schema_values(schema, "SNAPSHOT"),
+        "cities": schema_values(schema, "CITY"),
+        "persons": conn.execute(
+            "SELECT SID, SNAPSHOT FROM mpd_data ORDER BY RANDOM() LIMIT ?", (SAMPLED_PERSONS,)
+        ).fetchall(),
+    }
+    setup.close()
+
+    print(f"Viewers: {viewer_count} ({len(set(viewers))} distinct token sets, "
+          f"e.g. {'&'.join(viewer_tokens(viewers[0]))})")
+    print(f"Token expressions: {len(access_rows):,}")
+    if not has_statistics:
+        print("⚠️  No ANALYZE statistics: the SID/SNAPSHOT joins may be planned through the SNAPSHOT index.")
+        print("   Rebuild with json_to_sqlite.py or run ANALYZE before comparing results.")
+
+    latencies = [{name: [] for name, _, _ in QUERY_MIX} for _ in range(readers)]
+    timeouts = []
+    errors = []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=run_reader,
+                         args=(db_file, access_rows, viewers, parameters, deadline, seed + reader + 1,
+                               query_timeout, latencies[reader], timeouts, errors))
+        for reader in range(readers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    merged = {}
+    for name, _, _ in QUERY_MIX:
+        merged[name] = sorted(value for reader_latencies in latencies for value in reader_latencies[name])
+    return merged, timeouts, errors
+
+def print_report(latencies, timeouts, errors, duration):
+    """Per-query count, share, timeouts and latency percentiles, then overall throughput"""
+    total = sum(len(values) for values in latencies.values())
+    print(f"\n{'Query':<24}{'Count':>9}{'Share':>8}{'Timeouts':>10}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, values in latencies.items():
+        timed_out = timeouts.count(name)
+        if not values:
+            print(f"{name:<24}{0:>9}{'':>8}{timed_out:>10,}")
+            continue
+        share = len(values) / total * 100
+        p50, p95, p99 = (percentile(values, pct) * 1000 for pct in (50, 95, 99))
+        print(f"{name:<24}{len(values):>9,}{share:>7.1f}%{timed_out:>10,}"
+              f"{p50:>10.2f}{p95:>10.2f}{p99:>10.2f}{values[-1] * 1000:>10.2f}")
+
+    print(f"\nTotal: {total:,} queries in {duration:.1f}s = {total / duration:,.1f} queries/s")
+    if timeouts:
+        print(f"⚠️  {len(timeouts):,} queries interrupted after the query timeout (not in the percentiles)")
+    if errors:
+        print(f"❌ {len(errors):,} queries failed, e.g. {errors[0][0]}: {errors[0][1]}")
+
+def main():
+    args, options = split_args(sys.argv[1:])
+    db_file = args[0] if args else "development.db"
+    readers = int(options['readers']) if options.get('readers') else 4
+    duration = float(options['duration']) if options.get('duration') else 10.0
+    viewer_count = int(options['viewers']) if options.get('viewers') else 50
+    seed = int(options['seed']) if options.get('seed') else 0
+    query_timeout = float(options['timeout']) if options.get('timeout') else DEFAULT_QUERY_TIMEOUT
+
+    if not os.path.exists(db_file):
+        print(f"❌ Error: Database '{db_file}' not found")
+        return 1
+
+    print("=== Dashboard Workload Replay ===\n")
+    print(f"Database: {db_file}")
+    print(f"Readers: {readers}, duration: {duration:.1f}s")
+
+    latencies, timeouts, errors = run_workload(db_file, readers, duration, viewer_count, seed, query_timeout)
+    print_report(latencies, timeouts, errors, duration)
+    return 1 if errors else 0
+
+def show_usage():
+    """Show usage instructions"""
+    print("Usage:")
+    print("  python workload.py [database_file] [--readers=4] [--duration=10] [--viewers=50] [--seed=0]")
+    print("                            [--timeout=5]")
+    print("")
+    print("Examples:")
+    print("  python workload.py development.db --readers=8 --duration=30")
+    print("    Runs the dashboard query mix on 8 concurrent read-only connections for 30 seconds")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ['-h', '--help', 'help']:
+        show_usage()
+        sys.exit(0)
+
+    exit_code = main()
+    sys.exit(exit_code)